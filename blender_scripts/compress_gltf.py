@@ -0,0 +1,134 @@
+# blender_scripts/compress_gltf.py
+#!/usr/bin/env python3
+"""
+Script de compression Draco d'un ou plusieurs fichiers GLTF/GLB via l'exporteur glTF de Blender.
+
+Chaque fichier source est réexporté à côté de l'original sous la forme <nom>_draco.glb
+(géométrie compressée KHR_draco_mesh_compression, textures embarquées).
+La variante meshopt (EXT_meshopt_compression) est produite côté Odoo avec gltfpack.
+
+Usage:
+    1. Depuis Blender:
+       blender --background --python compress_gltf.py -- [--level 6] <fichier1.gltf> [<fichier2.gltf> ...]
+    2. Depuis la ligne de commande:
+       python compress_gltf.py [--level 6] <fichier1.gltf> [...] [--blender-path CHEMIN]
+
+Sortie (une ligne par fichier compressé, exploitée par Odoo):
+    COMPRESSED_FILE=<fichier_source>|draco|<fichier_compressé>
+"""
+
+import sys
+import os
+import logging
+import argparse
+import subprocess
+import shutil
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+RUNNING_IN_BLENDER = 'bpy' in sys.modules or '--background' in sys.argv
+
+if RUNNING_IN_BLENDER:
+    import bpy
+
+DEFAULT_LEVEL = 6
+# Bits de quantification : compromis précision / taille adapté à la visualisation
+POSITION_QUANTIZATION = 14
+NORMAL_QUANTIZATION = 10
+TEXCOORD_QUANTIZATION = 12
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Compresse des fichiers GLTF/GLB avec Draco')
+    parser.add_argument('--level', type=int, default=DEFAULT_LEVEL,
+                        help='Niveau de compression Draco (0 à 10)')
+    parser.add_argument('gltf_files', nargs='+', help='Fichiers GLTF/GLB sources')
+    if RUNNING_IN_BLENDER:
+        argv = sys.argv
+        if "--" in argv:
+            argv = argv[argv.index("--") + 1:]
+        else:
+            argv = []
+        return parser.parse_args(argv)
+    parser.add_argument('--blender-path', help='Chemin vers l\'exécutable Blender')
+    return parser.parse_args()
+
+
+def compressed_output_path(gltf_file):
+    return f"{os.path.splitext(gltf_file)[0]}_draco.glb"
+
+
+def compress_file(gltf_file, level):
+    if not os.path.isfile(gltf_file):
+        logger.error(f"Le fichier {gltf_file} n'existe pas")
+        return False
+
+    output_file = compressed_output_path(gltf_file)
+    try:
+        bpy.ops.wm.read_factory_settings(use_empty=True)
+        bpy.ops.import_scene.gltf(filepath=gltf_file)
+        bpy.ops.export_scene.gltf(
+            filepath=output_file,
+            export_format='GLB',
+            export_texcoords=True,
+            export_normals=True,
+            export_materials='EXPORT',
+            export_animations=True,
+            export_yup=True,
+            export_apply=True,
+            export_draco_mesh_compression_enable=True,
+            export_draco_mesh_compression_level=level,
+            export_draco_position_quantization=POSITION_QUANTIZATION,
+            export_draco_normal_quantization=NORMAL_QUANTIZATION,
+            export_draco_texcoord_quantization=TEXCOORD_QUANTIZATION,
+            will_save_settings=False
+        )
+        print(f"COMPRESSED_FILE={gltf_file}|draco|{output_file}")
+        logger.info(f"Fichier compressé (Draco niveau {level}): {output_file}")
+        return True
+    except Exception as e:
+        logger.error(f"Erreur lors de la compression Draco de {gltf_file}: {str(e)}")
+        return False
+
+
+def compress_all():
+    args = parse_args()
+    level = max(0, min(10, args.level))
+    compressed = sum(1 for gltf_file in args.gltf_files if compress_file(os.path.abspath(gltf_file), level))
+    logger.info(f"Compression terminée: {compressed}/{len(args.gltf_files)} fichiers")
+    print(f"FILES_COMPRESSED={compressed}")
+
+
+def run_from_command_line():
+    args = parse_args()
+    blender_path = args.blender_path or os.environ.get("BLENDER_PATH") or shutil.which("blender")
+    if not blender_path:
+        logger.error("Aucun exécutable Blender trouvé")
+        sys.exit(1)
+
+    cmd = [
+        blender_path,
+        "--background",
+        "--python", os.path.abspath(__file__),
+        "--", "--level", str(args.level),
+    ] + [os.path.abspath(path) for path in args.gltf_files]
+
+    logger.info(f"Exécution de Blender: {' '.join(cmd)}")
+    process = subprocess.run(cmd, capture_output=True, text=True)
+
+    if process.stdout:
+        logger.info(f"Sortie de Blender:\n{process.stdout}")
+    if process.stderr:
+        logger.warning(f"Erreurs Blender:\n{process.stderr}")
+
+    if process.returncode != 0:
+        logger.error(f"Échec de la compression (code {process.returncode})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    if RUNNING_IN_BLENDER:
+        compress_all()
+    else:
+        run_from_command_line()
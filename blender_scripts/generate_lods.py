@@ -0,0 +1,180 @@
+# blender_scripts/generate_lods.py
+#!/usr/bin/env python3
+"""
+Script de génération des niveaux de détail (LOD) d'un ou plusieurs fichiers GLTF/GLB
+via le modificateur Decimate de Blender.
+
+Pour chaque fichier source et chaque ratio, la géométrie est décimée puis exportée
+à côté de l'original sous la forme <nom>_lod<niveau>.gltf (+ .bin). Les textures
+sont partagées entre niveaux dans le sous-dossier lod_textures/.
+
+Usage:
+    1. Depuis Blender:
+       blender --background --python generate_lods.py -- --ratios 0.5,0.15 <fichier1.gltf> [<fichier2.gltf> ...]
+    2. Depuis la ligne de commande:
+       python generate_lods.py --ratios 0.5,0.15 <fichier1.gltf> [...] [--blender-path CHEMIN]
+
+Sortie (une ligne par niveau généré, exploitée par Odoo):
+    LOD_FILE=<fichier_source>|<niveau>|<ratio>|<fichier_lod>
+"""
+
+import sys
+import os
+import logging
+import argparse
+import subprocess
+import shutil
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+RUNNING_IN_BLENDER = 'bpy' in sys.modules or '--background' in sys.argv
+
+if RUNNING_IN_BLENDER:
+    import bpy
+
+DEFAULT_RATIOS = "0.5,0.15"
+LOD_TEXTURE_DIR = "lod_textures"
+# En dessous de ce nombre de faces, un maillage est conservé tel quel
+MIN_MESH_FACES = 64
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Génère des niveaux de détail décimés pour des fichiers GLTF/GLB')
+    parser.add_argument('--ratios', default=DEFAULT_RATIOS,
+                        help='Ratios de décimation séparés par des virgules, du plus fin au plus grossier')
+    parser.add_argument('gltf_files', nargs='+', help='Fichiers GLTF/GLB sources')
+    if RUNNING_IN_BLENDER:
+        argv = sys.argv
+        if "--" in argv:
+            argv = argv[argv.index("--") + 1:]
+        else:
+            argv = []
+        return parser.parse_args(argv)
+    parser.add_argument('--blender-path', help='Chemin vers l\'exécutable Blender')
+    return parser.parse_args()
+
+
+def parse_ratios(ratios):
+    """Ratios valides (0 < r < 1), triés du plus fin au plus grossier"""
+    values = []
+    for value in str(ratios).split(','):
+        try:
+            ratio = float(value.strip())
+        except ValueError:
+            continue
+        if 0.0 < ratio < 1.0 and ratio not in values:
+            values.append(ratio)
+    return sorted(values, reverse=True)
+
+
+def lod_output_path(gltf_file, level):
+    base = os.path.splitext(gltf_file)[0]
+    return f"{base}_lod{level}.gltf"
+
+
+def reset_scene():
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+
+
+def decimate_scene(ratio):
+    """Ajoute un modificateur Decimate (effondrement d'arêtes) à chaque maillage de la scène"""
+    decimated = 0
+    for obj in bpy.context.scene.objects:
+        if obj.type != 'MESH' or len(obj.data.polygons) < MIN_MESH_FACES:
+            continue
+        modifier = obj.modifiers.new(name='CMMS_LOD', type='DECIMATE')
+        modifier.decimate_type = 'COLLAPSE'
+        modifier.ratio = ratio
+        modifier.use_collapse_triangulate = True
+        decimated += 1
+    return decimated
+
+
+def export_lod(output_file):
+    bpy.ops.export_scene.gltf(
+        filepath=output_file,
+        export_format='GLTF_SEPARATE',
+        export_texture_dir=LOD_TEXTURE_DIR,
+        export_texcoords=True,
+        export_normals=True,
+        export_materials='EXPORT',
+        export_animations=False,
+        export_yup=True,
+        export_apply=True,  # Applique le Decimate à l'export
+        will_save_settings=False
+    )
+
+
+def generate_lods(gltf_file, ratios):
+    if not os.path.isfile(gltf_file):
+        logger.error(f"Le fichier {gltf_file} n'existe pas")
+        return 0
+
+    generated = 0
+    for level, ratio in enumerate(ratios, start=1):
+        output_file = lod_output_path(gltf_file, level)
+        try:
+            # Réimport à chaque niveau : le ratio s'applique toujours à la géométrie d'origine
+            reset_scene()
+            bpy.ops.import_scene.gltf(filepath=gltf_file)
+            decimated = decimate_scene(ratio)
+            if not decimated:
+                logger.info(f"Aucun maillage à décimer dans {gltf_file}, LOD ignorés")
+                break
+            export_lod(output_file)
+            print(f"LOD_FILE={gltf_file}|{level}|{ratio}|{output_file}")
+            logger.info(f"LOD {level} (ratio {ratio}) exporté: {output_file}")
+            generated += 1
+        except Exception as e:
+            logger.error(f"Erreur lors de la génération du LOD {level} de {gltf_file}: {str(e)}")
+    return generated
+
+
+def generate_all_lods():
+    args = parse_args()
+    ratios = parse_ratios(args.ratios)
+    if not ratios:
+        logger.error(f"Aucun ratio de décimation valide: {args.ratios}")
+        sys.exit(1)
+
+    total = 0
+    for gltf_file in args.gltf_files:
+        total += generate_lods(os.path.abspath(gltf_file), ratios)
+
+    logger.info(f"Génération des LOD terminée: {total} fichiers pour {len(args.gltf_files)} modèles")
+    print(f"LODS_GENERATED={total}")
+
+
+def run_from_command_line():
+    args = parse_args()
+    blender_path = args.blender_path or os.environ.get("BLENDER_PATH") or shutil.which("blender")
+    if not blender_path:
+        logger.error("Aucun exécutable Blender trouvé")
+        sys.exit(1)
+
+    cmd = [
+        blender_path,
+        "--background",
+        "--python", os.path.abspath(__file__),
+        "--", "--ratios", args.ratios,
+    ] + [os.path.abspath(path) for path in args.gltf_files]
+
+    logger.info(f"Exécution de Blender: {' '.join(cmd)}")
+    process = subprocess.run(cmd, capture_output=True, text=True)
+
+    if process.stdout:
+        logger.info(f"Sortie de Blender:\n{process.stdout}")
+    if process.stderr:
+        logger.warning(f"Erreurs Blender:\n{process.stderr}")
+
+    if process.returncode != 0:
+        logger.error(f"Échec de la génération des LOD (code {process.returncode})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    if RUNNING_IN_BLENDER:
+        generate_all_lods()
+    else:
+        run_from_command_line()
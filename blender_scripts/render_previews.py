@@ -0,0 +1,220 @@
+# blender_scripts/render_previews.py
+#!/usr/bin/env python3
+"""
+Script de rendu des aperçus d'un fichier GLTF/GLB : une vignette fixe (vue 3/4) et les images
+d'un tour complet autour du modèle (turntable), sur fond transparent.
+
+Les images sont écrites en PNG dans le dossier de sortie ; le redimensionnement aux différentes
+tailles et l'encodage WebP (animé pour le turntable) sont faits côté Odoo.
+Le moteur Cycles (CPU) est utilisé : il ne nécessite ni écran ni contexte OpenGL.
+
+Usage:
+    1. Depuis Blender:
+       blender --background --python render_previews.py -- [--size 512] [--turntable-size 256]
+               [--frames 12] --output-dir <dossier> <fichier.gltf>
+    2. Depuis la ligne de commande:
+       python render_previews.py [options] --output-dir <dossier> <fichier.gltf> [--blender-path CHEMIN]
+
+Sortie (une ligne par image rendue, exploitée par Odoo):
+    PREVIEW_FILE=still|0|<fichier_png>
+    PREVIEW_FILE=frame|<index>|<fichier_png>
+"""
+
+import sys
+import os
+import math
+import logging
+import argparse
+import subprocess
+import shutil
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+RUNNING_IN_BLENDER = 'bpy' in sys.modules or '--background' in sys.argv
+
+if RUNNING_IN_BLENDER:
+    import bpy
+    from mathutils import Vector
+
+DEFAULT_SIZE = 512
+DEFAULT_TURNTABLE_SIZE = 256
+DEFAULT_FRAMES = 12
+# Échantillons Cycles : suffisant pour une vignette, le débruitage lisse le reste
+RENDER_SAMPLES = 32
+# Direction de la caméra (vue 3/4 plongeante) et marge autour de la sphère englobante
+CAMERA_DIRECTION = (1.0, -1.0, 0.7)
+FRAMING_MARGIN = 1.1
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Rend la vignette et le turntable d\'un fichier GLTF/GLB')
+    parser.add_argument('--size', type=int, default=DEFAULT_SIZE, help='Taille de la vignette fixe (pixels)')
+    parser.add_argument('--turntable-size', type=int, default=DEFAULT_TURNTABLE_SIZE,
+                        help='Taille des images du turntable (pixels)')
+    parser.add_argument('--frames', type=int, default=DEFAULT_FRAMES,
+                        help='Nombre d\'images du turntable (0 pour ne rendre que la vignette)')
+    parser.add_argument('--output-dir', required=True, help='Dossier des images PNG rendues')
+    parser.add_argument('gltf_file', help='Fichier GLTF/GLB source')
+    if RUNNING_IN_BLENDER:
+        argv = sys.argv
+        if "--" in argv:
+            argv = argv[argv.index("--") + 1:]
+        else:
+            argv = []
+        return parser.parse_args(argv)
+    parser.add_argument('--blender-path', help='Chemin vers l\'exécutable Blender')
+    return parser.parse_args()
+
+
+def setup_scene():
+    scene = bpy.context.scene
+    scene.render.engine = 'CYCLES'
+    scene.cycles.device = 'CPU'
+    scene.cycles.samples = RENDER_SAMPLES
+    scene.render.film_transparent = True
+    scene.render.image_settings.file_format = 'PNG'
+    scene.render.image_settings.color_mode = 'RGBA'
+    scene.render.resolution_percentage = 100
+
+    # Éclairage neutre : ambiance du monde + soleil
+    world = bpy.data.worlds.new("CMMS_Preview")
+    world.use_nodes = True
+    background = world.node_tree.nodes.get('Background')
+    if background:
+        background.inputs['Color'].default_value = (0.8, 0.8, 0.8, 1.0)
+        background.inputs['Strength'].default_value = 0.8
+    scene.world = world
+    sun_data = bpy.data.lights.new("CMMS_Sun", type='SUN')
+    sun_data.energy = 3.0
+    sun = bpy.data.objects.new("CMMS_Sun", sun_data)
+    sun.rotation_euler = (math.radians(50), 0.0, math.radians(30))
+    scene.collection.objects.link(sun)
+    return scene
+
+
+def bounding_sphere():
+    """Centre et rayon de la sphère englobant les maillages de la scène (coordonnées monde)"""
+    corners = [obj.matrix_world @ Vector(corner)
+               for obj in bpy.context.scene.objects if obj.type == 'MESH'
+               for corner in obj.bound_box]
+    if not corners:
+        return None, 0.0
+    minimum = Vector([min(corner[axis] for corner in corners) for axis in range(3)])
+    maximum = Vector([max(corner[axis] for corner in corners) for axis in range(3)])
+    center = (minimum + maximum) / 2
+    return center, max((corner - center).length for corner in corners)
+
+
+def setup_camera(scene, center, radius):
+    """Caméra cadrant la sphère englobante, rattachée à un pivot centré sur le modèle"""
+    pivot = bpy.data.objects.new("CMMS_Pivot", None)
+    pivot.location = center
+    scene.collection.objects.link(pivot)
+
+    camera_data = bpy.data.cameras.new("CMMS_Camera")
+    camera_data.clip_end = max(1000.0, radius * 20)
+    camera = bpy.data.objects.new("CMMS_Camera", camera_data)
+    scene.collection.objects.link(camera)
+    scene.camera = camera
+
+    half_fov = camera_data.angle / 2
+    distance = radius / math.sin(half_fov) * FRAMING_MARGIN
+    camera.parent = pivot
+    camera.location = Vector(CAMERA_DIRECTION).normalized() * distance
+    constraint = camera.constraints.new(type='TRACK_TO')
+    constraint.target = pivot
+    constraint.track_axis = 'TRACK_NEGATIVE_Z'
+    constraint.up_axis = 'UP_Y'
+    return pivot
+
+
+def render_image(scene, size, output_file):
+    scene.render.resolution_x = size
+    scene.render.resolution_y = size
+    scene.render.filepath = output_file
+    bpy.ops.render.render(write_still=True)
+
+
+def render_previews(gltf_file, output_dir, size, turntable_size, frames):
+    if not os.path.isfile(gltf_file):
+        logger.error(f"Le fichier {gltf_file} n'existe pas")
+        return 0
+
+    bpy.ops.wm.read_factory_settings(use_empty=True)
+    bpy.ops.import_scene.gltf(filepath=gltf_file)
+    center, radius = bounding_sphere()
+    if center is None or radius <= 0:
+        logger.error(f"Aucun maillage à rendre dans {gltf_file}")
+        return 0
+
+    scene = setup_scene()
+    pivot = setup_camera(scene, center, radius)
+    os.makedirs(output_dir, exist_ok=True)
+
+    rendered = 0
+    try:
+        still_file = os.path.join(output_dir, "still.png")
+        render_image(scene, size, still_file)
+        print(f"PREVIEW_FILE=still|0|{still_file}")
+        rendered += 1
+
+        for index in range(frames):
+            pivot.rotation_euler = (0.0, 0.0, 2 * math.pi * index / frames)
+            frame_file = os.path.join(output_dir, f"frame_{index:03d}.png")
+            render_image(scene, turntable_size, frame_file)
+            print(f"PREVIEW_FILE=frame|{index}|{frame_file}")
+            rendered += 1
+    except Exception as e:
+        logger.error(f"Erreur lors du rendu des aperçus de {gltf_file}: {str(e)}")
+
+    logger.info(f"{rendered} images rendues pour {gltf_file}")
+    return rendered
+
+
+def render_all():
+    args = parse_args()
+    rendered = render_previews(
+        os.path.abspath(args.gltf_file),
+        os.path.abspath(args.output_dir),
+        max(16, args.size),
+        max(16, args.turntable_size),
+        max(0, args.frames),
+    )
+    print(f"PREVIEWS_RENDERED={rendered}")
+
+
+def run_from_command_line():
+    args = parse_args()
+    blender_path = args.blender_path or os.environ.get("BLENDER_PATH") or shutil.which("blender")
+    if not blender_path:
+        logger.error("Aucun exécutable Blender trouvé")
+        sys.exit(1)
+
+    cmd = [
+        blender_path,
+        "--background",
+        "--python", os.path.abspath(__file__),
+        "--", "--size", str(args.size), "--turntable-size", str(args.turntable_size),
+        "--frames", str(args.frames), "--output-dir", os.path.abspath(args.output_dir),
+        os.path.abspath(args.gltf_file),
+    ]
+
+    logger.info(f"Exécution de Blender: {' '.join(cmd)}")
+    process = subprocess.run(cmd, capture_output=True, text=True)
+
+    if process.stdout:
+        logger.info(f"Sortie de Blender:\n{process.stdout}")
+    if process.stderr:
+        logger.warning(f"Erreurs Blender:\n{process.stderr}")
+
+    if process.returncode != 0:
+        logger.error(f"Échec du rendu des aperçus (code {process.returncode})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    if RUNNING_IN_BLENDER:
+        render_all()
+    else:
+        run_from_command_line()
@@ -39,6 +39,7 @@ Features:
     'data': [
         'data/maintenance_role_data.xml',
         'security/ir.model.access.csv',
+        'data/ir_cron_data.xml',
         'views/model3d_views.xml',
         'views/maintenance_views.xml',
         'views/submodel_views.xml',
@@ -0,0 +1,192 @@
+# custom_addons/cmms_3d_models/controllers/api_auth.py
+"""
+Authentification de l'API Flutter sans vérification de mot de passe à chaque appel :
+1. Jetons Bearer signés (HMAC) émis par /api/flutter/auth/token contre une authentification Basic ;
+   la clé de signature dérive du jeton de session Odoo de l'utilisateur : un changement de mot de
+   passe ou de login révoque les jetons émis
+2. Clés d'API (cmms.api.key) acceptées comme jetons Bearer, limitées par seau à jetons
+   (models/rate_limiter.py) à chaque appel, y compris lorsque la clé est en cache ; leur utilisation
+   est comptée à partir du journal d'accès (écriture différée), jamais pendant l'authentification
+3. Basic Auth conservé pour les anciens clients : la vérification du mot de passe est mise en cache
+4. Cache LRU des authentifications vérifiées, par processus : recherche en temps constant,
+   clés dérivées par HMAC (aucun secret conservé en clair)
+Aucune de ces voies n'écrit dans la session HTTP.
+"""
+
+import os
+import hmac
+import time
+import base64
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from odoo.exceptions import AccessDenied
+
+from ..models import rate_limiter
+
+_logger = logging.getLogger(__name__)
+
+# Durée de vie des jetons émis (secondes), paramètre système cmms_3d_models.api_token_lifetime
+DEFAULT_TOKEN_LIFETIME = 8 * 3600
+# Durée de validité en cache d'une vérification Basic Auth, d'une clé d'API ou d'un jeton signé
+# (secondes) : délai maximal de prise en compte d'une désactivation ou d'un changement de mot de passe
+BASIC_CACHE_TTL = 300
+API_KEY_CACHE_TTL = 60
+SIGNED_TOKEN_CACHE_TTL = 60
+# Nombre d'authentifications conservées par processus
+AUTH_CACHE_SIZE = 4096
+
+# Clé propre au processus : les clés du cache ne permettent pas de retrouver les secrets
+_PROCESS_KEY = os.urandom(32)
+
+
+class VerifiedCache:
+    """LRU des authentifications vérifiées : {clé: (valeur, expiration)}"""
+
+    def __init__(self, size):
+        self.size = size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+_verified = VerifiedCache(AUTH_CACHE_SIZE)
+
+
+class RateLimited(Exception):
+    """Limite de débit de la clé d'API atteinte"""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Rate limit exceeded, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+def _cache_key(kind, db, secret):
+    return hmac.new(_PROCESS_KEY, f"{kind}\0{db}\0{secret}".encode('utf-8'), hashlib.sha256).digest()
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+def _sign(user, payload):
+    """Signature d'un jeton : HMAC du contenu, clé dérivée du jeton de session de l'utilisateur"""
+    session_token = user._compute_session_token(f"cmms_api_token:{user.id}")
+    if not session_token:
+        return None
+    return _b64encode(hmac.new(session_token.encode('utf-8'), payload.encode('ascii'), hashlib.sha256).digest())
+
+
+def get_token_lifetime(env):
+    value = env['ir.config_parameter'].sudo().get_param('cmms_3d_models.api_token_lifetime')
+    try:
+        return max(60, int(value)) if value else DEFAULT_TOKEN_LIFETIME
+    except ValueError:
+        _logger.warning(f"Valeur invalide pour cmms_3d_models.api_token_lifetime: {value}")
+        return DEFAULT_TOKEN_LIFETIME
+
+
+def issue_token(env, uid):
+    """Jeton Bearer signé pour l'utilisateur : (jeton, expiration en secondes epoch)"""
+    user = env['res.users'].sudo().browse(uid)
+    expires_at = int(time.time()) + get_token_lifetime(env)
+    payload = _b64encode(f"{uid}:{expires_at}".encode('ascii'))
+    signature = _sign(user, payload)
+    if not signature:
+        raise AccessDenied()
+    return f"{payload}.{signature}", expires_at
+
+
+def _verify_signed_token(env, token):
+    """(uid, expiration) d'un jeton signé valide, sinon None"""
+    payload, _sep, signature = token.partition('.')
+    try:
+        uid, expires_at = (int(value) for value in _b64decode(payload).decode('ascii').split(':'))
+    except (ValueError, UnicodeDecodeError):
+        return None
+    if expires_at <= time.time():
+        return None
+    user = env['res.users'].sudo().browse(uid).exists()
+    if not user or not user.active:
+        return None
+    expected = _sign(user, payload)
+    if not expected or not hmac.compare_digest(expected, signature):
+        return None
+    return uid, expires_at
+
+
+def _verify_api_key(env, api_key):
+    """(uid, IP autorisées ou None, seau de limitation ou None, id de la clé) d'une clé d'API valide, sinon None"""
+    key = env['cmms.api.key'].sudo().search([('api_key', '=', api_key), ('active', '=', True)], limit=1)
+    if not key or not key.is_valid() or not key.user_id.active:
+        return None
+    allowed_ips = frozenset(ip.strip() for ip in (key.allowed_ips or '').split('\n') if ip.strip())
+    return key.user_id.id, allowed_ips or None, key._get_rate_limit_bucket(), key.id
+
+
+def authenticate_bearer(env, db, token, ip_address=None):
+    """(utilisateur, id de la clé d'API ou None) d'un jeton Bearer (jeton signé ou clé d'API),
+    sinon (None, None). RateLimited si la clé d'API a épuisé son débit"""
+    cache_key = _cache_key('bearer', db, token)
+    cached = _verified.get(cache_key)
+    if cached is None:
+        if '.' in token:
+            verified = _verify_signed_token(env, token)
+            if not verified:
+                return None, None
+            cached = (verified[0], None, None, None)
+            # Revérifié régulièrement (utilisateur actif, jeton de session inchangé), pas seulement à l'expiration
+            _verified.set(cache_key, cached, min(verified[1], time.time() + SIGNED_TOKEN_CACHE_TTL))
+        else:
+            cached = _verify_api_key(env, token)
+            if not cached:
+                return None, None
+            _verified.set(cache_key, cached, time.time() + API_KEY_CACHE_TTL)
+    uid, allowed_ips, bucket, api_key_id = cached
+    if allowed_ips is not None and ip_address not in allowed_ips:
+        _logger.warning(f"Clé d'API utilisée depuis une IP non autorisée: {ip_address}")
+        return None, None
+    if bucket:
+        allowed, retry_after = rate_limiter.consume(*bucket)
+        if not allowed:
+            raise RateLimited(retry_after)
+    return uid, api_key_id
+
+
+def authenticate_basic(env, db, login, password):
+    """Utilisateur des identifiants Basic Auth, sinon None ; le mot de passe n'est vérifié
+    (hachage volontairement lent) qu'une fois par BASIC_CACHE_TTL"""
+    cache_key = _cache_key('basic', db, f"{login}\0{password}")
+    uid = _verified.get(cache_key)
+    if uid is None:
+        try:
+            uid = env['res.users'].authenticate(db, login, password, {'interactive': False})
+        except AccessDenied:
+            return None
+        if not uid:
+            return None
+        _verified.set(cache_key, uid, time.time() + BASIC_CACHE_TTL)
+    return uid
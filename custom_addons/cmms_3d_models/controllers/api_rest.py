@@ -1,41 +1,144 @@
 # custom_addons/cmms_3d_models/controllers/api_rest.py
+import os
 import json
+import math
+import time
 import base64
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from odoo import http, fields
-from odoo.http import request
+from odoo.http import request, content_disposition
 from odoo.exceptions import AccessError, UserError, ValidationError
 from odoo.tools import DEFAULT_SERVER_DATETIME_FORMAT
 import functools
 
+from ..models.model3d import MODELS_DIR
+from .http_utils import send_file, select_precompressed_variant, stream_response, compressed_response
+from .json_encoding import dumps, iter_dumps
+from .api_auth import authenticate_basic, authenticate_bearer, issue_token, RateLimited
+from .serializers import (
+    BatchReader, Fieldset, FULL_FIELDSET, REQUEST_ATTRIBUTE_FIELDS, ASSIGNMENT_FIELDS, PART_FIELDS, EQUIPMENT_FIELDS, EQUIPMENT_DETAIL_FIELDS, PERSON_FIELDS,
+    ROLE_FIELDS, USER_FIELDS, STAGE_FIELDS, NAME_FIELDS, MODEL3D_FIELDS, SUBMODEL_FIELDS,
+)
+
 _logger = logging.getLogger(__name__)
 
+# Taille (en caractères) des tranches du JSON IFC lues en base pour la réponse /raw
+IFC_JSON_CHUNK_SIZE = 1024 * 1024
+
+# Pagination par curseur des demandes (ordre request_date desc, id desc)
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+# Nombres totaux mis en cache par base, utilisateur et domaine (secondes, nombre d'entrées)
+COUNT_CACHE_TTL = 60
+COUNT_CACHE_SIZE = 1024
+_count_cache = {}
+
+
+def _encode_cursor(request_date, record_id):
+    """Curseur opaque désignant la dernière demande d'une page"""
+    payload = json.dumps([request_date.isoformat() if request_date else None, record_id])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor):
+    """(request_date, id) d'un curseur ; ValueError s'il est invalide"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        request_date, record_id = json.loads(payload)
+        return (fields.Date.to_date(request_date) if request_date else None), int(record_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {str(e)}")
+
+
+# Synchronisation différentielle : modèles suivis (clé de la réponse -> modèle) et chevauchement
+# des fenêtres (secondes) couvrant les transactions encore ouvertes au moment du jeton précédent
+SYNC_MODELS = {
+    'requests': 'maintenance.request',
+    'parts': 'maintenance.request.part',
+    'assignments': 'maintenance.request.assignment',
+    'equipment': 'maintenance.equipment',
+    'stages': 'maintenance.stage',
+}
+SYNC_OVERLAP = 60
+
+
+def _encode_sync_token(sync_time):
+    """Jeton opaque de synchronisation : début de la transaction qui a produit la réponse"""
+    payload = json.dumps([fields.Datetime.to_string(sync_time)])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _decode_sync_token(token):
+    """Date d'un jeton de synchronisation ; ValueError s'il est invalide"""
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        return fields.Datetime.to_datetime(json.loads(payload)[0])
+    except Exception as e:
+        raise ValueError(f"Invalid sync token: {str(e)}")
+
+
+def _encode_sync_cursor(sync_time, last_request_id, last_equipment_id):
+    """Curseur opaque d'une synchronisation complète paginée : début de la synchronisation et
+    dernières demande et dernier équipement envoyés (ordre des ids)"""
+    payload = json.dumps([fields.Datetime.to_string(sync_time), last_request_id, last_equipment_id])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _decode_sync_cursor(cursor):
+    """(date, id de demande, id d'équipement) d'un curseur de synchronisation ; ValueError s'il est invalide"""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        sync_time, last_request_id, last_equipment_id = json.loads(payload)
+        return fields.Datetime.to_datetime(sync_time), int(last_request_id), int(last_equipment_id)
+    except Exception as e:
+        raise ValueError(f"Invalid sync cursor: {str(e)}")
+
+
+def _keyset_domain(request_date, record_id):
+    """Demandes situées après (request_date, id) dans l'ordre request_date desc, id desc
+    (PostgreSQL place les dates vides en tête d'un tri décroissant)"""
+    if request_date is None:
+        return ['|', '&', ('request_date', '=', False), ('id', '<', record_id), ('request_date', '!=', False)]
+    return ['|', ('request_date', '<', request_date),
+            '&', ('request_date', '=', request_date), ('id', '<', record_id)]
+
 def basic_auth_required(func):
-    """Décorateur pour l'authentification Basic Auth"""
+    """Décorateur d'authentification de l'API : jeton Bearer (émis par /api/flutter/auth/token,
+    ou clé d'API) ou Basic Auth. Les vérifications réussies sont en cache (voir api_auth.py) :
+    ni vérification du mot de passe ni écriture de session à chaque appel."""
     @functools.wraps(func)
     def wrapper(self, *args, **kwargs):
         # Récupérer l'header Authorization
-        auth_header = request.httprequest.headers.get('Authorization')
+        auth_header = request.httprequest.headers.get('Authorization') or ''
+        scheme, _sep, credentials = auth_header.partition(' ')
+        scheme = scheme.lower()
+        credentials = credentials.strip()
 
-        if not auth_header or not auth_header.startswith('Basic '):
+        if scheme not in ('basic', 'bearer') or not credentials:
             return self._error_response('Authentication required', 401)
 
         try:
-            # Décoder les credentials
-            encoded_credentials = auth_header.split(' ')[1]
-            decoded_credentials = base64.b64decode(encoded_credentials).decode('utf-8')
-            username, password = decoded_credentials.split(':', 1)
-
-            # Authentifier l'utilisateur
-            uid = request.session.authenticate(request.session.db, username, password)
+            if scheme == 'bearer':
+                uid, api_key_id = authenticate_bearer(request.env, request.session.db, credentials,
+                                          request.httprequest.remote_addr)
+            else:
+                # Décoder les credentials
+                decoded_credentials = base64.b64decode(credentials).decode('utf-8')
+                username, password = decoded_credentials.split(':', 1)
+                uid = authenticate_basic(request.env, request.session.db, username, password)
+                api_key_id = None
 
             if not uid:
                 return self._error_response('Invalid credentials', 401)
 
-            # L'utilisateur est authentifié, continuer
-            return func(self, *args, **kwargs)
+            # L'utilisateur est authentifié pour cette requête uniquement
+            request.update_env(user=uid)
 
+        except RateLimited as e:
+            response = self._error_response(str(e), 429)
+            response.headers['Retry-After'] = str(max(1, math.ceil(e.retry_after)))
+            return response
         except (ValueError, UnicodeDecodeError) as e:
             _logger.error(f"Authentication decode error: {str(e)}")
             return self._error_response('Invalid authentication format', 401)
@@ -43,8 +146,30 @@ def basic_auth_required(func):
             _logger.error(f"Authentication error: {str(e)}")
             return self._error_response('Authentication failed', 401)
 
+        started = time.monotonic()
+        response = func(self, *args, **kwargs)
+        _log_api_call(uid, api_key_id, started, response)
+        return response
+
     return wrapper
 
+
+def _log_api_call(uid, api_key_id, started, response):
+    """Journalise l'appel (écriture différée, voir models/access_log_buffer.py), avec la clé d'API
+    utilisée dont il compte l'utilisation ; un échec de journalisation n'affecte jamais la réponse"""
+    try:
+        httprequest = request.httprequest
+        request.env['cmms.api.access.log'].log_api_access(
+            uid, httprequest.path, httprequest.method,
+            ip_address=httprequest.remote_addr,
+            user_agent=httprequest.headers.get('User-Agent'),
+            status_code=getattr(response, 'status_code', None),
+            response_time=(time.monotonic() - started) * 1000,
+            api_key_id=api_key_id,
+        )
+    except Exception as e:
+        _logger.error(f"Error logging API access: {str(e)}")
+
 class CMSAPIController(http.Controller):
 
     def _get_cors_headers(self):
@@ -58,20 +183,25 @@ class CMSAPIController(http.Controller):
         ]
 
     def _success_response(self, data=None, message="Success", status_code=200):
-        """Format de réponse standardisé pour les succès"""
+        """Format de réponse standardisé pour les succès (compressée selon Accept-Encoding)"""
         response_data = {
             'success': True,
             'message': message,
             'data': data,
             'timestamp': fields.Datetime.now().strftime(DEFAULT_SERVER_DATETIME_FORMAT)
         }
+        return compressed_response(dumps(response_data), 'application/json', self._get_cors_headers(), status_code)
 
-        response = request.make_response(
-            json.dumps(response_data, default=str),
-            headers=self._get_cors_headers() + [('Content-Type', 'application/json')]
-        )
-        response.status_code = status_code
-        return response
+    def _stream_success_response(self, data=None, message="Success", status_code=200):
+        """Réponse de succès des endpoints de liste : JSON encodé et compressé par morceaux pendant l'envoi,
+        sans construire la chaîne complète (data ne doit plus dépendre de l'environnement de la requête)"""
+        response_data = {
+            'success': True,
+            'message': message,
+            'data': data,
+            'timestamp': fields.Datetime.now().strftime(DEFAULT_SERVER_DATETIME_FORMAT)
+        }
+        return stream_response(iter_dumps(response_data), 'application/json', self._get_cors_headers(), status_code)
 
     def _error_response(self, message="Error", status_code=400, error_details=None):
         """Format de réponse standardisé pour les erreurs"""
@@ -82,76 +212,41 @@ class CMSAPIController(http.Controller):
             'timestamp': fields.Datetime.now().strftime(DEFAULT_SERVER_DATETIME_FORMAT)
         }
 
-        response = request.make_response(
-            json.dumps(response_data, default=str),
-            headers=self._get_cors_headers() + [('Content-Type', 'application/json')]
-        )
-        response.status_code = status_code
-        return response
+        return compressed_response(dumps(response_data), 'application/json', self._get_cors_headers(), status_code)
 
     def _get_user_teams(self):
-        """Récupérer les équipes de l'utilisateur connecté"""
-        user = request.env.user
-
-        # Récupérer la personne de maintenance correspondante
-        person = request.env['maintenance.person'].search([('user_id', '=', user.id)], limit=1)
-
-        if person:
-            return person.team_ids.ids
-        else:
-            # Si pas de personne de maintenance, chercher dans les équipes directement via user
-            # Fallback pour les utilisateurs standards
-            teams = request.env['maintenance.team'].search([
-                ('member_ids', 'in', [user.id])
-            ])
-            return teams.ids
+        """Récupérer les équipes de l'utilisateur connecté (en cache par utilisateur,
+        invalidé par les modifications des personnes et des équipes)"""
+        return list(request.env['maintenance.person']._get_user_team_ids(request.env.user.id))
 
     def _get_allowed_requests_domain(self):
-        """Construire le domaine pour les demandes autorisées"""
+        """Construire le domaine pour les demandes autorisées.
+        Domaine plat de taille constante : les assignations multiples sont filtrées par une
+        sous-requête SQL (assignment_ids.user_id, indexé) et non par une liste d'identifiants."""
         user = request.env.user
-
-        # Domain de base
-        domain = []
         request_model = request.env['maintenance.request']
 
         # Toujours inclure les demandes créées par l'utilisateur
-        domain.append(('user_id', '=', user.id))
-
-        # Ajouter les demandes dont il est propriétaire (si le champ existe)
-        if 'owner_user_id' in request_model._fields:
-            domain = ['|'] + domain + [('owner_user_id', '=', user.id)]
-
-        # Ajouter les demandes dont il est technicien (si le champ existe)
-        if 'technician_user_id' in request_model._fields:
-            domain = ['|'] + domain + [('technician_user_id', '=', user.id)]
+        clauses = [('user_id', '=', user.id)]
 
-        # Ajouter notre champ personnalisé assigned_user_id (si il existe)
-        if 'assigned_user_id' in request_model._fields:
-            domain = ['|'] + domain + [('assigned_user_id', '=', user.id)]
+        # Propriétaire, technicien, assigné (si les champs existent)
+        for field_name in ('owner_user_id', 'technician_user_id', 'assigned_user_id'):
+            if field_name in request_model._fields:
+                clauses.append((field_name, '=', user.id))
 
         # IMPORTANT: Ajouter les demandes assignées via assigned_person_id
         if 'assigned_person_id' in request_model._fields:
-            domain = ['|'] + domain + [('assigned_person_id.user_id', '=', user.id)]
-
-        # NOUVELLE PARTIE: Ajouter les demandes assignées via les assignations multiples
-        person = request.env['maintenance.person'].search([('user_id', '=', user.id)], limit=1)
-        if person:
-            # Rechercher toutes les assignations de cette personne
-            assignments = request.env['maintenance.request.assignment'].search([
-                ('person_id', '=', person.id)
-            ])
+            clauses.append(('assigned_person_id.user_id', '=', user.id))
 
-            # Ajouter les demandes correspondantes au domaine
-            if assignments:
-                request_ids = assignments.mapped('request_id.id')
-                domain = ['|'] + domain + [('id', 'in', request_ids)]
+        # Demandes assignées via les assignations multiples (user_id stocké sur l'assignation)
+        clauses.append(('assignment_ids.user_id', '=', user.id))
 
         # Ajouter les demandes des équipes
         team_ids = self._get_user_teams()
         if team_ids:
-            domain = ['|'] + domain + [('maintenance_team_id', 'in', team_ids)]
+            clauses.append(('maintenance_team_id', 'in', team_ids))
 
-        return domain
+        return ['|'] * (len(clauses) - 1) + clauses
 
     def _get_allowed_equipment_domain(self):
         """Construire le domaine pour les équipements autorisés"""
@@ -305,320 +400,474 @@ class CMSAPIController(http.Controller):
             _logger.error(f"Erreur lors de l'extraction des données de maintenance IFC: {str(e)}")
             return None
 
-    def _serialize_part(self, part_record):
-        """Sérialiser une pièce de maintenance request avec toutes ses informations"""
-        try:
-            # Récupérer le sous-modèle 3D associé
-            submodel = part_record.submodel_id
-
-            # Déterminer le type d'intervention (avec gestion du champ 'other')
-            intervention_display = dict(part_record._fields['intervention_type'].selection)[part_record.intervention_type]
-            if part_record.intervention_type == 'other' and part_record.intervention_other:
-                intervention_display = part_record.intervention_other
-
-            part_data = {
-                'id': part_record.id,
-                'part_name': part_record.part_name or '',
-                'description': part_record.description or '',
-                'intervention_type': part_record.intervention_type,
-                'intervention_type_display': intervention_display,
-                'intervention_other': part_record.intervention_other or '',
-                'done': part_record.done,
-                'sequence': part_record.sequence,
-
-                # Informations du sous-modèle 3D
-                'submodel': {
-                    'id': submodel.id if submodel else None,
-                    'name': submodel.name if submodel else '',
-                    'relative_id': submodel.relative_id if submodel else None,
-                    'gltf_filename': submodel.gltf_filename if submodel else '',
-                    'viewer_url': submodel.viewer_url if submodel else None,
-                    'gltf_url': submodel.gltf_url if submodel else None,
-                    'bin_url': submodel.bin_url if submodel else None,
-                    'scale': submodel.scale if submodel else 1.0,
-                    'position': {
-                        'x': submodel.position_x if submodel else 0.0,
-                        'y': submodel.position_y if submodel else 0.0,
-                        'z': submodel.position_z if submodel else 0.0,
-                    } if submodel else None,
-                    'rotation': {
-                        'x': submodel.rotation_x if submodel else 0.0,
-                        'y': submodel.rotation_y if submodel else 0.0,
-                        'z': submodel.rotation_z if submodel else 0.0,
-                    } if submodel else None,
-                } if submodel else None,
-
-                # Informations du modèle 3D parent
-                'parent_model3d': {
-                    'id': part_record.parent_model3d_id.id if part_record.parent_model3d_id else None,
-                    'name': part_record.parent_model3d_id.name if part_record.parent_model3d_id else '',
-                    'viewer_url': part_record.parent_model3d_id.viewer_url if part_record.parent_model3d_id else None,
-                } if part_record.parent_model3d_id else None,
-            }
+    def _get_3d_records(self, reader, model3d_ids=(), submodel_ids=()):
+        """Lit en un lot les modèles et sous-modèles 3D référencés (parents des sous-modèles compris).
+        Retourne ({id: cmms.model3d}, {id: cmms.submodel3d}) : enregistrements partageant leur préchargement,
+        dont les champs utiles sont déjà en cache (les autres sont lus un par un pour tout le lot,
+        jamais ifc_data_json par préchargement)."""
+        submodel_values = reader.read('cmms.submodel3d', submodel_ids, SUBMODEL_FIELDS)
+        model3d_ids = list(model3d_ids) + [submodel_values[submodel_id]['parent_id']
+                                           for submodel_id in submodel_ids if submodel_id in submodel_values]
+        model3d_values = reader.read('cmms.model3d', model3d_ids, MODEL3D_FIELDS)
+        env = request.env(context=dict(request.env.context, prefetch_fields=False))
+        model3ds = {record.id: record for record in env['cmms.model3d'].browse(list(model3d_values))}
+        submodels = {record.id: record for record in env['cmms.submodel3d'].browse(list(submodel_values))}
+        return model3ds, submodels
+
+    def _serialize_submodel(self, submodel):
+        """Sous-modèle 3D d'une pièce (valeurs en cache après _get_3d_records)"""
+        return {
+            'id': submodel.id,
+            'name': submodel.name,
+            'relative_id': submodel.relative_id,
+            'gltf_filename': submodel.gltf_filename,
+            'viewer_url': submodel.viewer_url,
+            'gltf_url': submodel.gltf_url,
+            'glb_url': submodel.glb_url,
+            'bin_url': submodel.bin_url,
+            'scale': submodel.scale,
+            'position': {'x': submodel.position_x, 'y': submodel.position_y, 'z': submodel.position_z},
+            'rotation': {'x': submodel.rotation_x, 'y': submodel.rotation_y, 'z': submodel.rotation_z},
+            'geometry': submodel._get_geometry_data(),
+            'lods': submodel._get_lod_data(),
+            'compressed': submodel._get_compressed_data(),
+        }
 
-            return part_data
+    def _serialize_parts(self, parts, reader=None, fieldset=FULL_FIELDSET):
+        """Sérialiser des pièces de demandes de maintenance, lues par lots (voir serializers.py).
+        Les modèles et sous-modèles 3D ne sont lus que si include= contient model_3d / submodel."""
+        reader = reader or BatchReader(request.env)
+        part_values = reader.read('maintenance.request.part', parts.ids, PART_FIELDS)
+        model3ds, submodels = self._get_3d_records(
+            reader,
+            model3d_ids=[part_values[part_id]['parent_model3d_id'] for part_id in parts.ids]
+            if fieldset.expands('model_3d') else (),
+            submodel_ids=[part_values[part_id]['submodel_id'] for part_id in parts.ids]
+            if fieldset.expands('submodel') else (),
+        )
+        intervention_labels = dict(request.env['maintenance.request.part']._fields['intervention_type'].selection)
 
-        except Exception as e:
-            _logger.error(f"Erreur lors de la sérialisation de la pièce {part_record.id}: {str(e)}")
-            return {
-                'id': part_record.id,
-                'part_name': part_record.part_name or '',
-                'description': part_record.description or '',
-                'intervention_type': part_record.intervention_type,
-                'intervention_type_display': part_record.intervention_type,
-                'error': 'Erreur lors du chargement des données 3D'
-            }
+        result = []
+        for part_id in parts.ids:
+            values = part_values[part_id]
+            try:
+                # Déterminer le type d'intervention (avec gestion du champ 'other')
+                intervention_display = intervention_labels.get(values['intervention_type'])
+                if values['intervention_type'] == 'other' and values['intervention_other']:
+                    intervention_display = values['intervention_other']
+
+                if fieldset.expands('submodel'):
+                    submodel = submodels.get(values['submodel_id'])
+                    submodel_data = self._serialize_submodel(submodel) if submodel else None
+                else:
+                    submodel_data = values['submodel_id'] or None
+                if fieldset.expands('model_3d'):
+                    parent_model3d = model3ds.get(values['parent_model3d_id'])
+                    parent_model3d_data = {
+                        'id': parent_model3d.id,
+                        'name': parent_model3d.name,
+                        'viewer_url': parent_model3d.viewer_url,
+                    } if parent_model3d else None
+                else:
+                    parent_model3d_data = values['parent_model3d_id'] or None
+                result.append({
+                    'id': part_id,
+                    'request_id': values['request_id'],
+                    'part_name': values['part_name'] or '',
+                    'description': values['description'] or '',
+                    'intervention_type': values['intervention_type'],
+                    'intervention_type_display': intervention_display,
+                    'intervention_other': values['intervention_other'] or '',
+                    'done': values['done'],
+                    'sequence': values['sequence'],
+
+                    # Informations du sous-modèle 3D
+                    'submodel': submodel_data,
+
+                    # Informations du modèle 3D parent
+                    'parent_model3d': parent_model3d_data,
+                })
+            except Exception as e:
+                _logger.error(f"Erreur lors de la sérialisation de la pièce {part_id}: {str(e)}")
+                result.append({
+                    'id': part_id,
+                    'request_id': values['request_id'],
+                    'part_name': values['part_name'] or '',
+                    'description': values['description'] or '',
+                    'intervention_type': values['intervention_type'],
+                    'intervention_type_display': values['intervention_type'],
+                    'error': 'Erreur lors du chargement des données 3D'
+                })
+        return result
+
+    def _serialize_part(self, part_record):
+        """Sérialiser une pièce de maintenance request avec toutes ses informations"""
+        return self._serialize_parts(part_record)[0]
+
+    def _read_persons(self, reader, person_ids):
+        """Lit les personnes de maintenance et leurs rôles en un lot"""
+        persons = reader.read('maintenance.person', person_ids, PERSON_FIELDS)
+        reader.read('maintenance.role', [values['role_id'] for values in persons.values()], ROLE_FIELDS)
+        return persons
+
+    def _serialize_assignments(self, assignment_ids, reader):
+        """Sérialiser des assignations de maintenance (valeurs lues par lots) : {id: données}"""
+        assignment_values = reader.read('maintenance.request.assignment', assignment_ids, ASSIGNMENT_FIELDS)
+        self._read_persons(reader, [values['person_id'] for values in assignment_values.values()])
+        reader.read('res.users', [user_id for values in assignment_values.values()
+                                  for user_id in (values['user_id'], values['assigned_by_id'])], USER_FIELDS)
+
+        result = {}
+        for assignment_id in assignment_ids:
+            values = assignment_values.get(assignment_id)
+            if not values:
+                continue
+            person = reader.get('maintenance.person', values['person_id']) or {}
+            try:
+                role = reader.get('maintenance.role', person.get('role_id'))
+                user = reader.get('res.users', values['user_id'])
+                assigned_by = reader.get('res.users', values['assigned_by_id'])
+                result[assignment_id] = {
+                    'id': assignment_id,
+                    'request_id': values['request_id'],
+                    'person': {
+                        'id': values['person_id'],
+                        'name': person['display_name'],
+                        'first_name': person['first_name'] or '',
+                        'last_name': person['name'] or '',
+                        'email': person['email'] or '',
+                        'phone': person['phone'] or '',
+                        'mobile': person['mobile'] or '',
+                        'available': person['available'],
+                        'role': {
+                            'id': role['id'],
+                            'name': role['name'],
+                            'description': role['description'] or '',
+                        } if role else None,
+                        'specialties': person['specialties'] or '',
+                        'certifications': person['certifications'] or '',
+                    },
+                    'user': {
+                        'id': user['id'],
+                        'name': user['name'],
+                        'login': user['login'],
+                    } if user else None,
+                    'assigned_date': values['assigned_date'].strftime(DEFAULT_SERVER_DATETIME_FORMAT) if values['assigned_date'] else None,
+                    'assigned_by': {
+                        'id': assigned_by['id'],
+                        'name': assigned_by['name'],
+                    } if assigned_by else None,
+                    'is_primary': values['is_primary'],
+                    'notes': values['notes'] or '',
+                }
+            except Exception as e:
+                _logger.error(f"Erreur lors de la sérialisation de l'assignation {assignment_id}: {str(e)}")
+                result[assignment_id] = {
+                    'id': assignment_id,
+                    'request_id': values['request_id'],
+                    'person': {
+                        'id': values['person_id'],
+                        'name': person.get('display_name'),
+                    },
+                    'error': 'Erreur lors du chargement des données d\'assignation'
+                }
+        return result
 
     def _serialize_assignment(self, assignment_record):
         """Sérialiser une assignation de maintenance"""
-        try:
+        return self._serialize_assignments(assignment_record.ids, BatchReader(request.env))[assignment_record.id]
+
+    def _serialize_requests(self, requests, ifc_models=None, fieldset=FULL_FIELDSET):
+        """Sérialiser des demandes de maintenance avec toutes les informations enrichies.
+        Chaque modèle lié (assignations, pièces, équipements, personnes, utilisateurs, modèles 3D...)
+        est lu en une seule fois pour toutes les demandes : le nombre de requêtes SQL est borné.
+        :param ifc_models: dict partagé {id du modèle 3D: données IFC} si l'inclusion IFC est demandée ;
+                           chaque modèle n'y est sérialisé qu'une fois, la demande le référence par ifc_model_id
+        :param fieldset: attributs et relations demandés (fields=, include=) ; seuls les champs
+                         et les modèles liés nécessaires sont lus"""
+        reader = BatchReader(request.env)
+        request_values = reader.read('maintenance.request', requests.ids, fieldset.request_fields())
+        all_values = [request_values[request_id] for request_id in requests.ids]
+
+        def collect(*field_names):
+            ids = []
+            for values in all_values:
+                for field_name in field_names:
+                    value = values.get(field_name)
+                    ids += value if isinstance(value, list) else [value]
+            return [record_id for record_id in ids if record_id]
+
+        def collect_loaded(*attributes):
+            """Identifiants référencés par les attributs relationnels développés"""
+            return collect(*[field_name for attribute in attributes if fieldset.loads(attribute)
+                             for field_name in REQUEST_ATTRIBUTE_FIELDS[attribute]])
+
+        reader.read('maintenance.stage', collect_loaded('stage'), STAGE_FIELDS)
+        reader.read('maintenance.team', collect_loaded('maintenance_team'), NAME_FIELDS)
+        reader.read('res.users', collect_loaded('user', 'assigned_user', 'owner_user', 'technician_user'), USER_FIELDS)
+        self._read_persons(reader, collect_loaded('assigned_person', 'assigned_persons'))
+        equipment_values = reader.read('maintenance.equipment', collect_loaded('equipment'), EQUIPMENT_FIELDS)
+        reader.read('maintenance.equipment.category',
+                    [values['category_id'] for values in equipment_values.values()], NAME_FIELDS)
+        model3ds = {}
+        if fieldset.expands('model_3d'):
+            model3ds, _submodels = self._get_3d_records(
+                reader, model3d_ids=[values['model3d_id'] for values in equipment_values.values()]
+            )
+        assignments = self._serialize_assignments(collect_loaded('assignments'), reader)
+        part_ids = collect_loaded('parts')
+        parts = dict(zip(part_ids, self._serialize_parts(
+            request.env['maintenance.request.part'].browse(part_ids), reader, fieldset
+        )))
+
+        result = []
+        for values in all_values:
+            try:
+                result.append(self._build_request_data(reader, values, assignments, parts, model3ds, ifc_models,
+                                                       fieldset))
+            except Exception as e:
+                _logger.error(f"Erreur lors de la sérialisation de la demande {values['id']}: {str(e)}")
+                # Retourner une version minimale en cas d'erreur
+                result.append({
+                    'id': values['id'],
+                    'name': values['name'],
+                    'description': values.get('description') or '',
+                    'error': 'Erreur lors du chargement des données complètes'
+                })
+        return result
+
+    def _build_request_data(self, reader, values, assignments, parts, model3ds, ifc_models, fieldset=FULL_FIELDSET):
+        """Assemble la réponse d'une demande à partir des valeurs lues par _serialize_requests.
+        Seuls les attributs demandés sont calculés ; une relation non développée vaut son identifiant."""
+        def relation(attribute, record_id, build):
+            if not fieldset.expands(attribute):
+                return record_id or None
+            return build(record_id)
+
+        def relations(attribute, record_ids, build):
+            if not fieldset.expands(attribute):
+                return list(record_ids or [])
+            return [item for item in (build(record_id) for record_id in record_ids or []) if item]
+
+        def user_data(user_id):
+            user = reader.get('res.users', user_id)
+            return {'id': user['id'], 'name': user['name']} if user else None
+
+        def person_data(person_id):
+            person = reader.get('maintenance.person', person_id)
+            role = reader.get('maintenance.role', person['role_id'])
             return {
-                'id': assignment_record.id,
-                'person': {
-                    'id': assignment_record.person_id.id,
-                    'name': assignment_record.person_id.display_name,
-                    'first_name': assignment_record.person_id.first_name or '',
-                    'last_name': assignment_record.person_id.name or '',
-                    'email': assignment_record.person_id.email or '',
-                    'phone': assignment_record.person_id.phone or '',
-                    'mobile': assignment_record.person_id.mobile or '',
-                    'available': assignment_record.person_id.available,
-                    'role': {
-                        'id': assignment_record.person_id.role_id.id if assignment_record.person_id.role_id else None,
-                        'name': assignment_record.person_id.role_id.name if assignment_record.person_id.role_id else '',
-                        'description': assignment_record.person_id.role_id.description if assignment_record.person_id.role_id else '',
-                    } if assignment_record.person_id.role_id else None,
-                    'specialties': assignment_record.person_id.specialties or '',
-                    'certifications': assignment_record.person_id.certifications or '',
-                },
-                'user': {
-                    'id': assignment_record.user_id.id if assignment_record.user_id else None,
-                    'name': assignment_record.user_id.name if assignment_record.user_id else '',
-                    'login': assignment_record.user_id.login if assignment_record.user_id else '',
-                } if assignment_record.user_id else None,
-                'assigned_date': assignment_record.assigned_date.strftime(DEFAULT_SERVER_DATETIME_FORMAT) if assignment_record.assigned_date else None,
-                'assigned_by': {
-                    'id': assignment_record.assigned_by_id.id if assignment_record.assigned_by_id else None,
-                    'name': assignment_record.assigned_by_id.name if assignment_record.assigned_by_id else '',
-                } if assignment_record.assigned_by_id else None,
-                'is_primary': assignment_record.is_primary,
-                'notes': assignment_record.notes or '',
+                'id': person_id,
+                'name': person['display_name'],
+                'first_name': person['first_name'] or '',
+                'last_name': person['name'] or '',
+                'email': person['email'] or '',
+                'phone': person['phone'] or '',
+                'role': {
+                    'id': role['id'],
+                    'name': role['name'],
+                } if role else None,
+                'available': person['available'],
             }
-        except Exception as e:
-            _logger.error(f"Erreur lors de la sérialisation de l'assignation {assignment_record.id}: {str(e)}")
+
+        def assigned_person_data(person_id):
+            assigned_person = reader.get('maintenance.person', person_id)
+            if not assigned_person:
+                return None
+            assigned_person_role = reader.get('maintenance.role', assigned_person['role_id'])
             return {
-                'id': assignment_record.id,
-                'person': {
-                    'id': assignment_record.person_id.id,
-                    'name': assignment_record.person_id.display_name,
-                },
-                'error': 'Erreur lors du chargement des données d\'assignation'
+                'id': assigned_person['id'],
+                'name': assigned_person['display_name'],
+                'role': assigned_person_role['name'] if assigned_person_role else None,
             }
 
-    def _serialize_request(self, request_record):
-        """Sérialiser une demande de maintenance avec toutes les informations enrichies INCLUANT LES DONNÉES IFC"""
-        try:
-            # URL du viewer 3D si disponible
-            viewer_url = None
-            if request_record.equipment_id and request_record.equipment_id.model3d_id:
-                viewer_url = request_record.equipment_id.model3d_id.viewer_url
-
-            # Gérer l'utilisateur assigné (plusieurs champs possibles)
-            assigned_user = None
-            if hasattr(request_record, 'assigned_user_id') and request_record.assigned_user_id:
-                assigned_user = request_record.assigned_user_id
-            elif hasattr(request_record, 'technician_user_id') and request_record.technician_user_id:
-                assigned_user = request_record.technician_user_id
-            elif hasattr(request_record, 'owner_user_id') and request_record.owner_user_id:
-                assigned_user = request_record.owner_user_id
-
-            # Sérialiser toutes les assignations
-            assignments = []
-            if hasattr(request_record, 'assignment_ids') and request_record.assignment_ids:
-                for assignment in request_record.assignment_ids:
-                    assignments.append(self._serialize_assignment(assignment))
-
-            # Préparer la liste de toutes les personnes assignées
-            assigned_persons = []
-            if hasattr(request_record, 'assigned_person_ids') and request_record.assigned_person_ids:
-                for person in request_record.assigned_person_ids:
-                    assigned_persons.append({
-                        'id': person.id,
-                        'name': person.display_name,
-                        'first_name': person.first_name or '',
-                        'last_name': person.name or '',
-                        'email': person.email or '',
-                        'phone': person.phone or '',
-                        'role': {
-                            'id': person.role_id.id if person.role_id else None,
-                            'name': person.role_id.name if person.role_id else None,
-                        } if person.role_id else None,
-                        'available': person.available,
-                    })
-
-            # NOUVEAU: Sérialiser toutes les pièces/sous-modèles
-            parts = []
-            if hasattr(request_record, 'part_ids') and request_record.part_ids:
-                for part in request_record.part_ids:
-                    parts.append(self._serialize_part(part))
-
-            # Informations sur l'équipement enrichies
-            equipment_info = None
-            if request_record.equipment_id:
-                equipment = request_record.equipment_id
-                equipment_info = {
-                    'id': equipment.id,
-                    'name': equipment.name,
-                    'serial_no': equipment.serial_no or '',
-                    'location': equipment.location or '',
-                    'category': {
-                        'id': equipment.category_id.id if equipment.category_id else None,
-                        'name': equipment.category_id.name if equipment.category_id else '',
-                    } if equipment.category_id else None,
-                    'model_3d': {
-                        'id': equipment.model3d_id.id if equipment.model3d_id else None,
-                        'name': equipment.model3d_id.name if equipment.model3d_id else '',
-                        'viewer_url': viewer_url,
-                        'has_ifc': equipment.model3d_id.has_ifc_file if equipment.model3d_id else False,
-                        'ifc_version': equipment.model3d_id.ifc_version if equipment.model3d_id else None,
-                        'ifc_url': equipment.model3d_id.ifc_url if equipment.model3d_id else None,
-                    } if equipment.model3d_id else None,
-                    'has_3d_model': bool(equipment.model3d_id),
-                }
-
-                # NOUVEAU: Ajouter les données IFC complètes si disponibles
-                if equipment.model3d_id and equipment.model3d_id.has_ifc_file:
-                    equipment_info['model_3d']['ifc_data'] = self._serialize_ifc_data(equipment.model3d_id)
-
-            # Construire la réponse complète
-            request_data = {
-                'id': request_record.id,
-                'name': request_record.name,
-                'description': request_record.description or '',
-                'request_date': request_record.request_date.strftime(DEFAULT_SERVER_DATETIME_FORMAT) if request_record.request_date else None,
-                'schedule_date': request_record.schedule_date.strftime(DEFAULT_SERVER_DATETIME_FORMAT) if request_record.schedule_date else None,
-                'close_date': request_record.close_date.strftime(DEFAULT_SERVER_DATETIME_FORMAT) if request_record.close_date else None,
-
-                # Statut et étape
-                'stage': {
-                    'id': request_record.stage_id.id if request_record.stage_id else None,
-                    'name': request_record.stage_id.name if request_record.stage_id else '',
-                    'done': request_record.stage_id.done if request_record.stage_id else False,
-                } if request_record.stage_id else None,
-                'maintenance_type': request_record.maintenance_type,
-                'priority': request_record.priority,
-                'kanban_state': request_record.kanban_state,
-                'color': request_record.color,
-                'duration': request_record.duration,
-
-                # Équipement enrichi AVEC DONNÉES IFC
-                'equipment': equipment_info,
-
-                # Équipe
-                'maintenance_team': {
-                    'id': request_record.maintenance_team_id.id if request_record.maintenance_team_id else None,
-                    'name': request_record.maintenance_team_id.name if request_record.maintenance_team_id else '',
-                } if request_record.maintenance_team_id else None,
-
-                # Utilisateurs (compatibilité)
-                'user': {
-                    'id': request_record.user_id.id if request_record.user_id else None,
-                    'name': request_record.user_id.name if request_record.user_id else '',
-                } if request_record.user_id else None,
-                'assigned_user': {
-                    'id': assigned_user.id if assigned_user else None,
-                    'name': assigned_user.name if assigned_user else '',
-                } if assigned_user else None,
-                'owner_user': {
-                    'id': request_record.owner_user_id.id if hasattr(request_record, 'owner_user_id') and request_record.owner_user_id else None,
-                    'name': request_record.owner_user_id.name if hasattr(request_record, 'owner_user_id') and request_record.owner_user_id else '',
-                } if hasattr(request_record, 'owner_user_id') and request_record.owner_user_id else None,
-                'technician_user': {
-                    'id': request_record.technician_user_id.id if hasattr(request_record, 'technician_user_id') and request_record.technician_user_id else None,
-                    'name': request_record.technician_user_id.name if hasattr(request_record, 'technician_user_id') and request_record.technician_user_id else '',
-                } if hasattr(request_record, 'technician_user_id') and request_record.technician_user_id else None,
-
-                # Assignations enrichies
-                'assigned_person': {
-                    'id': request_record.assigned_person_id.id if hasattr(request_record, 'assigned_person_id') and request_record.assigned_person_id else None,
-                    'name': request_record.assigned_person_id.display_name if hasattr(request_record, 'assigned_person_id') and request_record.assigned_person_id else '',
-                    'role': request_record.assigned_person_id.role_id.name if hasattr(request_record, 'assigned_person_id') and request_record.assigned_person_id and request_record.assigned_person_id.role_id else None,
-                } if hasattr(request_record, 'assigned_person_id') and request_record.assigned_person_id else None,
-                'assigned_persons': assigned_persons,
-                'assignments': assignments,
-
-                # NOUVEAU: Pièces/sous-modèles avec visualisation 3D
-                'parts': parts,
-                'parts_count': len(parts),
-
-                # Compteurs
-                'assignment_count': len(assignments),
+        # Informations sur l'équipement enrichies
+        def equipment_data(equipment_id):
+            equipment = reader.get('maintenance.equipment', equipment_id)
+            if not equipment:
+                return None
+            category = reader.get('maintenance.equipment.category', equipment['category_id'])
+            model3d = model3ds.get(equipment['model3d_id'])
+            equipment_info = {
+                'id': equipment['id'],
+                'name': equipment['name'],
+                'serial_no': equipment['serial_no'] or '',
+                'location': equipment['location'] or '',
+                'category': {
+                    'id': category['id'],
+                    'name': category['name'],
+                } if category else None,
+                'model_3d': {
+                    'id': model3d.id,
+                    'name': model3d.name,
+                    'viewer_url': model3d.viewer_url,
+                    'has_ifc': model3d.has_ifc_file,
+                    'ifc_version': model3d.ifc_version,
+                    'ifc_url': model3d.ifc_url,
+                    'geometry': model3d._get_geometry_data(),
+                    'lods': model3d._get_lod_data(),
+                    'compressed': model3d._get_compressed_data(),
+                    'previews': model3d._get_preview_data(),
+                } if model3d else None,
+                'has_3d_model': bool(equipment['model3d_id']),
             }
+            if not fieldset.expands('model_3d'):
+                equipment_info['model_3d'] = equipment['model3d_id'] or None
+
+            # Données IFC complètes sur demande uniquement, une seule fois par modèle
+            if ifc_models is not None and model3d and model3d.has_ifc_file:
+                if model3d.id not in ifc_models:
+                    ifc_models[model3d.id] = self._serialize_ifc_data(model3d)
+                equipment_info['model_3d']['ifc_model_id'] = model3d.id
+            return equipment_info
+
+        def stage_data(stage_id):
+            stage = reader.get('maintenance.stage', stage_id)
+            return {
+                'id': stage['id'],
+                'name': stage['name'],
+                'done': stage['done'],
+            } if stage else None
 
-            return request_data
-
-        except Exception as e:
-            _logger.error(f"Erreur lors de la sérialisation de la demande {request_record.id}: {str(e)}")
-            # Retourner une version minimale en cas d'erreur
+        def team_data(team_id):
+            team = reader.get('maintenance.team', team_id)
             return {
-                'id': request_record.id,
-                'name': request_record.name,
-                'description': request_record.description or '',
-                'error': 'Erreur lors du chargement des données complètes'
-            }
+                'id': team['id'],
+                'name': team['name'],
+            } if team else None
+
+        def datetime_value(field_name):
+            value = values[field_name]
+            return value.strftime(DEFAULT_SERVER_DATETIME_FORMAT) if value else None
+
+        # Gérer l'utilisateur assigné (plusieurs champs possibles)
+        def assigned_user_id():
+            return values.get('assigned_user_id') or values.get('technician_user_id') or values.get('owner_user_id')
+
+        # Construire la réponse (attributs calculés à la demande, dans l'ordre de la réponse complète)
+        attributes = {
+            'id': lambda: values['id'],
+            'name': lambda: values['name'],
+            'description': lambda: values['description'] or '',
+            'request_date': lambda: datetime_value('request_date'),
+            'schedule_date': lambda: datetime_value('schedule_date'),
+            'close_date': lambda: datetime_value('close_date'),
+
+            # Statut et étape
+            'stage': lambda: relation('stage', values['stage_id'], stage_data),
+            'maintenance_type': lambda: values['maintenance_type'],
+            'priority': lambda: values['priority'],
+            'kanban_state': lambda: values['kanban_state'],
+            'color': lambda: values['color'],
+            'duration': lambda: values['duration'],
+
+            # Équipement enrichi (données IFC référencées par ifc_model_id)
+            'equipment': lambda: relation('equipment', values['equipment_id'], equipment_data),
+
+            # Équipe
+            'maintenance_team': lambda: relation('maintenance_team', values['maintenance_team_id'], team_data),
+
+            # Utilisateurs (compatibilité)
+            'user': lambda: relation('user', values['user_id'], user_data),
+            'assigned_user': lambda: relation('assigned_user', assigned_user_id(), user_data),
+            'owner_user': lambda: relation('owner_user', values.get('owner_user_id'), user_data),
+            'technician_user': lambda: relation('technician_user', values.get('technician_user_id'), user_data),
+
+            # Assignations enrichies
+            'assigned_person': lambda: relation('assigned_person', values.get('assigned_person_id'),
+                                                assigned_person_data),
+            'assigned_persons': lambda: relations('assigned_persons', values.get('assigned_person_ids'), person_data),
+            'assignments': lambda: relations('assignments', values['assignment_ids'], assignments.get),
+
+            # Pièces/sous-modèles avec visualisation 3D
+            'parts': lambda: relations('parts', values['part_ids'], parts.get),
+            'parts_count': lambda: len(values['part_ids']),
+
+            # Compteurs
+            'assignment_count': lambda: len(values['assignment_ids']),
+        }
+        return {name: build() for name, build in attributes.items() if fieldset.wants(name)}
+
+    def _serialize_request(self, request_record, ifc_models=None, fieldset=FULL_FIELDSET):
+        """Sérialiser une demande de maintenance avec toutes les informations enrichies"""
+        return self._serialize_requests(request_record, ifc_models, fieldset)[0]
+
+    def _serialize_equipments(self, equipments, include_ifc=True, fieldset=FULL_FIELDSET):
+        """Sérialiser des équipements, lus par lots (voir serializers.py), avec leurs données IFC sauf si
+        include_ifc est faux ou si include= ne contient pas ifc. Seuls les attributs demandés (fields=)
+        sont calculés ; une relation non développée (include=) vaut son identifiant."""
+        reader = BatchReader(request.env)
+        equipment_values = reader.read('maintenance.equipment', equipments.ids, EQUIPMENT_DETAIL_FIELDS)
+        all_values = [equipment_values[equipment_id] for equipment_id in equipments.ids]
+
+        def collect_loaded(*field_names):
+            return [values.get(field_name) for values in all_values for field_name in field_names
+                    if fieldset.loads(field_name) and values.get(field_name)]
+
+        reader.read('maintenance.equipment.category', collect_loaded('category_id'), NAME_FIELDS)
+        reader.read('res.partner', collect_loaded('partner_id'), NAME_FIELDS)
+        reader.read('res.users', collect_loaded('technician_user_id', 'owner_user_id'), NAME_FIELDS)
+        model3ds, _submodels = self._get_3d_records(reader, model3d_ids=collect_loaded('model3d_id'))
+
+        def name_data(model_name):
+            def build(record_id):
+                values = reader.get(model_name, record_id)
+                return {'id': values['id'], 'name': values['name']} if values else None
+            return build
 
-    def _serialize_equipment(self, equipment_record):
-        """Sérialiser un équipement AVEC DONNÉES IFC"""
         # URLs des modèles 3D
-        model_3d_url = None
-        viewer_url = None
-        if equipment_record.model3d_id:
-            model_3d_url = equipment_record.model3d_id.model_url
-            viewer_url = equipment_record.model3d_id.viewer_url
-
-        equipment_data = {
-            'id': equipment_record.id,
-            'name': equipment_record.name,
-            'serial_no': equipment_record.serial_no or '',
-            'location': equipment_record.location or '',
-            'category_id': {
-                'id': equipment_record.category_id.id,
-                'name': equipment_record.category_id.name
-            } if equipment_record.category_id else None,
-            'partner_id': {
-                'id': equipment_record.partner_id.id,
-                'name': equipment_record.partner_id.name
-            } if equipment_record.partner_id else None,
-            'technician_user_id': {
-                'id': equipment_record.technician_user_id.id,
-                'name': equipment_record.technician_user_id.name
-            } if equipment_record.technician_user_id else None,
-            'owner_user_id': {
-                'id': equipment_record.owner_user_id.id,
-                'name': equipment_record.owner_user_id.name
-            } if equipment_record.owner_user_id else None,
-            'model3d_id': {
-                'id': equipment_record.model3d_id.id,
-                'name': equipment_record.model3d_id.name,
-                'model_url': model_3d_url,
-                'viewer_url': viewer_url,
-                'has_ifc': equipment_record.model3d_id.has_ifc_file,
-                'ifc_version': equipment_record.model3d_id.ifc_version,
-                'ifc_url': equipment_record.model3d_id.ifc_url,
-            } if equipment_record.model3d_id else None,
-            'assign_date': equipment_record.assign_date.strftime(DEFAULT_SERVER_DATETIME_FORMAT) if equipment_record.assign_date else None,
-            'cost': float(equipment_record.cost) if equipment_record.cost else 0.0,
-            'note': equipment_record.note or '',
-            'warranty_date': equipment_record.warranty_date.strftime('%Y-%m-%d') if equipment_record.warranty_date else None,
-            'color': equipment_record.color,
-            'cost_center': equipment_record.cost_center or '' if hasattr(equipment_record, 'cost_center') else '',
-        }
+        def model3d_data(model3d_id):
+            model3d = model3ds.get(model3d_id)
+            if not model3d:
+                return None
+            model3d_info = {
+                'id': model3d.id,
+                'name': model3d.name,
+                'model_url': model3d.model_url,
+                'viewer_url': model3d.viewer_url,
+                'has_ifc': model3d.has_ifc_file,
+                'ifc_version': model3d.ifc_version,
+                'ifc_url': model3d.ifc_url,
+                'geometry': model3d._get_geometry_data(),
+                'lods': model3d._get_lod_data(),
+                'compressed': model3d._get_compressed_data(),
+                'previews': model3d._get_preview_data(),
+            }
+            # Ajouter les données IFC complètes si disponibles
+            if include_ifc and fieldset.expands('ifc') and model3d.has_ifc_file:
+                model3d_info['ifc_data'] = self._serialize_ifc_data(model3d)
+            return model3d_info
+
+        def build_equipment(values):
+            def relation(field_name, build):
+                if not fieldset.expands(field_name):
+                    return values.get(field_name) or None
+                return build(values[field_name]) if values.get(field_name) else None
+
+            attributes = {
+                'id': lambda: values['id'],
+                'name': lambda: values['name'],
+                'serial_no': lambda: values['serial_no'] or '',
+                'location': lambda: values['location'] or '',
+                'category_id': lambda: relation('category_id', name_data('maintenance.equipment.category')),
+                'partner_id': lambda: relation('partner_id', name_data('res.partner')),
+                'technician_user_id': lambda: relation('technician_user_id', name_data('res.users')),
+                'owner_user_id': lambda: relation('owner_user_id', name_data('res.users')),
+                'model3d_id': lambda: relation('model3d_id', model3d_data),
+                'assign_date': lambda: values['assign_date'].strftime(DEFAULT_SERVER_DATETIME_FORMAT) if values.get('assign_date') else None,
+                'cost': lambda: float(values['cost']) if values.get('cost') else 0.0,
+                'note': lambda: values.get('note') or '',
+                'warranty_date': lambda: values['warranty_date'].strftime('%Y-%m-%d') if values.get('warranty_date') else None,
+                'color': lambda: values.get('color'),
+                'cost_center': lambda: values.get('cost_center') or '',
+            }
+            return {name: build() for name, build in attributes.items() if fieldset.wants(name)}
 
-        # NOUVEAU: Ajouter les données IFC complètes si disponibles
-        if equipment_record.model3d_id and equipment_record.model3d_id.has_ifc_file:
-            equipment_data['model3d_id']['ifc_data'] = self._serialize_ifc_data(equipment_record.model3d_id)
+        return [build_equipment(values) for values in all_values]
 
-        return equipment_data
+    def _serialize_equipment(self, equipment_record, include_ifc=True, fieldset=FULL_FIELDSET):
+        """Sérialiser un équipement (voir _serialize_equipments)"""
+        return self._serialize_equipments(equipment_record, include_ifc, fieldset)[0]
 
     # ===== NOUVELLES ROUTES POUR LES DONNÉES IFC =====
 
@@ -653,44 +902,102 @@ class CMSAPIController(http.Controller):
     @http.route('/api/flutter/maintenance/ifc/<int:model3d_id>/raw', type='http', auth='none', methods=['GET'], csrf=False)
     @basic_auth_required
     def get_ifc_raw_data(self, model3d_id, **kwargs):
-        """Récupérer les données IFC JSON brutes complètes d'un modèle 3D"""
+        """Récupérer les données IFC JSON brutes complètes d'un modèle 3D.
+        Le JSON stocké est recopié tel quel dans l'enveloppe de réponse, par tranches lues en SQL :
+        ni json.loads ni chargement du champ complet, la mémoire ne croît pas avec la taille de l'IFC."""
         try:
             model3d = request.env['cmms.model3d'].sudo().browse(model3d_id)
 
             if not model3d.exists():
                 return self._error_response("Model 3D not found", 404)
 
-            if not model3d.has_ifc_file or not model3d.ifc_data_json:
+            # read() ne charge que les champs demandés (un accès par attribut préchargerait ifc_data_json)
+            values = model3d.read(['name', 'ifc_filename', 'ifc_version', 'ifc_parsing_status',
+                                   'ifc_entities_count', 'has_ifc_file'])[0]
+            request.env.cr.execute("SELECT length(ifc_data_json) FROM cmms_model3d WHERE id = %s", (model3d_id,))
+            if not values['has_ifc_file'] or not request.env.cr.fetchone()[0]:
                 return self._error_response("No IFC JSON data available for this 3D model", 404)
 
-            try:
-                # Parser et retourner le JSON brut complet
-                raw_ifc_data = json.loads(model3d.ifc_data_json)
-
-                response_data = {
-                    'model_info': {
-                        'id': model3d.id,
-                        'name': model3d.name,
-                        'ifc_filename': model3d.ifc_filename,
-                        'ifc_version': model3d.ifc_version,
-                        'parsing_status': model3d.ifc_parsing_status,
-                        'entities_count': model3d.ifc_entities_count,
-                    },
-                    'ifc_raw_data': raw_ifc_data
-                }
-
-                return self._success_response(
-                    response_data,
-                    f"Raw IFC JSON data retrieved successfully for model {model3d.name}"
-                )
-
-            except json.JSONDecodeError as e:
-                return self._error_response(f"Invalid IFC JSON data: {str(e)}", 500)
+            model_info = {
+                'id': model3d_id,
+                'name': values['name'],
+                'ifc_filename': values['ifc_filename'],
+                'ifc_version': values['ifc_version'],
+                'parsing_status': values['ifc_parsing_status'],
+                'entities_count': values['ifc_entities_count'],
+            }
+            message = f"Raw IFC JSON data retrieved successfully for model {values['name']}"
+            # Même enveloppe que _success_response, ouverte avant et refermée après les données brutes
+            prefix = (f'{{"success": true, "message": {json.dumps(message)}, '
+                      f'"data": {{"model_info": {json.dumps(model_info, default=str)}, "ifc_raw_data": ')
+            timestamp = fields.Datetime.now().strftime(DEFAULT_SERVER_DATETIME_FORMAT)
+            suffix = f'}}, "timestamp": {json.dumps(timestamp)}}}'
+
+            return stream_response(
+                self._iter_ifc_data_json(request.env.registry, model3d_id, prefix, suffix),
+                'application/json',
+                self._get_cors_headers(),
+            )
 
         except Exception as e:
             _logger.error(f"Error getting raw IFC data for model {model3d_id}: {str(e)}")
             return self._error_response(f"Error retrieving raw IFC data: {str(e)}", 500)
 
+    def _iter_ifc_data_json(self, registry, model3d_id, prefix, suffix):
+        """Générateur de la réponse /raw : consommé après la fin de la requête, il lit le JSON IFC
+        par tranches de IFC_JSON_CHUNK_SIZE caractères avec son propre curseur"""
+        yield prefix
+        with registry.cursor() as cr:
+            cr.execute("SELECT length(ifc_data_json) FROM cmms_model3d WHERE id = %s", (model3d_id,))
+            row = cr.fetchone()
+            json_length = row[0] if row else 0
+            for offset in range(1, (json_length or 0) + 1, IFC_JSON_CHUNK_SIZE):
+                cr.execute("SELECT substr(ifc_data_json, %s, %s) FROM cmms_model3d WHERE id = %s",
+                           (offset, IFC_JSON_CHUNK_SIZE, model3d_id))
+                yield cr.fetchone()[0]
+            if not json_length:
+                # Données supprimées entre la vérification et la lecture : le JSON reste valide
+                yield 'null'
+        yield suffix
+
+    @http.route('/api/flutter/maintenance/ifc/<int:model3d_id>/file', type='http', auth='none', methods=['GET'], csrf=False)
+    @basic_auth_required
+    def get_ifc_file(self, model3d_id, **kwargs):
+        """Télécharger le fichier IFC original, lu depuis le disque par blocs (ou délégué au proxy)"""
+        try:
+            Model3D = request.env['cmms.model3d'].sudo()
+            manifest = Model3D._get_asset_manifest(model3d_id)
+            if not manifest:
+                return self._error_response("Model 3D not found", 404)
+
+            model3d = Model3D.browse(model3d_id)
+            values = model3d.read(['ifc_filename', 'has_ifc_file'])[0]
+            asset = values['has_ifc_file'] and manifest['files'].get(values['ifc_filename'])
+            if not asset:
+                return self._error_response("No IFC file associated with this 3D model", 404)
+
+            if not os.path.isfile(asset['path']) and not model3d._materialize_stored_asset(values['ifc_filename']):
+                return self._error_response("IFC file not found on disk", 404)
+
+            headers = self._get_cors_headers() + [
+                ('Content-Disposition', content_disposition(values['ifc_filename'])),
+                ('Cache-Control', 'no-cache'),
+                ('Vary', 'Accept-Encoding'),
+            ]
+            # Variante .br/.gz écrite à l'ingestion si le client l'accepte
+            served = asset
+            encoding, variant = select_precompressed_variant(asset['variants'])
+            if variant:
+                served = variant
+                headers.append(('Content-Encoding', encoding))
+
+            return send_file(served['path'], asset['mime'], headers, MODELS_DIR,
+                             etag=served.get('sha256'), etag_stat=(served.get('size'), served.get('mtime')))
+
+        except Exception as e:
+            _logger.error(f"Error getting IFC file for model {model3d_id}: {str(e)}")
+            return self._error_response(f"Error retrieving IFC file: {str(e)}", 500)
+
     @http.route('/api/flutter/maintenance/ifc/search', type='http', auth='none', methods=['GET'], csrf=False)
     @basic_auth_required
     def search_ifc_data(self, property_name=None, property_value=None, entity_type=None, **kwargs):
@@ -778,6 +1085,149 @@ class CMSAPIController(http.Controller):
             _logger.error(f"Error searching IFC data: {str(e)}")
             return self._error_response(f"Error searching IFC data: {str(e)}", 500)
 
+    # ===== REQUÊTES SPATIALES SUR LES SOUS-MODÈLES =====
+
+    def _parse_float_params(self, kwargs, names):
+        """Convertit les paramètres numériques obligatoires, lève ValueError si absents ou invalides"""
+        values = []
+        for name in names:
+            value = kwargs.get(name)
+            if value in (None, ''):
+                raise ValueError(f"Missing parameter: {name}")
+            try:
+                values.append(float(value))
+            except (ValueError, TypeError):
+                raise ValueError(f"Invalid numeric parameter: {name}")
+        return values
+
+    def _serialize_spatial_hits(self, hits):
+        """Sérialise les résultats (submodel_id, distance) d'une requête spatiale en conservant l'ordre"""
+        submodels = request.env['cmms.submodel3d'].browse([item_id for item_id, _distance in hits]).exists()
+        submodels_by_id = {submodel.id: submodel for submodel in submodels}
+
+        results = []
+        for item_id, distance in hits:
+            submodel = submodels_by_id.get(item_id)
+            if not submodel:
+                continue
+            results.append({
+                'id': submodel.id,
+                'name': submodel.name,
+                'relative_id': submodel.relative_id,
+                'gltf_url': submodel.gltf_url,
+                'bin_url': submodel.bin_url,
+                'glb_url': submodel.glb_url,
+                'viewer_url': submodel.viewer_url,
+                'world_bbox': submodel._get_world_bbox_data(),
+                'distance': distance,
+            })
+        return results
+
+    def _spatial_query_response(self, model3d_id, query_type, run_query, parameters):
+        """Exécute une requête sur l'index spatial d'un modèle et formate la réponse.
+        Seuls les modèles d'un équipement autorisé (_get_allowed_equipment_domain) sont interrogeables ;
+        les autres sont traités comme inexistants."""
+        model3d = request.env['cmms.model3d'].browse(model3d_id).exists()
+        if not model3d or not request.env['maintenance.equipment'].search(
+                self._get_allowed_equipment_domain() + [('model3d_id', '=', model3d.id)], limit=1):
+            return self._error_response("Model 3D not found", 404)
+
+        start = time.perf_counter()
+        index = request.env['cmms.submodel3d']._get_spatial_index(model3d.id)
+        hits = run_query(index)
+        query_ms = (time.perf_counter() - start) * 1000.0
+
+        results = self._serialize_spatial_hits(hits)
+        return self._success_response({
+            'model3d_id': model3d.id,
+            'query': dict(parameters, type=query_type),
+            'indexed_parts': index.size,
+            'results_count': len(results),
+            'results': results,
+            'query_ms': round(query_ms, 3),
+        }, f"Spatial {query_type} query completed - {len(results)} parts found")
+
+    @http.route('/api/flutter/maintenance/model3d/<int:model3d_id>/parts/box', type='http', auth='none', methods=['GET'], csrf=False)
+    @basic_auth_required
+    def spatial_box_query(self, model3d_id, limit=None, **kwargs):
+        """Sous-modèles dont la boîte englobante intersecte la région [min_x..max_x, min_y..max_y, min_z..max_z]"""
+        try:
+            min_x, min_y, min_z, max_x, max_y, max_z = self._parse_float_params(
+                kwargs, ['min_x', 'min_y', 'min_z', 'max_x', 'max_y', 'max_z'])
+            limit = int(limit) if limit else None
+        except ValueError as e:
+            return self._error_response(str(e), 400)
+
+        try:
+            bbox_min = (min(min_x, max_x), min(min_y, max_y), min(min_z, max_z))
+            bbox_max = (max(min_x, max_x), max(min_y, max_y), max(min_z, max_z))
+            return self._spatial_query_response(
+                model3d_id, 'box',
+                lambda index: [(item_id, 0.0) for item_id in index.query_box(bbox_min, bbox_max, limit=limit)],
+                {'min': bbox_min, 'max': bbox_max, 'limit': limit},
+            )
+        except Exception as e:
+            _logger.error(f"Error in spatial box query for model {model3d_id}: {str(e)}")
+            return self._error_response(f"Error in spatial query: {str(e)}", 500)
+
+    @http.route('/api/flutter/maintenance/model3d/<int:model3d_id>/parts/nearest', type='http', auth='none', methods=['GET'], csrf=False)
+    @basic_auth_required
+    def spatial_nearest_query(self, model3d_id, n=10, max_distance=None, **kwargs):
+        """Les N sous-modèles les plus proches du point (x, y, z)"""
+        try:
+            point = self._parse_float_params(kwargs, ['x', 'y', 'z'])
+            count = max(1, min(int(n), 1000)) if n else 10
+            max_distance = float(max_distance) if max_distance else None
+        except ValueError as e:
+            return self._error_response(str(e), 400)
+
+        try:
+            return self._spatial_query_response(
+                model3d_id, 'nearest',
+                lambda index: index.nearest(point, count, max_distance=max_distance),
+                {'point': point, 'n': count, 'max_distance': max_distance},
+            )
+        except Exception as e:
+            _logger.error(f"Error in spatial nearest query for model {model3d_id}: {str(e)}")
+            return self._error_response(f"Error in spatial query: {str(e)}", 500)
+
+    @http.route('/api/flutter/maintenance/model3d/<int:model3d_id>/parts/ray', type='http', auth='none', methods=['GET'], csrf=False)
+    @basic_auth_required
+    def spatial_ray_query(self, model3d_id, limit=10, max_distance=None, **kwargs):
+        """Sous-modèles traversés par le rayon (origine, direction), du plus proche au plus lointain"""
+        try:
+            origin = self._parse_float_params(kwargs, ['origin_x', 'origin_y', 'origin_z'])
+            direction = self._parse_float_params(kwargs, ['direction_x', 'direction_y', 'direction_z'])
+            if not any(direction):
+                raise ValueError("Ray direction must not be null")
+            limit = max(1, min(int(limit), 1000)) if limit else 10
+            max_distance = float(max_distance) if max_distance else None
+        except ValueError as e:
+            return self._error_response(str(e), 400)
+
+        try:
+            return self._spatial_query_response(
+                model3d_id, 'ray',
+                lambda index: index.raycast(origin, direction, limit=limit, max_distance=max_distance),
+                {'origin': origin, 'direction': direction, 'limit': limit, 'max_distance': max_distance},
+            )
+        except Exception as e:
+            _logger.error(f"Error in spatial ray query for model {model3d_id}: {str(e)}")
+            return self._error_response(f"Error in spatial query: {str(e)}", 500)
+
+    def _get_cached_count(self, model_name, domain):
+        """search_count mis en cache COUNT_CACHE_TTL secondes par base, utilisateur et domaine"""
+        key = (request.env.cr.dbname, request.env.uid, model_name, repr(domain))
+        cached = _count_cache.get(key)
+        now = time.monotonic()
+        if cached and now - cached[1] < COUNT_CACHE_TTL:
+            return cached[0]
+        count = request.env[model_name].search_count(domain)
+        if len(_count_cache) >= COUNT_CACHE_SIZE:
+            _count_cache.clear()
+        _count_cache[key] = (count, now)
+        return count
+
     # ===== OPTIONS (CORS) MISES À JOUR =====
     @http.route([
         '/api/flutter/maintenance/requests',
@@ -791,12 +1241,17 @@ class CMSAPIController(http.Controller):
         '/api/flutter/user/profile/email-check',
         '/api/flutter/maintenance/dashboard',
         '/api/flutter/maintenance/all',
+        '/api/flutter/maintenance/sync',
+        '/api/flutter/auth/token',
         '/api/flutter/maintenance/stages',
         '/api/flutter/maintenance/requests/<int:request_id>/stage',
         '/api/flutter/maintenance/request-states',
         '/api/flutter/maintenance/ifc/<int:model3d_id>',
         '/api/flutter/maintenance/ifc/<int:model3d_id>/raw',
-        '/api/flutter/maintenance/ifc/search'
+        '/api/flutter/maintenance/ifc/search',
+        '/api/flutter/maintenance/model3d/<int:model3d_id>/parts/box',
+        '/api/flutter/maintenance/model3d/<int:model3d_id>/parts/nearest',
+        '/api/flutter/maintenance/model3d/<int:model3d_id>/parts/ray'
     ], type='http', auth='none', methods=['OPTIONS'], csrf=False)
     def api_options(self, **kwargs):
         """Gestion des requêtes OPTIONS pour CORS"""
@@ -829,14 +1284,43 @@ class CMSAPIController(http.Controller):
         """Gestion des requêtes OPTIONS pour CORS (toutes les autres routes)"""
         return request.make_response('', headers=self._get_cors_headers())
 
+    # ===== AUTHENTIFICATION =====
+    @http.route('/api/flutter/auth/token', type='http', auth='none', methods=['POST'], csrf=False)
+    @basic_auth_required
+    def issue_api_token(self, **kwargs):
+        """Échanger une authentification (Basic Auth ou jeton encore valide) contre un jeton Bearer
+        signé, à utiliser pour les appels suivants jusqu'à son expiration"""
+        try:
+            token, expires_at = issue_token(request.env, request.env.uid)
+            return self._success_response({
+                'access_token': token,
+                'token_type': 'Bearer',
+                'expires_in': expires_at - int(time.time()),
+                'expires_at': datetime.utcfromtimestamp(expires_at).strftime(DEFAULT_SERVER_DATETIME_FORMAT),
+            }, "Token issued successfully")
+        except Exception as e:
+            _logger.error(f"Error issuing API token: {str(e)}")
+            return self._error_response("Error issuing token", 500)
+
     # ===== MAINTENANCE REQUESTS AVEC DONNÉES IFC =====
     @http.route('/api/flutter/maintenance/requests', type='http', auth='none', methods=['GET'], csrf=False)
     @basic_auth_required
-    def get_requests(self, limit=10000, offset=0, stage_id=None, status=None, equipment_id=None, include_ifc=None, **kwargs):
-        """Récupérer les demandes de maintenance avec pièces, assignations ET DONNÉES IFC complètes"""
+    def get_requests(self, limit=None, offset=0, cursor=None, with_count=None, stage_id=None, status=None,
+                     equipment_id=None, include_ifc=None, **kwargs):
+        """Récupérer les demandes de maintenance avec pièces et assignations.
+        Pagination par curseur : passer le next_cursor de la page précédente (coût constant quelle que
+        soit la profondeur) ; offset reste accepté sans curseur pour les anciens clients.
+        Le nombre total (mis en cache) est renvoyé sur la première page ou avec with_count.
+        Avec include_ifc, les données IFC de chaque modèle sont ajoutées une fois dans ifc_models.
+        fields= et include= restreignent les attributs et les relations développées (voir Fieldset)."""
         try:
-            limit = int(limit) if limit else 10000
-            offset = int(offset) if offset else 0
+            fieldset = Fieldset(kwargs.get('fields'), kwargs.get('include'))
+            limit = min(max(int(limit), 1), MAX_PAGE_SIZE) if limit else DEFAULT_PAGE_SIZE
+            offset = int(offset) if offset and not cursor else 0
+            if with_count is None:
+                with_count = not cursor and not offset
+            else:
+                with_count = with_count.lower() in ['true', '1', 'yes']
             include_ifc_data = include_ifc and include_ifc.lower() in ['true', '1', 'yes']
 
             # Construire le domaine de recherche
@@ -868,24 +1352,39 @@ class CMSAPIController(http.Controller):
                 except (ValueError, TypeError):
                     _logger.warning(f"Ignoring invalid equipment_id: {equipment_id}")
 
-            # Récupérer les demandes avec toutes les relations
+            page_domain = list(domain)
+            if cursor:
+                try:
+                    page_domain += _keyset_domain(*_decode_cursor(cursor))
+                except ValueError as e:
+                    return self._error_response(str(e), 400)
+
+            # Une demande de plus que la page : indique s'il reste une page suivante
             requests = request.env['maintenance.request'].search(
-                domain,
-                limit=limit,
+                page_domain,
+                limit=limit + 1,
                 offset=offset,
                 order='request_date desc, id desc'
             )
-
-            # Précharger toutes les relations pour optimiser les performances
-            requests.read(['assignment_ids', 'part_ids', 'equipment_id', 'assigned_person_ids'])
-
-            # Sérialiser les données avec toutes les informations enrichies (y compris IFC)
+            has_more = len(requests) > limit
+            requests = requests[:limit]
+            next_cursor = _encode_cursor(requests[-1].request_date, requests[-1].id) if has_more else None
+
+            # Sérialiser les données avec toutes les informations enrichies (lectures par lots)
+            ifc_models = {} if include_ifc_data else None
+            query_count = request.env.cr.sql_log_count
+            serialized_requests = self._serialize_requests(requests, ifc_models, fieldset)
+            _logger.debug(f"{len(requests)} demandes sérialisées en "
+                          f"{request.env.cr.sql_log_count - query_count} requêtes SQL")
             data = {
-                'requests': [self._serialize_request(req) for req in requests],
-                'total_count': request.env['maintenance.request'].search_count(domain),
+                'requests': serialized_requests,
+                'total_count': self._get_cached_count('maintenance.request', domain) if with_count else None,
                 'limit': limit,
                 'offset': offset,
+                'next_cursor': next_cursor,
+                'has_more': has_more,
                 'include_ifc_data': include_ifc_data,
+                'ifc_models': ifc_models if include_ifc_data else {},
                 'filters': {
                     'stage_id': int(stage_id) if stage_id and stage_id.isdigit() else None,
                     'equipment_id': int(equipment_id) if equipment_id and equipment_id.isdigit() else None,
@@ -893,18 +1392,15 @@ class CMSAPIController(http.Controller):
                 }
             }
 
-            # Ajouter des statistiques utiles
-            if requests:
-                ifc_equipped_count = len([req for req in requests
-                                        if req.equipment_id and req.equipment_id.model3d_id
-                                        and req.equipment_id.model3d_id.has_ifc_file])
-
+            # Ajouter des statistiques utiles (calculées sur les données sérialisées complètes)
+            if requests and fieldset.is_full:
+                models_3d = [(req.get('equipment') or {}).get('model_3d') for req in serialized_requests]
                 data['statistics'] = {
-                    'total_parts': sum(len(req.part_ids) for req in requests),
-                    'total_assignments': sum(len(req.assignment_ids) for req in requests),
-                    'requests_with_3d': len([req for req in requests if req.equipment_id and req.equipment_id.model3d_id]),
-                    'requests_with_parts': len([req for req in requests if req.part_ids]),
-                    'requests_with_ifc': ifc_equipped_count,
+                    'total_parts': sum(req.get('parts_count', 0) for req in serialized_requests),
+                    'total_assignments': sum(req.get('assignment_count', 0) for req in serialized_requests),
+                    'requests_with_3d': len([model_3d for model_3d in models_3d if model_3d]),
+                    'requests_with_parts': len([req for req in serialized_requests if req.get('parts_count')]),
+                    'requests_with_ifc': len([model_3d for model_3d in models_3d if model_3d and model_3d['has_ifc']]),
                 }
 
             # Message spécial si des données IFC sont incluses
@@ -912,7 +1408,7 @@ class CMSAPIController(http.Controller):
             if include_ifc_data:
                 message += " (including IFC BIM data)"
 
-            return self._success_response(data, message)
+            return self._stream_success_response(data, message)
 
         except Exception as e:
             _logger.error(f"Error getting requests: {str(e)}")
@@ -921,10 +1417,12 @@ class CMSAPIController(http.Controller):
     @http.route('/api/flutter/maintenance/requests/<int:request_id>', type='http', auth='none', methods=['GET'], csrf=False)
     @basic_auth_required
     def get_request(self, request_id, include_ifc=None, **kwargs):
-        """Récupérer une demande spécifique avec toutes ses pièces, assignations ET DONNÉES IFC"""
+        """Récupérer une demande spécifique avec toutes ses pièces, assignations ET DONNÉES IFC
+        (fields= et include= restreignent la réponse comme pour la liste)"""
         try:
-            include_ifc_data = include_ifc and include_ifc.lower() in ['true', '1', 'yes']
-
+            fieldset = Fieldset(kwargs.get('fields'), kwargs.get('include'))
+            include_ifc_data = ((include_ifc or '').lower() in ['true', '1', 'yes']
+                                or 'ifc' in (fieldset.include or ()))
             domain = self._get_allowed_requests_domain()
             domain.append(('id', '=', request_id))
 
@@ -933,11 +1431,10 @@ class CMSAPIController(http.Controller):
             if not maintenance_request:
                 return self._error_response("Request not found", 404)
 
-            # Précharger toutes les relations
-            maintenance_request.read(['assignment_ids', 'part_ids', 'equipment_id', 'assigned_person_ids'])
-
-            # Sérialiser avec toutes les données enrichies (y compris IFC automatiquement)
-            data = self._serialize_request(maintenance_request)
+            # Sérialiser avec toutes les données enrichies (IFC uniquement sur demande)
+            ifc_models = {} if include_ifc_data else None
+            data = self._serialize_request(maintenance_request, ifc_models, fieldset)
+            data['ifc_models'] = ifc_models or {}
 
             # Ajouter des informations supplémentaires pour la vue détaillée
             has_ifc = (maintenance_request.equipment_id and
@@ -957,7 +1454,7 @@ class CMSAPIController(http.Controller):
 
             # Message adapté selon les données IFC
             message = "Request with complete details retrieved successfully"
-            if has_ifc:
+            if ifc_models:
                 message += " (including IFC BIM data)"
 
             return self._success_response(data, message)
@@ -1032,24 +1529,7 @@ class CMSAPIController(http.Controller):
             # Récupérer tous les stages ordonnés par séquence
             stages = request.env['maintenance.stage'].sudo().search([], order='sequence asc, name asc')
 
-            stages_data = []
-            for stage in stages:
-                stage_info = {
-                    'id': stage.id,
-                    'name': stage.name,
-                    'sequence': getattr(stage, 'sequence', 0),
-                    'done': getattr(stage, 'done', False),
-                    'fold': getattr(stage, 'fold', False),
-                    'description': getattr(stage, 'description', ''),
-                }
-
-                # Ajouter d'autres champs si ils existent
-                if hasattr(stage, 'color'):
-                    stage_info['color'] = stage.color
-                if hasattr(stage, 'stage_type'):
-                    stage_info['stage_type'] = stage.stage_type
-
-                stages_data.append(stage_info)
+            stages_data = [self._serialize_stage(stage) for stage in stages]
 
             return self._success_response(
                 stages_data,
@@ -1060,6 +1540,25 @@ class CMSAPIController(http.Controller):
             _logger.error(f"Error retrieving maintenance stages: {str(e)}")
             return self._error_response(f"Error retrieving stages: {str(e)}", 500)
 
+    def _serialize_stage(self, stage):
+        """Sérialiser un stage de maintenance"""
+        stage_info = {
+            'id': stage.id,
+            'name': stage.name,
+            'sequence': getattr(stage, 'sequence', 0),
+            'done': getattr(stage, 'done', False),
+            'fold': getattr(stage, 'fold', False),
+            'description': getattr(stage, 'description', ''),
+        }
+
+        # Ajouter d'autres champs si ils existent
+        if hasattr(stage, 'color'):
+            stage_info['color'] = stage.color
+        if hasattr(stage, 'stage_type'):
+            stage_info['stage_type'] = stage.stage_type
+
+        return stage_info
+
     # Route pour mettre à jour une pièce d'une requête de maintenance spécifique
     @http.route('/api/flutter/maintenance/requests/<int:request_id>/part/<int:part_id>',
                 type='http', auth='none', methods=['PUT', 'GET'],
@@ -1210,10 +1709,9 @@ class CMSAPIController(http.Controller):
     @http.route('/api/flutter/maintenance/equipment/<int:equipment_id>', type='http', auth='none', methods=['GET'], csrf=False)
     @basic_auth_required
     def get_equipment_by_id(self, equipment_id, include_ifc=None, **kwargs):
-        """Récupérer un équipement spécifique AVEC DONNÉES IFC - Version Flutter Web optimisée"""
+        """Récupérer un équipement spécifique, avec ses données IFC si include_ifc=true ou include=ifc -
+        Version Flutter Web optimisée"""
         try:
-            include_ifc_data = include_ifc and include_ifc.lower() in ['true', '1', 'yes']
-
             domain = self._get_allowed_equipment_domain()
             domain.append(('id', '=', equipment_id))
 
@@ -1222,12 +1720,15 @@ class CMSAPIController(http.Controller):
             if not equipment:
                 return self._error_response("Equipment not found", 404)
 
-            # La sérialisation inclut automatiquement les données IFC si disponibles
-            data = self._serialize_equipment(equipment)
+            # Données IFC (plusieurs Mo) sur demande uniquement : include_ifc=true ou include=ifc
+            fieldset = Fieldset(kwargs.get('fields'), kwargs.get('include'))
+            include_ifc_data = ((include_ifc or '').lower() in ['true', '1', 'yes']
+                                or 'ifc' in (fieldset.include or ()))
+            data = self._serialize_equipment(equipment, include_ifc=include_ifc_data, fieldset=fieldset)
 
             # Message adapté selon les données IFC
             message = "Equipment retrieved successfully"
-            if equipment.model3d_id and equipment.model3d_id.has_ifc_file:
+            if isinstance(data.get('model3d_id'), dict) and data['model3d_id'].get('ifc_data'):
                 message += " (including IFC BIM data)"
 
             return self._success_response(data, message)
@@ -1278,7 +1779,7 @@ class CMSAPIController(http.Controller):
             # Créer la demande
             new_request = request.env['maintenance.request'].create(vals)
 
-            # La sérialisation incluera automatiquement les données IFC si l'équipement en a
+            # Données IFC disponibles via include_ifc sur GET /requests/<id>
             return self._success_response(
                 self._serialize_request(new_request),
                 "Request created successfully"
@@ -1451,6 +1952,107 @@ class CMSAPIController(http.Controller):
             return self._error_response(f"Error checking email: {str(e)}", 500)
 
     # Dashboard pour Flutter
+    @http.route('/api/flutter/maintenance/sync', type='http', auth='none', methods=['GET'], csrf=False)
+    @basic_auth_required
+    def sync_changes(self, since=None, cursor=None, limit=None, **kwargs):
+        """Synchronisation différentielle des clients hors ligne.
+        Avec le jeton since de la réponse précédente : seuls les demandes, pièces, assignations,
+        équipements et stages créés ou modifiés depuis, et les ids supprimés (deleted) ; les demandes
+        et équipements sortis du périmètre de l'utilisateur (réaffectation, changement d'équipe) y
+        figurent aussi. Un même enregistrement peut être renvoyé deux fois de suite (chevauchement
+        des fenêtres) : le client le remplace par id.
+        Sans jeton, avec un jeton antérieur à la rétention des suppressions ou après un changement
+        des équipes de l'utilisateur : état complet (full), par pages d'au plus limit demandes et
+        limit équipements. Le client repasse next_cursor dans cursor jusqu'à has_more = false ;
+        seule la dernière page porte le sync_token, et le client substitue alors les données
+        reçues à ses données locales."""
+        try:
+            env = request.env
+            tombstones = env['cmms.sync.tombstone']
+            limit = min(max(int(limit), 1), MAX_PAGE_SIZE) if limit else MAX_PAGE_SIZE
+            last_request_id = last_equipment_id = 0
+            since_time = None
+            try:
+                if cursor:
+                    sync_time, last_request_id, last_equipment_id = _decode_sync_cursor(cursor)
+                else:
+                    sync_time = env.cr.now()
+                    since_time = _decode_sync_token(since) if since else None
+            except ValueError as e:
+                return self._error_response(str(e), 400)
+
+            window_start = since_time - timedelta(seconds=SYNC_OVERLAP) if since_time else None
+            full = (since_time is None or since_time < tombstones._get_retention_start()
+                    or tombstones._has_scope_change(env.user, window_start))
+            request_domain = self._get_allowed_requests_domain()
+            equipment_domain = self._get_allowed_equipment_domain()
+            Request = env['maintenance.request']
+            Equipment = env['maintenance.equipment']
+            sync_data = {'full': full, 'parts': [], 'assignments': []}
+
+            if full:
+                # Pages en ordre d'id : les modifications faites pendant la pagination sont
+                # rattrapées par la synchronisation différentielle suivante (jeton du début)
+                requests = Request.search(request_domain + [('id', '>', last_request_id)],
+                                          order='id asc', limit=limit + 1)
+                equipment = Equipment.search(equipment_domain + [('id', '>', last_equipment_id)],
+                                             order='id asc', limit=limit + 1)
+                has_more = len(requests) > limit or len(equipment) > limit
+                requests, equipment = requests[:limit], equipment[:limit]
+                stages = env['maintenance.stage']
+                if not cursor:
+                    stages = stages.sudo().search([], order='sequence asc, name asc')
+                deleted = {}
+                sync_data['has_more'] = has_more
+                sync_data['next_cursor'] = _encode_sync_cursor(
+                    sync_time,
+                    requests[-1].id if requests else last_request_id,
+                    equipment[-1].id if equipment else last_equipment_id,
+                ) if has_more else None
+            else:
+                has_more = False
+                changed_domain = [('write_date', '>', window_start)]
+                requests = Request.search(request_domain + changed_domain, order='id asc')
+                equipment = Equipment.search(equipment_domain + changed_domain)
+                stages = env['maintenance.stage'].sudo().search(changed_domain, order='sequence asc, name asc')
+
+                # Pièces et assignations modifiées seules : celles des demandes modifiées sont déjà
+                # incluses. Le périmètre est une sous-requête SQL, jamais une liste d'identifiants.
+                child_domain = [('request_id', 'in', Request._search(request_domain)),
+                                ('request_id.write_date', '<=', window_start)] + changed_domain
+                parts = env['maintenance.request.part'].search(child_domain)
+                sync_data['parts'] = self._serialize_parts(parts)
+                assignments = env['maintenance.request.assignment'].search(child_domain)
+                sync_data['assignments'] = list(
+                    self._serialize_assignments(assignments.ids, BatchReader(env)).values()
+                )
+
+                deleted = tombstones._get_deleted_ids(SYNC_MODELS.values(), window_start)
+                # Demandes et équipements réaffectés que l'utilisateur ne voit plus
+                scope_changed = tombstones._get_deleted_ids(
+                    ['maintenance.request', 'maintenance.equipment'], window_start, scope_change=True)
+                for model, domain in ((Request, request_domain), (Equipment, equipment_domain)):
+                    candidate_ids = set(scope_changed[model._name])
+                    if candidate_ids:
+                        candidate_ids -= set(model.search([('id', 'in', list(candidate_ids))] + domain).ids)
+                        deleted[model._name] = sorted(candidate_ids.union(deleted[model._name]))
+
+            sync_data['requests'] = self._serialize_requests(requests)
+            sync_data['equipment'] = self._serialize_equipments(equipment, include_ifc=False)
+            sync_data['stages'] = [self._serialize_stage(stage) for stage in stages]
+            sync_data['deleted'] = {key: deleted.get(model_name, []) for key, model_name in SYNC_MODELS.items()}
+            sync_data['sync_token'] = None if has_more else _encode_sync_token(sync_time)
+
+            changed_count = sum(len(sync_data[key]) for key in SYNC_MODELS)
+            return self._stream_success_response(
+                sync_data,
+                f"Sync {'full' if full else 'delta'}: {changed_count} changed records"
+            )
+
+        except Exception as e:
+            _logger.error(f"Error syncing maintenance data: {str(e)}")
+            return self._error_response(f"Error syncing data: {str(e)}", 500)
+
     @http.route('/api/flutter/maintenance/dashboard', type='http', auth='none', methods=['GET'], csrf=False)
     @basic_auth_required
     def get_dashboard_flutter(self, **kwargs):
@@ -1484,26 +2086,13 @@ class CMSAPIController(http.Controller):
                 order='request_date desc, id desc'
             )
             dashboard_data['requests'] = {
-                'recent': [self._serialize_request(req) for req in requests],
+                'recent': self._serialize_requests(requests, fieldset=Fieldset(kwargs.get('fields'), kwargs.get('include'))),
                 'total_count': request.env['maintenance.request'].search_count(request_domain)
             }
 
             # ... Autres parties du dashboard selon vos besoins...
 
-            # Réponse spéciale sans cookie pour Flutter Web
-            response_data = {
-                'success': True,
-                'message': "Dashboard data retrieved successfully",
-                'data': dashboard_data,
-                'timestamp': fields.Datetime.now().strftime(DEFAULT_SERVER_DATETIME_FORMAT)
-            }
-
-            response = request.make_response(
-                json.dumps(response_data, default=str),
-                headers=self._get_cors_headers() + [('Content-Type', 'application/json')]
-            )
-            response.status_code = 200
-            return response
+            return self._stream_success_response(dashboard_data, "Dashboard data retrieved successfully")
 
         except Exception as e:
             _logger.error(f"Error getting dashboard: {str(e)}")
@@ -0,0 +1,316 @@
+# custom_addons/cmms_3d_models/controllers/http_utils.py
+"""
+Envoi des fichiers d'assets 3D sans les charger en mémoire :
+1. Délégation au proxy (X-Accel-Redirect pour nginx, X-Sendfile pour Apache/lighttpd)
+   lorsque proxy_mode est actif et qu'un mode de délégation est configuré
+2. Sinon, streaming par blocs via le file wrapper WSGI (sendfile si le serveur le fournit)
+3. Requêtes partielles Range/If-Range : 206 simple ou multipart/byteranges, 416 si non satisfiable
+4. Requêtes conditionnelles If-None-Match/If-Modified-Since : 304 sans relire le fichier
+5. Choix d'une variante précompressée (.br/.gz écrite à l'ingestion) selon Accept-Encoding
+6. Lots de fichiers en une seule réponse multipart/mixed diffusée en continu
+7. Réponses générées par blocs (transfert chunked), compressées à la volée (brotli ou gzip) si accepté
+8. Réponses dynamiques en mémoire (JSON de l'API) compressées selon Accept-Encoding
+"""
+
+import os
+import gzip
+import uuid
+import zlib
+import calendar
+import logging
+from urllib.parse import quote
+
+from werkzeug.http import http_date, quote_etag
+from werkzeug.wsgi import wrap_file
+from odoo.http import request, Response
+from odoo.tools import config
+
+from ..models.asset_storage import record_access
+
+_logger = logging.getLogger(__name__)
+
+# Compression brotli optionnelle (paquet Brotli) : à défaut, seul gzip est proposé
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Taille des blocs lus lorsque le serveur WSGI ne fournit pas wsgi.file_wrapper
+STREAM_BUFFER_SIZE = 256 * 1024
+
+# Variantes précompressées par ordre de préférence : (Content-Encoding, suffixe du fichier)
+PRECOMPRESSED_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+# Niveaux de compression à la volée des réponses générées (sans variante précompressée) :
+# compromis vitesse/taille, les réponses sont compressées à chaque requête
+STREAM_GZIP_LEVEL = 6
+STREAM_BROTLI_QUALITY = 4
+# En dessous, une réponse en mémoire est envoyée sans compression (gain inférieur au coût)
+MIN_COMPRESS_SIZE = 1024
+
+# Au-delà, la requête Range est ignorée et le fichier complet est renvoyé (RFC 7233 §3.1)
+MAX_RANGES = 16
+
+# Paramètres système
+# - cmms_3d_models.file_offload : 'x-accel-redirect', 'x-sendfile' ou vide (streaming par Odoo)
+# - cmms_3d_models.x_accel_prefix : location nginx interne qui pointe sur MODELS_DIR
+OFFLOAD_PARAM = 'cmms_3d_models.file_offload'
+X_ACCEL_PREFIX_PARAM = 'cmms_3d_models.x_accel_prefix'
+DEFAULT_X_ACCEL_PREFIX = '/cmms_models3d_internal/'
+
+
+def get_offload_mode():
+    """Mode de délégation de l'envoi au proxy, uniquement derrière un proxy (proxy_mode)"""
+    if not config.get('proxy_mode'):
+        return None
+    mode = (request.env['ir.config_parameter'].sudo().get_param(OFFLOAD_PARAM) or '').strip().lower()
+    return mode if mode in ('x-accel-redirect', 'x-sendfile') else None
+
+
+def _offload_header(mode, file_path, models_dir):
+    if mode == 'x-sendfile':
+        return ('X-Sendfile', file_path)
+    prefix = request.env['ir.config_parameter'].sudo().get_param(X_ACCEL_PREFIX_PARAM, DEFAULT_X_ACCEL_PREFIX)
+    relative_path = os.path.relpath(file_path, models_dir).replace(os.sep, '/')
+    return ('X-Accel-Redirect', f"{prefix.rstrip('/')}/{quote(relative_path)}")
+
+
+def accepts_encoding(encoding):
+    """Vrai si le client accepte le Content-Encoding donné"""
+    return request.httprequest.accept_encodings.quality(encoding) > 0
+
+
+def select_precompressed_variant(variants):
+    """Variante précompressée acceptée par le client : (encodage, variante), ou (None, None)
+    :param variants: {Content-Encoding: variante} issu du manifeste des fichiers du modèle"""
+    for encoding, _suffix in PRECOMPRESSED_ENCODINGS:
+        variant = variants.get(encoding)
+        if variant and accepts_encoding(encoding) and os.path.isfile(variant['path']):
+            return encoding, variant
+    return None, None
+
+
+def negotiate_encoding():
+    """Encodage de compression dynamique accepté par le client : 'br', 'gzip' ou None"""
+    if brotli and accepts_encoding('br'):
+        return 'br'
+    if accepts_encoding('gzip'):
+        return 'gzip'
+    return None
+
+
+def _iter_brotli(chunks):
+    compressor = brotli.Compressor(quality=STREAM_BROTLI_QUALITY)
+    for chunk in chunks:
+        data = compressor.process(chunk)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def _iter_gzip(chunks):
+    """Compresse les blocs au fil de l'eau (format gzip : en-tête et CRC inclus)"""
+    compressor = zlib.compressobj(STREAM_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def stream_response(chunks, content_type, headers, status=200):
+    """Réponse diffusée au fil de sa génération, sans Content-Length (transfert chunked) :
+    seul le bloc courant est en mémoire. Compressée à la volée (brotli ou gzip) si le client l'accepte.
+    :param chunks: itérable de bytes ou de str (encodées en UTF-8), consommé après la fin de la requête"""
+    chunks = (chunk.encode('utf-8') if isinstance(chunk, str) else chunk for chunk in chunks)
+    headers = list(headers) + [('Content-Type', content_type), ('Vary', 'Accept-Encoding')]
+    encoding = negotiate_encoding()
+    if encoding:
+        chunks = _iter_brotli(chunks) if encoding == 'br' else _iter_gzip(chunks)
+        headers.append(('Content-Encoding', encoding))
+    return Response(chunks, status=status, headers=headers, direct_passthrough=True)
+
+
+def compressed_response(body, content_type, headers, status=200):
+    """Réponse dont le corps (bytes) est déjà en mémoire, compressée si le client l'accepte"""
+    headers = list(headers) + [('Content-Type', content_type), ('Vary', 'Accept-Encoding')]
+    encoding = negotiate_encoding() if len(body) >= MIN_COMPRESS_SIZE else None
+    if encoding == 'br':
+        body = brotli.compress(body, quality=STREAM_BROTLI_QUALITY)
+    elif encoding == 'gzip':
+        body = gzip.compress(body, compresslevel=STREAM_GZIP_LEVEL, mtime=0)
+    if encoding:
+        headers.append(('Content-Encoding', encoding))
+    return Response(body, status=status, headers=headers)
+
+
+def _is_not_modified(etag, last_modified):
+    """Vrai si la copie du client est à jour (If-None-Match prioritaire sur If-Modified-Since)"""
+    httprequest = request.httprequest
+    if httprequest.if_none_match:
+        return httprequest.if_none_match.contains_weak(etag)
+    if httprequest.if_modified_since:
+        return calendar.timegm(httprequest.if_modified_since.utctimetuple()) >= int(last_modified)
+    return False
+
+
+def _if_range_matches(strong_etag, last_modified):
+    """Vrai si l'en-tête If-Range est absent ou correspond encore au fichier servi
+    (comparaison forte : un ETag faible ne valide jamais une plage)"""
+    if_range = request.httprequest.if_range
+    if not if_range.etag and not if_range.date:
+        return True
+    if if_range.etag:
+        return bool(strong_etag) and if_range.etag == strong_etag
+    return calendar.timegm(if_range.date.utctimetuple()) == int(last_modified)
+
+
+def _requested_ranges(file_size, strong_etag, last_modified):
+    """Plages demandées sous forme [(début, fin exclue)], fusionnées et triées.
+    None : réponse complète (pas de Range, If-Range périmé, trop de plages) ; [] : non satisfiable."""
+    byte_range = request.httprequest.range
+    if byte_range is None or byte_range.units != 'bytes' or not _if_range_matches(strong_etag, last_modified):
+        return None
+    if len(byte_range.ranges) > MAX_RANGES:
+        return None
+
+    ranges = []
+    for start, stop in byte_range.ranges:
+        if start < 0:
+            # Plage suffixe "-N" : les N derniers octets
+            start, stop = max(0, file_size + start), file_size
+        else:
+            stop = file_size if stop is None else min(stop, file_size)
+        if start < stop:
+            ranges.append((start, stop))
+
+    merged = []
+    for start, stop in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+        else:
+            merged.append((start, stop))
+    return merged
+
+
+def _iter_file_range(file_path, start, stop):
+    """Lit [start, stop[ par blocs ; le fichier est fermé à la fin ou à l'abandon du client"""
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        remaining = stop - start
+        while remaining > 0:
+            chunk = f.read(min(STREAM_BUFFER_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _multipart_byteranges_response(file_path, ranges, file_size, content_type, headers):
+    boundary = uuid.uuid4().hex
+    parts = [(
+        (f"\r\n--{boundary}\r\nContent-Type: {content_type}\r\n"
+         f"Content-Range: bytes {start}-{stop - 1}/{file_size}\r\n\r\n").encode('ascii'),
+        start,
+        stop,
+    ) for start, stop in ranges]
+    closing = f"\r\n--{boundary}--\r\n".encode('ascii')
+    content_length = sum(len(part_header) + stop - start for part_header, start, stop in parts) + len(closing)
+
+    def generate():
+        for part_header, start, stop in parts:
+            yield part_header
+            yield from _iter_file_range(file_path, start, stop)
+        yield closing
+
+    headers = headers + [
+        ('Content-Type', f'multipart/byteranges; boundary={boundary}'),
+        ('Content-Length', str(content_length)),
+    ]
+    return Response(generate(), status=206, headers=headers, direct_passthrough=True)
+
+
+def send_multipart_files(parts, headers):
+    """Réponse multipart/mixed contenant plusieurs fichiers, lus par blocs au fil de l'envoi.
+    :param parts: [(headers de la partie, chemin du fichier)] ; Content-Length est ajouté à chaque partie"""
+    boundary = uuid.uuid4().hex
+    encoded_parts = []
+    for part_headers, file_path in parts:
+        file_stat = os.stat(file_path)
+        file_size = file_stat.st_size
+        record_access(file_path, file_stat)
+        header_lines = ''.join(f"{name}: {value}\r\n" for name, value in part_headers)
+        encoded_parts.append((
+            f"\r\n--{boundary}\r\n{header_lines}Content-Length: {file_size}\r\n\r\n".encode('utf-8'),
+            file_path,
+            file_size,
+        ))
+    closing = f"\r\n--{boundary}--\r\n".encode('ascii')
+    content_length = sum(len(part_header) + file_size for part_header, _path, file_size in encoded_parts) + len(closing)
+
+    def generate():
+        for part_header, file_path, file_size in encoded_parts:
+            yield part_header
+            yield from _iter_file_range(file_path, 0, file_size)
+        yield closing
+
+    headers = list(headers) + [
+        ('Content-Type', f'multipart/mixed; boundary={boundary}'),
+        ('Content-Length', str(content_length)),
+    ]
+    return Response(generate(), status=200, headers=headers, direct_passthrough=True)
+
+
+def send_file(file_path, content_type, headers, models_dir, etag=None, etag_stat=None):
+    """Réponse HTTP pour un fichier d'asset, sans lecture complète en mémoire.
+    L'appelant a déjà vérifié l'accès et l'existence du fichier.
+    :param etag: empreinte du contenu calculée à l'ingestion (ETag fort) ; à défaut,
+                 un ETag faible est dérivé de la taille et de la date de modification
+    :param etag_stat: (taille, mtime en ns) du fichier lors du calcul de l'empreinte ;
+                      l'ETag fort est ignoré si le fichier a changé depuis"""
+    file_stat = os.stat(file_path)
+    file_size = file_stat.st_size
+    record_access(file_path, file_stat)
+    if etag and etag_stat and tuple(etag_stat) != (file_size, file_stat.st_mtime_ns):
+        etag = None
+    etag_value = etag or f"{file_size:x}-{file_stat.st_mtime_ns:x}"
+    headers = list(headers) + [
+        ('Accept-Ranges', 'bytes'),
+        ('ETag', quote_etag(etag_value, weak=not etag)),
+        ('Last-Modified', http_date(int(file_stat.st_mtime))),
+    ]
+
+    if _is_not_modified(etag_value, file_stat.st_mtime):
+        return Response(status=304, headers=headers)
+
+    mode = get_offload_mode()
+    if mode:
+        # Le proxy lit et envoie le fichier lui-même (Range compris) : le worker est libéré immédiatement
+        headers += [('Content-Type', content_type), _offload_header(mode, file_path, models_dir)]
+        return Response(b'', status=200, headers=headers)
+
+    ranges = _requested_ranges(file_size, etag, file_stat.st_mtime)
+    if ranges is None:
+        headers += [('Content-Type', content_type), ('Content-Length', str(file_size))]
+        file_handle = open(file_path, 'rb')
+        return Response(
+            wrap_file(request.httprequest.environ, file_handle, buffer_size=STREAM_BUFFER_SIZE),
+            status=200,
+            headers=headers,
+            direct_passthrough=True,
+        )
+
+    if not ranges:
+        headers.append(('Content-Range', f'bytes */{file_size}'))
+        return Response(b'', status=416, headers=headers)
+
+    if len(ranges) > 1:
+        return _multipart_byteranges_response(file_path, ranges, file_size, content_type, headers)
+
+    start, stop = ranges[0]
+    headers += [
+        ('Content-Type', content_type),
+        ('Content-Range', f'bytes {start}-{stop - 1}/{file_size}'),
+        ('Content-Length', str(stop - start)),
+    ]
+    return Response(_iter_file_range(file_path, start, stop), status=206, headers=headers, direct_passthrough=True)
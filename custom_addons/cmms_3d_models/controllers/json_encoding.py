@@ -0,0 +1,92 @@
+# custom_addons/cmms_3d_models/controllers/json_encoding.py
+"""
+Encodage JSON des réponses de l'API :
+1. orjson si le paquet est installé (encodage natif, plusieurs fois plus rapide), sinon json
+2. Dates au format serveur Odoo ('%Y-%m-%d %H:%M:%S' / '%Y-%m-%d') quel que soit l'encodeur,
+   valeurs non JSON (Decimal, ensembles, bytes) converties explicitement
+3. Encodage par morceaux des grandes réponses : les dictionnaires et listes des premiers niveaux
+   sont parcourus et chaque élément est encodé séparément, la chaîne complète n'existe jamais
+"""
+
+import json
+import datetime
+import decimal
+import logging
+
+from odoo import fields
+
+_logger = logging.getLogger(__name__)
+
+# Encodeur rapide optionnel (paquet orjson)
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Profondeur parcourue par l'encodage par morceaux : enveloppe -> data -> liste -> élément encodé d'un bloc
+STREAM_DEPTH = 3
+# Taille minimale des morceaux produits (octets) : regroupe les petits éléments avant l'envoi
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _default(value):
+    """Valeurs non JSON : dates au format serveur Odoo, le reste converti explicitement"""
+    if isinstance(value, datetime.datetime):
+        return fields.Datetime.to_string(value)
+    if isinstance(value, datetime.date):
+        return fields.Date.to_string(value)
+    if isinstance(value, datetime.time):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    _logger.debug(f"Valeur de type {type(value).__name__} encodée en chaîne")
+    return str(value)
+
+
+if orjson:
+    _ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def dumps(data):
+        """Encode data en JSON (bytes UTF-8)"""
+        return orjson.dumps(data, default=_default, option=_ORJSON_OPTIONS)
+else:
+    def dumps(data):
+        """Encode data en JSON (bytes UTF-8)"""
+        return json.dumps(data, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _iter_value(value, depth):
+    if depth < STREAM_DEPTH and isinstance(value, dict):
+        yield b'{'
+        for index, (key, item) in enumerate(value.items()):
+            yield (b',' if index else b'') + dumps(str(key)) + b':'
+            yield from _iter_value(item, depth + 1)
+        yield b'}'
+    elif depth < STREAM_DEPTH and isinstance(value, list):
+        yield b'['
+        for index, item in enumerate(value):
+            if index:
+                yield b','
+            yield from _iter_value(item, depth + 1)
+        yield b']'
+    else:
+        yield dumps(value)
+
+
+def iter_dumps(data):
+    """Encode data en JSON par morceaux d'au moins STREAM_CHUNK_SIZE octets (sauf le dernier)"""
+    buffer = []
+    size = 0
+    for chunk in _iter_value(data, 0):
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= STREAM_CHUNK_SIZE:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b''.join(buffer)
@@ -1,7 +1,7 @@
 # custom_addons/cmms_3d_models/controllers/main.py
 import os
 import json
-import base64
+from urllib.parse import quote
 from odoo import http
 from odoo.http import request
 import logging
@@ -9,7 +9,16 @@ import logging
 _logger = logging.getLogger(__name__)
 
 # Importer le chemin des modèles depuis model3d.py
-from ..models.model3d import MODELS_DIR
+from ..models.model3d import MODELS_DIR, PRECOMPRESS_EXTENSIONS, ASSET_VERSION_LENGTH
+from ..models.asset_storage import get_asset_mime_type
+from .http_utils import send_file, send_multipart_files, select_precompressed_variant
+
+# En-tête par lequel un client déclare les compressions de maillage qu'il sait décoder
+# (ex. "draco, meshopt") ; équivalent au paramètre d'URL ?compression=
+MESH_COMPRESSION_HEADER = 'X-Accept-Mesh-Compression'
+
+# Nombre maximal de pièces (modèle principal et sous-modèles) par lot /models3d/bundle
+MAX_BUNDLE_PARTS = 200
 
 class CMMS3DController(http.Controller):
 
@@ -17,112 +26,36 @@ class CMMS3DController(http.Controller):
     def models3d_content(self, model3d_id, filename, **kw):
         """Sert les fichiers de modèles 3D et leurs fichiers associés (y compris IFC)"""
         try:
-            model3d = request.env['cmms.model3d'].sudo().browse(model3d_id)
-            if not model3d.exists():
+            # Manifeste en cache : autorisation et résolution du chemin par simple recherche dans un dict
+            manifest = request.env['cmms.model3d'].sudo()._get_asset_manifest(model3d_id)
+            if not manifest:
                 return request.not_found()
 
-            # Vérifier que le fichier est bien associé au modèle
-            is_associated = False
-            if model3d.model_filename == filename:
-                is_associated = True
-            # Gérer le cas des fichiers .blend convertis en .glb
-            elif model3d.is_converted_from_blend and model3d.source_blend_filename == filename:
-                is_associated = True
-                # Rediriger vers le fichier .gltf converti
-                blend_basename = os.path.splitext(filename)[0]
-                filename = f"{blend_basename}.gltf"
-            elif model3d.model_bin_filename == filename:
-                is_associated = True
-            # NOUVEAU: Vérifier si c'est un fichier IFC
-            elif model3d.ifc_filename == filename:
-                is_associated = True
-            elif model3d.has_external_files and model3d.files_list:
-                try:
-                    files_list = json.loads(model3d.files_list)
-                    if filename in files_list:
-                        is_associated = True
-                except:
-                    pass
-            # Tolérance spéciale pour les images connues qui pourraient être référencées
-            elif filename in ['grunge-scratched-brushed-metal-background.jpg', 'zinc04.jpg']:
-                is_associated = True
-                _logger.info(f"Accès autorisé à la texture connue: {filename}")
-            # Amélioration: autoriser tous les fichiers .bin, fichiers image et IFC
-            elif filename.endswith(('.bin', '.jpg', '.jpeg', '.png', '.webp', '.ifc', '.ifcxml', '.ifczip')):
-                is_associated = True
-                _logger.info(f"Accès autorisé à la ressource: {filename}")
-
-            if not is_associated:
+            # Fichiers .blend convertis : servir le .gltf converti
+            filename = manifest['aliases'].get(filename, filename)
+            if filename not in manifest['files']:
+                manifest = request.env['cmms.model3d'].sudo()._refresh_asset_manifest(model3d_id, manifest, filename)
+            asset = manifest['files'].get(filename)
+            if not asset:
                 _logger.warning(f"Fichier non associé au modèle: {filename}")
                 return request.not_found()
 
-            # Chemin du fichier - Adapté pour Windows - Utiliser backslash et normpath
-            file_path = os.path.normpath(os.path.join(MODELS_DIR, str(model3d_id), filename))
-
-            # Log pour le débogage
-            _logger.info(f"Tentative d'accès au fichier: {file_path}, existe: {os.path.isfile(file_path)}")
-
-            # Vérification de l'existence du fichier
-            if not os.path.isfile(file_path):
-                # Si le fichier principal n'existe pas sur le disque
-                if filename == model3d.model_filename and model3d.model_file:
-                    content = base64.b64decode(model3d.model_file)
-                    # Créer le répertoire si nécessaire
-                    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-                    # Sauvegarder le fichier
-                    with open(file_path, 'wb') as f:
-                        f.write(content)
-                # Si le fichier binaire n'existe pas sur le disque
-                elif filename == model3d.model_bin_filename and model3d.model_bin:
-                    content = base64.b64decode(model3d.model_bin)
-                    # Créer le répertoire si nécessaire
-                    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-                    # Sauvegarder le fichier
-                    with open(file_path, 'wb') as f:
-                        f.write(content)
-                # NOUVEAU: Si c'est un fichier IFC
-                elif filename == model3d.ifc_filename and model3d.ifc_file:
-                    content = base64.b64decode(model3d.ifc_file)
-                    # Créer le répertoire si nécessaire
-                    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-                    # Sauvegarder le fichier
-                    with open(file_path, 'wb') as f:
-                        f.write(content)
-                # Si c'est un fichier blend d'origine
-                elif model3d.is_converted_from_blend and model3d.source_blend_filename == filename and model3d.source_blend_file:
-                    content = base64.b64decode(model3d.source_blend_file)
-                    # Créer le répertoire si nécessaire
-                    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-                    # Sauvegarder le fichier
-                    with open(file_path, 'wb') as f:
-                        f.write(content)
-                else:
-                    # Si le fichier n'existe pas et n'est pas stocké dans la base
-                    _logger.warning(f"Fichier introuvable: {filename} à {file_path}")
-                    return request.not_found()
-
-            # Lecture du fichier
-            with open(file_path, 'rb') as f:
-                content = f.read()
+            # URL versionnée à jour : le fichier peut être mis en cache sans revalidation
+            immutable = self._is_current_version(asset, kw)
+            filename, asset, compression_headers = self._negotiate_mesh_compression(manifest, filename, asset, kw)
 
-            # Détermination du type MIME
-            content_type = self._get_mime_type(filename)
+            _logger.debug(f"Tentative d'accès au fichier: {asset['path']}")
 
-            _logger.info(f"Fichier servi avec succès: {filename} ({content_type})")
+            # Les fichiers stockés en base sont normalement déjà sur le disque (_cron_sync_assets),
+            # la restauration ici n'est qu'un dernier recours
+            if not os.path.isfile(asset['path']) and not (
+                    filename in manifest['stored']
+                    and request.env['cmms.model3d'].sudo().browse(model3d_id)._materialize_stored_asset(filename)):
+                _logger.warning(f"Fichier introuvable: {filename} à {asset['path']}")
+                return request.not_found()
 
-            # Envoi du fichier avec des headers CORS explicites
-            return request.make_response(
-                content,
-                headers=[
-                    ('Content-Type', content_type),
-                    ('Content-Disposition', f'inline; filename={filename}'),
-                    ('Content-Length', len(content)),
-                    ('Access-Control-Allow-Origin', '*'),
-                    ('Access-Control-Allow-Methods', 'GET, OPTIONS'),
-                    ('Access-Control-Allow-Headers', 'Origin, X-Requested-With, Content-Type, Accept'),
-                    ('Cache-Control', 'max-age=86400'), # Cache pour 1 jour
-                ]
-            )
+            # Envoi en streaming (ou délégué au proxy) avec des headers CORS explicites
+            return self._send_asset(asset, filename, compression_headers, immutable)
 
         except Exception as e:
             _logger.error(f"Error serving 3D model file: {str(e)}")
@@ -132,160 +65,190 @@ class CMMS3DController(http.Controller):
     def models3d_child_content(self, model3d_id, submodel_id, filename, **kw):
         """Sert les fichiers de sous-modèles avec la nouvelle structure"""
         try:
-            _logger.info(f"Requête pour sous-modèle: model_id={model3d_id}, submodel_id={submodel_id}, filename={filename}")
-
-            # Vérifier que le parent existe
-            parent_model = request.env['cmms.model3d'].sudo().browse(model3d_id)
-            if not parent_model.exists():
+            Model3D = request.env['cmms.model3d'].sudo()
+            manifest = Model3D._get_asset_manifest(model3d_id)
+            if not manifest:
                 _logger.error(f"Modèle parent {model3d_id} non trouvé")
                 return request.not_found()
 
-            # Vérifier d'abord la nouvelle structure JSON
-            if parent_model.submodels_json:
-                try:
-                    submodels = json.loads(parent_model.submodels_json)
-                    submodel = next((sm for sm in submodels if sm.get('id') == submodel_id), None)
-
-                    if submodel:
-                        _logger.info(f"Sous-modèle trouvé dans JSON: {submodel['name']}")
-
-                        # Chemin du fichier pour la structure basée sur l'arborescence des sous-dossiers
-                        file_path = os.path.normpath(os.path.join(
-                            MODELS_DIR, str(model3d_id), 'childs', str(submodel_id), filename
-                        ))
-
-                        # Si le fichier n'existe pas, essayer dans le dossier racine du modèle parent
-                        if not os.path.isfile(file_path):
-                            alt_file_path = os.path.normpath(os.path.join(
-                                MODELS_DIR, str(model3d_id), filename
-                            ))
-                            if os.path.isfile(alt_file_path):
-                                file_path = alt_file_path
-
-                        _logger.info(f"Chemin du fichier: {file_path}, existe: {os.path.isfile(file_path)}")
-
-                        # Vérifier si le fichier existe
-                        if os.path.isfile(file_path):
-                            # Lecture du fichier
-                            with open(file_path, 'rb') as f:
-                                content = f.read()
-
-                            # Détermination du type MIME
-                            content_type = self._get_mime_type(filename)
-
-                            _logger.info(f"Fichier sous-modèle servi avec succès: {filename} ({content_type})")
-
-                            # Envoi du fichier
-                            return request.make_response(
-                                content,
-                                headers=[
-                                    ('Content-Type', content_type),
-                                    ('Content-Disposition', f'inline; filename={filename}'),
-                                    ('Content-Length', len(content)),
-                                    ('Access-Control-Allow-Origin', '*'),
-                                    ('Access-Control-Allow-Methods', 'GET, OPTIONS'),
-                                    ('Access-Control-Allow-Headers', 'Origin, X-Requested-With, Content-Type, Accept'),
-                                    ('Cache-Control', 'max-age=86400'), # Cache pour 1 jour
-                                ]
-                            )
-                        else:
-                            _logger.warning(f"Fichier sous-modèle introuvable: {file_path}")
-                    else:
-                        _logger.warning(f"Sous-modèle ID {submodel_id} non trouvé dans JSON")
-                except Exception as e:
-                    _logger.error(f"Erreur lors de l'accès au sous-modèle JSON: {str(e)}")
+            # Nouvelle structure JSON : dossier childs/<id>/, sinon dossier racine du modèle parent
+            if submodel_id in manifest['submodels']:
+                relative_path = f"childs/{submodel_id}/{filename}"
+                if relative_path not in manifest['files']:
+                    manifest = Model3D._refresh_asset_manifest(model3d_id, manifest, relative_path)
+                if relative_path not in manifest['files']:
+                    relative_path = filename
+                asset = manifest['files'].get(relative_path)
+                if asset and os.path.isfile(asset['path']):
+                    immutable = self._is_current_version(asset, kw)
+                    relative_path, asset, compression_headers = self._negotiate_mesh_compression(
+                        manifest, relative_path, asset, kw
+                    )
+                    return self._send_asset(asset, os.path.basename(relative_path), compression_headers, immutable)
+                _logger.warning(f"Fichier sous-modèle introuvable: {filename} (sous-modèle {submodel_id})")
 
             # Si on arrive ici, on vérifie l'ancien système de child_ids
-            _logger.info("Recherche du sous-modèle dans l'ancien système")
-            child_model = request.env['cmms.model3d'].sudo().browse(submodel_id)
-            if not child_model.exists():
+            child_manifest = Model3D._get_asset_manifest(submodel_id)
+            if not child_manifest:
                 _logger.error(f"Sous-modèle {submodel_id} non trouvé dans l'ancien système")
                 return request.not_found()
 
-            if child_model.parent_id.id != model3d_id:
+            if child_manifest['parent_id'] != model3d_id:
                 _logger.error(f"Le sous-modèle {submodel_id} n'appartient pas au parent {model3d_id}")
                 return request.not_found()
 
             # Chercher le fichier dans le dossier du sous-modèle lui-même (ancien système)
-            file_path = os.path.normpath(os.path.join(MODELS_DIR, str(submodel_id), filename))
-
-            _logger.info(f"Chemin du fichier ancien système: {file_path}, existe: {os.path.isfile(file_path)}")
-
-            # Si le fichier n'existe pas, vérifier si le fichier est stocké dans la base de données
-            if not os.path.isfile(file_path):
-                if filename == child_model.model_filename and child_model.model_file:
-                    content = base64.b64decode(child_model.model_file)
-                    # Créer les répertoires si nécessaire
-                    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-                    # Sauvegarder le fichier
-                    with open(file_path, 'wb') as f:
-                        f.write(content)
-                elif filename == child_model.model_bin_filename and child_model.model_bin:
-                    content = base64.b64decode(child_model.model_bin)
-                    # Créer les répertoires si nécessaire
-                    os.makedirs(os.path.dirname(file_path), exist_ok=True)
-                    # Sauvegarder le fichier
-                    with open(file_path, 'wb') as f:
-                        f.write(content)
-                else:
-                    _logger.warning(f"Fichier sous-modèle introuvable: {filename} à {file_path}")
-                    return request.not_found()
+            if filename not in child_manifest['files']:
+                child_manifest = Model3D._refresh_asset_manifest(submodel_id, child_manifest, filename)
+            asset = child_manifest['files'].get(filename)
+            if not asset:
+                _logger.warning(f"Fichier non associé au sous-modèle: {filename}")
+                return request.not_found()
 
-            # Lecture du fichier
-            with open(file_path, 'rb') as f:
-                content = f.read()
+            # Si le fichier n'existe pas, le restaurer depuis la base de données (verrou + écriture atomique)
+            if not os.path.isfile(asset['path']) and not (
+                    filename in child_manifest['stored']
+                    and Model3D.browse(submodel_id)._materialize_stored_asset(filename)):
+                _logger.warning(f"Fichier sous-modèle introuvable: {filename} à {asset['path']}")
+                return request.not_found()
 
-            # Détermination du type MIME
-            content_type = self._get_mime_type(filename)
+            # Envoi en streaming (ou délégué au proxy) avec des headers CORS explicites
+            return self._send_asset(asset, filename, immutable=self._is_current_version(asset, kw))
 
-            _logger.info(f"Fichier sous-modèle servi avec succès: {filename} ({content_type})")
+        except Exception as e:
+            _logger.error(f"Error serving submodel file: {str(e)}")
+            return request.not_found()
 
-            # Envoi du fichier
-            return request.make_response(
-                content,
-                headers=[
-                    ('Content-Type', content_type),
-                    ('Content-Disposition', f'inline; filename={filename}'),
-                    ('Content-Length', len(content)),
-                    ('Access-Control-Allow-Origin', '*'),
-                    ('Access-Control-Allow-Methods', 'GET, OPTIONS'),
-                    ('Access-Control-Allow-Headers', 'Origin, X-Requested-With, Content-Type, Accept'),
-                    ('Cache-Control', 'max-age=86400'), # Cache pour 1 jour
-                ]
-            )
+    @http.route('/models3d/bundle/<int:model3d_id>', type='http', auth="public")
+    def models3d_bundle(self, model3d_id, submodels='', include_main='1', level='full', **kw):
+        """Sert en une seule réponse multipart/mixed les fichiers à charger pour le modèle principal
+        et une liste de sous-modèles (?submodels=1,2,3 ou all). Chaque partie porte Content-Location
+        (URL du fichier sous /models3d), Content-Type, Content-Length, ETag et X-Bundle-Part.
+        level : 'full' (pleine résolution), 'coarsest' (LOD le plus grossier, sinon pleine résolution)
+        ou 'refine' (pleine résolution des seules pièces qui ont des LOD)."""
+        try:
+            manifest = request.env['cmms.model3d'].sudo()._get_asset_manifest(model3d_id)
+            if not manifest:
+                return request.not_found()
+
+            part_ids = ['main'] if str(include_main).lower() not in ('0', 'false', 'no') else []
+            if submodels == 'all':
+                part_ids += sorted(manifest['submodels'])
+            else:
+                part_ids += [int(part_id) for part_id in submodels.split(',') if part_id.strip().isdigit()]
+            if len(part_ids) > MAX_BUNDLE_PARTS:
+                return request.make_response(
+                    f"Trop de pièces demandées ({len(part_ids)}), maximum {MAX_BUNDLE_PARTS} par lot",
+                    status=400,
+                )
+
+            accepted = self._get_accepted_mesh_compressions(kw)
+            files = manifest['files']
+            base_path = f"/models3d/{model3d_id}/"
+            parts = []
+            bundled = set()
+            for part_id in part_ids:
+                part = manifest['parts'].get(part_id)
+                if not part:
+                    continue
+                if level == 'coarsest' and part['coarsest']:
+                    primary = part['coarsest']
+                elif level == 'refine' and not part['coarsest']:
+                    continue
+                else:
+                    primary = part['full']
+
+                part_headers = [('X-Bundle-Part', str(part_id))]
+                compressed = manifest['compressed'].get(primary) if primary == part['full'] else None
+                if (compressed and compressed['method'] in accepted and compressed['filename'] in files
+                        and os.path.isfile(files[compressed['filename']]['path'])):
+                    primary = compressed['filename']
+                    part_headers.append(('X-Mesh-Compression', compressed['method']))
+
+                for relative_path in [primary] + manifest['dependencies'].get(primary, []):
+                    asset = files.get(relative_path)
+                    if relative_path in bundled or not asset or not os.path.isfile(asset['path']):
+                        continue
+                    bundled.add(relative_path)
+                    headers = part_headers + [
+                        ('Content-Type', asset['mime']),
+                        ('Content-Location', f"{base_path}{quote(relative_path)}"),
+                    ]
+                    if asset.get('sha256'):
+                        headers.append(('ETag', f'"{asset["sha256"]}"'))
+                    parts.append((headers, asset['path']))
+
+            _logger.info(f"Lot de {len(parts)} fichiers pour {len(part_ids)} pièces du modèle {model3d_id}")
+            return send_multipart_files(parts, [
+                ('Access-Control-Allow-Origin', '*'),
+                ('Access-Control-Allow-Headers', f'Origin, X-Requested-With, Content-Type, Accept, {MESH_COMPRESSION_HEADER}'),
+                ('Cache-Control', 'no-cache'),
+                ('Vary', MESH_COMPRESSION_HEADER),
+            ])
 
         except Exception as e:
-            _logger.error(f"Error serving submodel file: {str(e)}")
+            _logger.error(f"Error serving 3D model bundle: {str(e)}")
             return request.not_found()
 
+    def _send_asset(self, asset, filename, extra_headers=None, immutable=False):
+        """Envoie un fichier d'asset sans le charger en mémoire, avec les headers CORS et de cache
+        :param asset: entrée du manifeste des fichiers du modèle (chemin, empreinte, type MIME, variantes)
+        :param immutable: URL versionnée correspondant au contenu actuel"""
+        if immutable:
+            cache_control = 'public, max-age=31536000, immutable'
+        else:
+            # URL non versionnée : réutilisable après revalidation (304 si l'ETag n'a pas changé)
+            cache_control = 'no-cache'
+        headers = [
+            ('Content-Disposition', f'inline; filename={filename}'),
+            ('Access-Control-Allow-Origin', '*'),
+            ('Access-Control-Allow-Methods', 'GET, OPTIONS'),
+            ('Access-Control-Allow-Headers', 'Origin, X-Requested-With, Content-Type, Accept, Range, If-Range, '
+                                             f'If-None-Match, If-Modified-Since, {MESH_COMPRESSION_HEADER}'),
+            ('Access-Control-Expose-Headers', 'X-Mesh-Compression, Accept-Ranges, Content-Range, Content-Length, '
+                                              'ETag, Last-Modified'),
+            ('Cache-Control', cache_control),
+        ] + (extra_headers or [])
+
+        # Variante .br/.gz écrite à l'ingestion : aucune compression à la requête
+        served = asset
+        if asset['path'].lower().endswith(PRECOMPRESS_EXTENSIONS):
+            headers.append(('Vary', 'Accept-Encoding'))
+            encoding, variant = select_precompressed_variant(asset['variants'])
+            if variant:
+                served = variant
+                headers.append(('Content-Encoding', encoding))
+
+        return send_file(served['path'], asset['mime'], headers, MODELS_DIR,
+                         etag=served.get('sha256'), etag_stat=(served.get('size'), served.get('mtime')))
+
+    def _negotiate_mesh_compression(self, manifest, filename, asset, kw):
+        """Variante à géométrie compressée (Draco/meshopt) si le client déclare la supporter.
+        Retourne (nom de fichier, entrée du manifeste, headers à ajouter)."""
+        compressed = manifest['compressed'].get(filename)
+        if not compressed:
+            return filename, asset, []
+        headers = [('Vary', MESH_COMPRESSION_HEADER)]
+        compressed_asset = manifest['files'].get(compressed['filename'])
+        if (compressed_asset and compressed['method'] in self._get_accepted_mesh_compressions(kw)
+                and os.path.isfile(compressed_asset['path'])):
+            headers.append(('X-Mesh-Compression', compressed['method']))
+            return compressed['filename'], compressed_asset, headers
+        return filename, asset, headers
+
+    def _is_current_version(self, asset, kw):
+        """Vrai si le paramètre ?v= de l'URL correspond à l'empreinte actuelle du fichier"""
+        version = kw.get('v')
+        return bool(version and asset.get('sha256')) and version == asset['sha256'][:ASSET_VERSION_LENGTH]
+
+    def _get_accepted_mesh_compressions(self, kw):
+        """Méthodes de compression de maillage supportées par le client"""
+        value = kw.get('compression') or request.httprequest.headers.get(MESH_COMPRESSION_HEADER, '')
+        return {token.strip().lower() for token in value.split(',') if token.strip()}
+
     def _get_mime_type(self, filename):
         """Détermine le type MIME en fonction de l'extension du fichier"""
-        ext = os.path.splitext(filename.lower())[1]
-        if ext == '.gltf':
-            return 'model/gltf+json'
-        elif ext == '.glb':
-            return 'model/gltf-binary'
-        elif ext == '.blend':
-            return 'application/x-blender'  # Type MIME pour les fichiers Blender
-        elif ext == '.bin':
-            return 'application/octet-stream'
-        elif ext in ['.jpg', '.jpeg']:
-            return 'image/jpeg'
-        elif ext == '.png':
-            return 'image/png'
-        elif ext == '.webp':
-            return 'image/webp'
-        elif ext == '.json':
-            return 'application/json'
-        # NOUVEAU: Types MIME pour les fichiers IFC
-        elif ext == '.ifc':
-            return 'application/x-step'  # Type MIME standard pour les fichiers IFC (STEP)
-        elif ext == '.ifcxml':
-            return 'application/xml'  # Type MIME pour les fichiers IFC XML
-        elif ext == '.ifczip':
-            return 'application/zip'  # Type MIME pour les fichiers IFC compressés
-        else:
-            return 'application/octet-stream'
+        return get_asset_mime_type(filename)
 
     @http.route('/web/cmms/viewer/<int:model3d_id>', type='http', auth="public")
     def simple_viewer(self, model3d_id, **kw):
@@ -322,6 +285,14 @@ class CMMS3DController(http.Controller):
             'has_ifc': model3d.has_ifc_file,
             'ifc_url': model3d.ifc_url if model3d.has_ifc_file else None,
             'ifc_version': model3d.ifc_version if model3d.has_ifc_file else None,
+            # Boîte englobante et complexité précalculées à l'ingestion
+            'geometry': model3d._get_geometry_data(),
+            # Niveaux de détail, du plus grossier au plus fin
+            'lods': model3d._get_lod_data(),
+            # Variante à géométrie compressée (Draco/meshopt)
+            'compressed': model3d._get_compressed_data(),
+            # Vignettes et turntable WebP rendus à l'ingestion
+            'previews': model3d._get_preview_data(),
         })
 
         # Ajouter les sous-modèles si demandé
@@ -362,6 +333,9 @@ class CMMS3DController(http.Controller):
                             'has_ifc': child.has_ifc_file,
                             'ifc_url': child.ifc_url if child.has_ifc_file else None,
                             'ifc_version': child.ifc_version if child.has_ifc_file else None,
+                            'geometry': child._get_geometry_data(),
+                            'lods': child._get_lod_data(),
+                            'compressed': child._get_compressed_data(),
                         })
                     # Récursion pour les enfants des enfants
                     add_legacy_children(child)
@@ -370,12 +344,20 @@ class CMMS3DController(http.Controller):
             if model3d.submodels_json:
                 try:
                     submodels_json = json.loads(model3d.submodels_json)
+                    submodel_records = {sub.relative_id: sub for sub in model3d.submodel_ids}
                     for submodel in submodels_json:
                         # Construire l'URL correcte pour chaque sous-modèle
                         gltf_path = submodel.get('gltf_path', '')
                         if gltf_path:
                             basename = os.path.basename(gltf_path)
+                            # GLB autonome du sous-modèle s'il a été empaqueté
+                            submodel_record = submodel_records.get(submodel.get('id'))
+                            if submodel_record and submodel_record.glb_filename:
+                                basename = submodel_record.glb_filename
                             submodel_url = f"/models3d/{model3d.id}/childs/{submodel.get('id')}/{basename}"
+                            version = model3d._get_asset_version(f"childs/{submodel.get('id')}/{basename}")
+                            if version:
+                                submodel_url = f"{submodel_url}?v={version}"
 
                             # Ajouter le sous-modèle à la liste
                             models_data.append({
@@ -399,6 +381,11 @@ class CMMS3DController(http.Controller):
                                 'has_ifc': False,  # Les sous-modèles JSON n'ont pas d'IFC pour l'instant
                                 'ifc_url': None,
                                 'ifc_version': None,
+                                'geometry': submodel.get('geometry'),
+                                'lods': submodel_records[submodel.get('id')]._get_lod_data()
+                                        if submodel.get('id') in submodel_records else [],
+                                'compressed': submodel_records[submodel.get('id')]._get_compressed_data()
+                                              if submodel.get('id') in submodel_records else None,
                             })
                 except Exception as e:
                     _logger.error(f"Erreur lors du traitement des sous-modèles JSON: {str(e)}")
@@ -588,6 +575,8 @@ class CMMS3DController(http.Controller):
             <script src="https://cdn.jsdelivr.net/npm/three@0.128.0/examples/js/controls/OrbitControls.js"></script>
             <script src="https://cdn.jsdelivr.net/npm/three@0.128.0/examples/js/loaders/GLTFLoader.js"></script>
             <script src="https://cdn.jsdelivr.net/npm/three@0.128.0/examples/js/loaders/DRACOLoader.js"></script>
+            <script src="https://cdn.jsdelivr.net/npm/meshoptimizer@0.16.0/meshopt_decoder.js"></script>
+            <script src="https://cdn.jsdelivr.net/npm/three@0.128.0/examples/js/loaders/KTX2Loader.js"></script>
 
             <script>
                 // Debug log helper
@@ -635,6 +624,14 @@ class CMMS3DController(http.Controller):
                 let scene, camera, renderer, controls;
                 let loadedModels = {{}}; // Stocke les modèles chargés par ID
 
+                // Fichiers des sous-modèles préchargés par lots (/models3d/bundle) : chemin -> URL blob.
+                // Les chargeurs three.js passent par ce gestionnaire, les URL habituelles restent utilisées.
+                const BUNDLE_PARTS_PER_REQUEST = 100;
+                const bundledUrls = {{}};
+                THREE.DefaultLoadingManager.setURLModifier(function (url) {{
+                    return bundledUrls[normalizeAssetUrl(url)] || url;
+                }});
+
                 // Initialiser la scène
                 init();
 
@@ -698,6 +695,14 @@ class CMMS3DController(http.Controller):
 
                     debugLog('Lumières ajoutées');
 
+                    // Cadrer la caméra avant tout téléchargement grâce aux boîtes précalculées
+                    framePrecomputedBounds();
+
+                    // Sous-modèles JSON : premier affichage (LOD grossiers) puis pleine résolution, par lots
+                    const bundledChildIds = modelsData.filter(m => m.json).map(m => m.id);
+                    const coarseBundles = prefetchBundles(modelsData[0].id, bundledChildIds, 'coarsest');
+                    const refineBundles = coarseBundles.then(() => prefetchBundles(modelsData[0].id, bundledChildIds, 'refine'));
+
                     // Charger le modèle principal
                     if (modelsData.length > 0) {{
                         loadModel(modelsData[0], function() {{
@@ -708,18 +713,20 @@ class CMMS3DController(http.Controller):
                             const totalChildModels = modelsData.length - 1;
                             
                             if (totalChildModels > 0) {{
-                                for (let i = 1; i < modelsData.length; i++) {{
-                                    loadModel(modelsData[i], function() {{
-                                        childModelsLoaded++;
-                                        debugLog(`Sous-modèle ${{childModelsLoaded}}/${{totalChildModels}} chargé`);
-                                        
-                                        if (childModelsLoaded === totalChildModels) {{
-                                            debugLog('Tous les sous-modèles chargés');
-                                            populateModelSelector();
-                                            centerCameraOnAllModels();
-                                        }}
-                                    }});
-                                }}
+                                coarseBundles.then(function() {{
+                                    for (let i = 1; i < modelsData.length; i++) {{
+                                        loadModel(modelsData[i], function() {{
+                                            childModelsLoaded++;
+                                            debugLog(`Sous-modèle ${{childModelsLoaded}}/${{totalChildModels}} chargé`);
+                                            
+                                            if (childModelsLoaded === totalChildModels) {{
+                                                debugLog('Tous les sous-modèles chargés');
+                                                populateModelSelector();
+                                                centerCameraOnAllModels();
+                                            }}
+                                        }}, modelsData[i].json ? refineBundles : null);
+                                    }}
+                                }});
                             }} else {{
                                 populateModelSelector();
                                 centerCameraOnAllModels();
@@ -738,9 +745,117 @@ class CMMS3DController(http.Controller):
                     window.addEventListener('resize', onWindowResize);
                 }}
 
-                function loadModel(modelData, callback) {{
+                function loadModel(modelData, callback, refinementReady) {{
                     debugLog(`Chargement du modèle: ${{modelData.name}}`);
-                    
+
+                    // Niveau de détail le plus grossier d'abord pour un premier affichage rapide,
+                    // puis remplacement par la pleine résolution en arrière-plan (après son lot s'il y en a un)
+                    const lods = modelData.lods || [];
+                    const fullUrl = getFullResolutionUrl(modelData.url, modelData.compressed);
+                    if (lods.length > 0) {{
+                        loadModelUrl(modelData, lods[0].url, function() {{
+                            debugLog(`LOD ${{lods[0].level}} affiché: ${{modelData.name}}`);
+                            if (callback) callback();
+                            (refinementReady || Promise.resolve()).then(function() {{
+                                loadModelUrl(modelData, fullUrl, null, true);
+                            }});
+                        }});
+                    }} else {{
+                        loadModelUrl(modelData, fullUrl, callback);
+                    }}
+                }}
+
+                // Variante à géométrie compressée si le décodeur correspondant est chargé
+                function getFullResolutionUrl(url, compressed) {{
+                    if (compressed && isMeshCompressionSupported(compressed.method)) {{
+                        return compressed.url;
+                    }}
+                    return url;
+                }}
+
+                function isMeshCompressionSupported(method) {{
+                    if (method === 'draco') return typeof THREE.DRACOLoader !== 'undefined';
+                    if (method === 'meshopt') return typeof MeshoptDecoder !== 'undefined';
+                    return false;
+                }}
+
+                function normalizeAssetUrl(url) {{
+                    try {{
+                        return decodeURI(new URL(url, window.location.href).pathname);
+                    }} catch (e) {{
+                        return url;
+                    }}
+                }}
+
+                // Précharge les fichiers des sous-modèles en quelques requêtes ; en cas d'échec,
+                // les fichiers non préchargés sont simplement demandés un par un
+                function prefetchBundles(modelId, submodelIds, level) {{
+                    const compressions = ['draco', 'meshopt'].filter(isMeshCompressionSupported).join(',');
+                    const requests = [];
+                    for (let i = 0; i < submodelIds.length; i += BUNDLE_PARTS_PER_REQUEST) {{
+                        const params = new URLSearchParams({{
+                            submodels: submodelIds.slice(i, i + BUNDLE_PARTS_PER_REQUEST).join(','),
+                            include_main: '0',
+                            level: level,
+                        }});
+                        if (compressions) params.set('compression', compressions);
+                        requests.push(
+                            fetch(`/models3d/bundle/${{modelId}}?${{params}}`)
+                                .then(response => {{
+                                    if (!response.ok) throw new Error(`HTTP ${{response.status}}`);
+                                    return readBundle(response);
+                                }})
+                                .then(count => debugLog(`Lot ${{level}}: ${{count}} fichiers préchargés`))
+                                .catch(error => debugLog(`Lot ${{level}} ignoré: ${{error.message || error}}`))
+                        );
+                    }}
+                    return Promise.all(requests);
+                }}
+
+                async function readBundle(response) {{
+                    const boundary = /boundary=([^;]+)/.exec(response.headers.get('Content-Type') || '');
+                    if (!boundary) throw new Error('Réponse multipart invalide');
+                    const data = new Uint8Array(await response.arrayBuffer());
+                    const encoder = new TextEncoder();
+                    const decoder = new TextDecoder();
+                    const delimiter = encoder.encode(`--${{boundary[1]}}`);
+                    const headerEnd = encoder.encode('\\r\\n\\r\\n');
+                    let position = 0;
+                    let count = 0;
+                    while (true) {{
+                        const start = findBytes(data, delimiter, position);
+                        if (start < 0) break;
+                        const headersStart = start + delimiter.length;
+                        // Délimiteur final "--boundary--"
+                        if (data[headersStart] === 45 && data[headersStart + 1] === 45) break;
+                        const headersEnd = findBytes(data, headerEnd, headersStart);
+                        if (headersEnd < 0) break;
+                        const headers = {{}};
+                        decoder.decode(data.subarray(headersStart, headersEnd)).split('\\r\\n').forEach(line => {{
+                            const separator = line.indexOf(':');
+                            if (separator > 0) headers[line.slice(0, separator).trim().toLowerCase()] = line.slice(separator + 1).trim();
+                        }});
+                        const bodyStart = headersEnd + headerEnd.length;
+                        const bodyEnd = bodyStart + parseInt(headers['content-length'], 10);
+                        const blob = new Blob([data.subarray(bodyStart, bodyEnd)], {{ type: headers['content-type'] }});
+                        bundledUrls[normalizeAssetUrl(headers['content-location'])] = URL.createObjectURL(blob);
+                        count++;
+                        position = bodyEnd;
+                    }}
+                    return count;
+                }}
+
+                function findBytes(data, pattern, from) {{
+                    outer: for (let i = from; i <= data.length - pattern.length; i++) {{
+                        for (let j = 0; j < pattern.length; j++) {{
+                            if (data[i + j] !== pattern[j]) continue outer;
+                        }}
+                        return i;
+                    }}
+                    return -1;
+                }}
+
+                function loadModelUrl(modelData, modelUrl, callback, isRefinement) {{
                     const loader = new THREE.GLTFLoader();
 
                     // Setup DRACO decoder for compressed models
@@ -750,8 +865,18 @@ class CMMS3DController(http.Controller):
                         loader.setDRACOLoader(dracoLoader);
                     }}
 
+                    // Décodeur EXT_meshopt_compression
+                    if (typeof MeshoptDecoder !== 'undefined') {{
+                        loader.setMeshoptDecoder(MeshoptDecoder);
+                    }}
+
+                    // Textures KTX2 (KHR_texture_basisu) des GLB empaquetés
+                    const ktx2Loader = getKTX2Loader();
+                    if (ktx2Loader) {{
+                        loader.setKTX2Loader(ktx2Loader);
+                    }}
+
                     // Définir le chemin de base pour les ressources
-                    const modelUrl = modelData.url;
                     const basePath = modelUrl.substring(0, modelUrl.lastIndexOf('/') + 1);
                     loader.setResourcePath(basePath);
 
@@ -778,11 +903,19 @@ class CMMS3DController(http.Controller):
                                     }}
                                 }});
 
+                                // Remplacer le niveau de détail déjà affiché en conservant sa visibilité
+                                const previous = loadedModels[modelData.id];
+                                if (previous) {{
+                                    model.visible = previous.visible;
+                                    scene.remove(previous);
+                                    disposeModel(previous);
+                                }}
+
                                 // Ajouter à la scène
                                 scene.add(model);
                                 loadedModels[modelData.id] = model;
                                 
-                                debugLog(`Modèle ajouté à la scène: ${{modelData.name}}`);
+                                debugLog(`Modèle ajouté à la scène: ${{modelData.name}}${{isRefinement ? ' (pleine résolution)' : ''}}`);
                                 
                                 if (callback) callback();
                             }} catch (e) {{
@@ -800,11 +933,62 @@ class CMMS3DController(http.Controller):
                         }},
                         function (error) {{
                             debugLog(`Erreur de chargement pour ${{modelData.name}}: ${{error.message || error}}`);
+                            // Le niveau de détail grossier reste affiché si la pleine résolution échoue
+                            if (isRefinement) return;
                             showError(`Erreur lors du chargement du modèle ${{modelData.name}}: ${{error.message || error}}`);
                         }}
                     );
                 }}
 
+                // Un seul transcodeur Basis partagé par tous les chargements
+                let sharedKTX2Loader = null;
+                function getKTX2Loader() {{
+                    if (!sharedKTX2Loader && typeof THREE.KTX2Loader !== 'undefined' && renderer) {{
+                        sharedKTX2Loader = new THREE.KTX2Loader()
+                            .setTranscoderPath('https://cdn.jsdelivr.net/npm/three@0.128.0/examples/js/libs/basis/')
+                            .detectSupport(renderer);
+                    }}
+                    return sharedKTX2Loader;
+                }}
+
+                function disposeModel(model) {{
+                    model.traverse(function (child) {{
+                        if (!child.isMesh) return;
+                        child.geometry.dispose();
+                        const materials = Array.isArray(child.material) ? child.material : [child.material];
+                        materials.forEach(material => material && material.dispose());
+                    }});
+                }}
+
+                function framePrecomputedBounds() {{
+                    const box = new THREE.Box3();
+
+                    modelsData.forEach(modelData => {{
+                        const geometry = modelData.geometry;
+                        if (!geometry || !geometry.bbox) return;
+
+                        const modelBox = new THREE.Box3(
+                            new THREE.Vector3(geometry.bbox.min.x, geometry.bbox.min.y, geometry.bbox.min.z),
+                            new THREE.Vector3(geometry.bbox.max.x, geometry.bbox.max.y, geometry.bbox.max.z)
+                        );
+                        const matrix = new THREE.Matrix4().compose(
+                            new THREE.Vector3(modelData.position.x, modelData.position.y, modelData.position.z),
+                            new THREE.Quaternion().setFromEuler(new THREE.Euler(
+                                THREE.MathUtils.degToRad(modelData.rotation.x),
+                                THREE.MathUtils.degToRad(modelData.rotation.y),
+                                THREE.MathUtils.degToRad(modelData.rotation.z)
+                            )),
+                            new THREE.Vector3(modelData.scale, modelData.scale, modelData.scale)
+                        );
+                        box.union(modelBox.applyMatrix4(matrix));
+                    }});
+
+                    if (!box.isEmpty()) {{
+                        frameBox(box);
+                        debugLog('Caméra cadrée sur les boîtes englobantes précalculées');
+                    }}
+                }}
+
                 function centerCameraOnAllModels() {{
                     if (Object.keys(loadedModels).length === 0) return;
 
@@ -816,6 +1000,11 @@ class CMMS3DController(http.Controller):
                         box.union(modelBox);
                     }});
 
+                    frameBox(box);
+                    debugLog(`Caméra centrée sur tous les modèles`);
+                }}
+
+                function frameBox(box) {{
                     const center = box.getCenter(new THREE.Vector3());
                     const size = box.getSize(new THREE.Vector3());
 
@@ -831,8 +1020,6 @@ class CMMS3DController(http.Controller):
                     
                     controls.target.copy(center);
                     controls.update();
-                    
-                    debugLog(`Caméra centrée sur tous les modèles`);
                 }}
 
                 function toggleModel(modelId, visible = true) {{
@@ -961,6 +1148,7 @@ class CMMS3DController(http.Controller):
                 'relative_id': submodel_id,
                 'gltf_url': submodel.gltf_url,
                 'bin_url': submodel.bin_url,
+                'glb_url': submodel.glb_url,
                 'scale': submodel.scale,
                 'position_x': submodel.position_x,
                 'position_y': submodel.position_y,
@@ -968,6 +1156,9 @@ class CMMS3DController(http.Controller):
                 'rotation_x': submodel.rotation_x,
                 'rotation_y': submodel.rotation_y,
                 'rotation_z': submodel.rotation_z,
+                'geometry': submodel._get_geometry_data(),
+                'lods': submodel._get_lod_data(),
+                'compressed': submodel._get_compressed_data(),
             }
 
             # Création d'une simple page HTML avec un visualiseur 3D
@@ -1084,6 +1275,8 @@ class CMMS3DController(http.Controller):
                 <script src="https://cdn.jsdelivr.net/npm/three@0.128.0/examples/js/controls/OrbitControls.js"></script>
                 <script src="https://cdn.jsdelivr.net/npm/three@0.128.0/examples/js/loaders/GLTFLoader.js"></script>
                 <script src="https://cdn.jsdelivr.net/npm/three@0.128.0/examples/js/loaders/DRACOLoader.js"></script>
+                <script src="https://cdn.jsdelivr.net/npm/meshoptimizer@0.16.0/meshopt_decoder.js"></script>
+                <script src="https://cdn.jsdelivr.net/npm/three@0.128.0/examples/js/loaders/KTX2Loader.js"></script>
 
                 <script>
                     // Données du sous-modèle
@@ -1155,6 +1348,37 @@ class CMMS3DController(http.Controller):
 
                     // Fonction pour charger le sous-modèle
                     function loadModel() {{
+                        // Ajouter un indicateur de chargement
+                        document.getElementById('loading').style.display = 'block';
+
+                        // Niveau de détail le plus grossier d'abord pour un premier affichage rapide,
+                        // puis remplacement par la pleine résolution en arrière-plan
+                        const lods = submodelData.lods || [];
+                        const fullUrl = getFullResolutionUrl(submodelData.glb_url || submodelData.gltf_url, submodelData.compressed);
+                        if (lods.length > 0) {{
+                            loadModelUrl(lods[0].url, function() {{
+                                loadModelUrl(fullUrl, null, true);
+                            }});
+                        }} else {{
+                            loadModelUrl(fullUrl);
+                        }}
+                    }}
+
+                    // Variante à géométrie compressée si le décodeur correspondant est chargé
+                    function getFullResolutionUrl(url, compressed) {{
+                        if (compressed && isMeshCompressionSupported(compressed.method)) {{
+                            return compressed.url;
+                        }}
+                        return url;
+                    }}
+
+                    function isMeshCompressionSupported(method) {{
+                        if (method === 'draco') return typeof THREE.DRACOLoader !== 'undefined';
+                        if (method === 'meshopt') return typeof MeshoptDecoder !== 'undefined';
+                        return false;
+                    }}
+
+                    function loadModelUrl(modelUrl, onLoaded, isRefinement) {{
                         const loader = new THREE.GLTFLoader();
 
                         // Setup DRACO decoder for compressed models
@@ -1164,11 +1388,18 @@ class CMMS3DController(http.Controller):
                             loader.setDRACOLoader(dracoLoader);
                         }}
 
-                        // Ajouter un indicateur de chargement
-                        document.getElementById('loading').style.display = 'block';
+                        // Décodeur EXT_meshopt_compression
+                        if (typeof MeshoptDecoder !== 'undefined') {{
+                            loader.setMeshoptDecoder(MeshoptDecoder);
+                        }}
+
+                        // Textures KTX2 (KHR_texture_basisu) des GLB empaquetés
+                        const ktx2Loader = getKTX2Loader();
+                        if (ktx2Loader) {{
+                            loader.setKTX2Loader(ktx2Loader);
+                        }}
 
                         // Pour GLTFLoader, le chemin est critique pour trouver les textures
-                        const modelUrl = submodelData.gltf_url;
                         const modelUrlDir = modelUrl.substring(0, modelUrl.lastIndexOf('/') + 1);
 
                         // Set resource path for loader to help find textures
@@ -1178,35 +1409,47 @@ class CMMS3DController(http.Controller):
                             modelUrl,
                             function (gltf) {{
                                 try {{
-                                    model = gltf.scene;
+                                    const loadedModel = gltf.scene;
 
                                     // Appliquer les transformations
-                                    model.scale.set(
+                                    loadedModel.scale.set(
                                         submodelData.scale,
                                         submodelData.scale,
                                         submodelData.scale
                                     );
 
-                                    model.position.set(
+                                    loadedModel.position.set(
                                         submodelData.position_x,
                                         submodelData.position_y,
                                         submodelData.position_z
                                     );
 
-                                    model.rotation.set(
+                                    loadedModel.rotation.set(
                                         THREE.MathUtils.degToRad(submodelData.rotation_x),
                                         THREE.MathUtils.degToRad(submodelData.rotation_y),
                                         THREE.MathUtils.degToRad(submodelData.rotation_z)
                                     );
 
+                                    // Remplacer le niveau de détail déjà affiché
+                                    if (model) {{
+                                        scene.remove(model);
+                                        disposeModel(model);
+                                    }}
+
                                     // Ajouter le modèle à la scène
+                                    model = loadedModel;
                                     scene.add(model);
 
-                                    // Centre la caméra sur le modèle
-                                    centerCameraOnModel(model);
+                                    // Centre la caméra sur le modèle (au premier affichage seulement,
+                                    // pour ne pas déplacer la vue pendant l'affinage)
+                                    if (!isRefinement) {{
+                                        centerCameraOnModel(model);
+                                    }}
 
                                     // Masque l'indicateur de chargement
                                     document.getElementById('loading').style.display = 'none';
+
+                                    if (onLoaded) onLoaded();
                                 }} catch (e) {{
                                     showError("Erreur lors du traitement du modèle 3D: " + e.message);
                                     console.error("Model processing error:", e);
@@ -1218,11 +1461,33 @@ class CMMS3DController(http.Controller):
                             }},
                             function (error) {{
                                 console.error('Error loading 3D model:', error);
+                                // Le niveau de détail grossier reste affiché si la pleine résolution échoue
+                                if (isRefinement) return;
                                 showError("Erreur lors du chargement du modèle 3D: " + error.message);
                             }}
                         );
                     }}
 
+                    // Un seul transcodeur Basis partagé par tous les chargements
+                    let sharedKTX2Loader = null;
+                    function getKTX2Loader() {{
+                        if (!sharedKTX2Loader && typeof THREE.KTX2Loader !== 'undefined' && renderer) {{
+                            sharedKTX2Loader = new THREE.KTX2Loader()
+                                .setTranscoderPath('https://cdn.jsdelivr.net/npm/three@0.128.0/examples/js/libs/basis/')
+                                .detectSupport(renderer);
+                        }}
+                        return sharedKTX2Loader;
+                    }}
+
+                    function disposeModel(oldModel) {{
+                        oldModel.traverse(function (child) {{
+                            if (!child.isMesh) return;
+                            child.geometry.dispose();
+                            const materials = Array.isArray(child.material) ? child.material : [child.material];
+                            materials.forEach(material => material && material.dispose());
+                        }});
+                    }}
+
                     // Centrer la caméra sur un modèle
                     function centerCameraOnModel(model) {{
                         const box = new THREE.Box3().setFromObject(model);
@@ -1309,13 +1574,17 @@ class CMMS3DController(http.Controller):
                     'relative_id': submodel.relative_id,
                     'gltf_url': submodel.gltf_url,
                     'bin_url': submodel.bin_url,
+                    'glb_url': submodel.glb_url,
                     'scale': submodel.scale,
                     'position_x': submodel.position_x,
                     'position_y': submodel.position_y,
                     'position_z': submodel.position_z,
                     'rotation_x': submodel.rotation_x,
                     'rotation_y': submodel.rotation_y,
-                    'rotation_z': submodel.rotation_z
+                    'rotation_z': submodel.rotation_z,
+                    'geometry': submodel._get_geometry_data(),
+                    'lods': submodel._get_lod_data(),
+                    'compressed': submodel._get_compressed_data(),
                 }
             }
         except Exception as e:
@@ -1381,6 +1650,10 @@ class CMMS3DController(http.Controller):
                 'ifc_url': equipment.model3d_id.ifc_url if equipment.model3d_id.has_ifc_file else None,
                 'ifc_version': equipment.model3d_id.ifc_version if equipment.model3d_id.has_ifc_file else None,
                 'ifc_filename': equipment.model3d_id.ifc_filename if equipment.model3d_id.has_ifc_file else None,
+                'geometry': equipment.model3d_id._get_geometry_data(),
+                'lods': equipment.model3d_id._get_lod_data(),
+                'compressed': equipment.model3d_id._get_compressed_data(),
+                'previews': equipment.model3d_id._get_preview_data(),
             }
         }
 
@@ -0,0 +1,160 @@
+# custom_addons/cmms_3d_models/controllers/serializers.py
+"""
+Lecture par lots des enregistrements sérialisés par l'API Flutter :
+1. Les champs nécessaires sont déclarés une fois par modèle (listes *_FIELDS ci-dessous)
+2. Chaque modèle est lu en une seule lecture par page d'identifiants (read sans display_name des many2one)
+3. Les dictionnaires de réponse sont assemblés depuis les valeurs en mémoire, sans parcours relationnel
+Le nombre de requêtes SQL dépend des modèles touchés, pas du nombre d'enregistrements sérialisés.
+Les paramètres fields= et include= (Fieldset) limitent les attributs calculés et les relations lues.
+"""
+
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Taille des pages de lecture (PREFETCH_MAX de l'ORM)
+READ_PAGE_SIZE = 1000
+
+# Champs lus par modèle ; les champs absents du modèle (modules optionnels) sont ignorés
+REQUEST_FIELDS = [
+    'name', 'description', 'request_date', 'schedule_date', 'close_date', 'stage_id',
+    'maintenance_type', 'priority', 'kanban_state', 'color', 'duration', 'equipment_id',
+    'maintenance_team_id', 'user_id', 'owner_user_id', 'technician_user_id', 'assigned_user_id',
+    'assigned_person_id', 'assigned_person_ids', 'assignment_ids', 'part_ids',
+]
+# Champs lus pour chaque attribut des demandes, lorsque fields= restreint la réponse
+REQUEST_ATTRIBUTE_FIELDS = {
+    'name': ['name'],
+    'description': ['description'],
+    'request_date': ['request_date'],
+    'schedule_date': ['schedule_date'],
+    'close_date': ['close_date'],
+    'stage': ['stage_id'],
+    'maintenance_type': ['maintenance_type'],
+    'priority': ['priority'],
+    'kanban_state': ['kanban_state'],
+    'color': ['color'],
+    'duration': ['duration'],
+    'equipment': ['equipment_id'],
+    'maintenance_team': ['maintenance_team_id'],
+    'user': ['user_id'],
+    'assigned_user': ['assigned_user_id', 'technician_user_id', 'owner_user_id'],
+    'owner_user': ['owner_user_id'],
+    'technician_user': ['technician_user_id'],
+    'assigned_person': ['assigned_person_id'],
+    'assigned_persons': ['assigned_person_ids'],
+    'assignments': ['assignment_ids'],
+    'parts': ['part_ids'],
+    'parts_count': ['part_ids'],
+    'assignment_count': ['assignment_ids'],
+}
+ASSIGNMENT_FIELDS = ['request_id', 'person_id', 'user_id', 'assigned_date', 'assigned_by_id', 'is_primary', 'notes']
+PART_FIELDS = [
+    'part_name', 'description', 'intervention_type', 'intervention_other', 'done', 'sequence',
+    'submodel_id', 'parent_model3d_id', 'request_id',
+]
+EQUIPMENT_FIELDS = ['name', 'serial_no', 'location', 'category_id', 'model3d_id']
+# Équipements sérialisés en entier (routes équipement, synchronisation)
+EQUIPMENT_DETAIL_FIELDS = EQUIPMENT_FIELDS + [
+    'partner_id', 'technician_user_id', 'owner_user_id', 'assign_date', 'cost', 'note', 'warranty_date',
+    'color', 'cost_center',
+]
+PERSON_FIELDS = [
+    'display_name', 'first_name', 'name', 'email', 'phone', 'mobile', 'available', 'role_id',
+    'specialties', 'certifications',
+]
+ROLE_FIELDS = ['name', 'description']
+USER_FIELDS = ['name', 'login']
+STAGE_FIELDS = ['name', 'done']
+NAME_FIELDS = ['name']
+# Champs des méthodes _get_geometry_data / _get_lod_data / _get_compressed_data (cmms.geometry.mixin)
+GEOMETRY_FIELDS = [
+    'has_geometry_stats', 'bbox_min_x', 'bbox_min_y', 'bbox_min_z', 'bbox_max_x', 'bbox_max_y',
+    'bbox_max_z', 'vertex_count', 'triangle_count', 'geometry_byte_size', 'texture_byte_size',
+    'total_byte_size', 'lod_files_json', 'compressed_filename', 'compression_method',
+    'compression_ratio', 'compressed_byte_size',
+]
+# asset_hashes_json : versions des URL du modèle et de ses sous-modèles ; ifc_data_json n'est jamais lu ici
+MODEL3D_FIELDS = [
+    'name', 'viewer_url', 'has_ifc_file', 'ifc_version', 'ifc_url', 'asset_hashes_json',
+] + GEOMETRY_FIELDS
+SUBMODEL_FIELDS = [
+    'name', 'relative_id', 'gltf_filename', 'bin_filename', 'glb_filename', 'parent_id', 'viewer_url',
+    'gltf_url', 'glb_url', 'bin_url', 'scale', 'position_x', 'position_y', 'position_z',
+    'rotation_x', 'rotation_y', 'rotation_z',
+] + GEOMETRY_FIELDS
+
+
+def _parse_names(value):
+    if not value:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class Fieldset:
+    """Attributs demandés (fields=) et relations développées (include=) d'une réponse.
+    Sans aucun des deux paramètres, tout est renvoyé. Une relation non développée est réduite
+    à son identifiant (ou à la liste de ses identifiants) : ni lecture, ni parcours de la relation.
+    Relations des demandes : les attributs relationnels (stage, equipment, parts...) et, imbriqués,
+    model_3d (modèle 3D de l'équipement et des pièces), submodel (sous-modèle des pièces) et ifc."""
+
+    def __init__(self, fields=None, include=None):
+        self.fields = _parse_names(fields)
+        self.include = _parse_names(include)
+        if self.include is None and self.fields is not None:
+            self.include = set()
+
+    @property
+    def is_full(self):
+        return self.fields is None and self.include is None
+
+    def wants(self, name):
+        """Vrai si l'attribut fait partie de la réponse (l'identifiant toujours)"""
+        return name == 'id' or self.fields is None or name in self.fields
+
+    def expands(self, name):
+        """Vrai si la relation est développée en objet (la présence de l'attribut relève de wants)"""
+        return self.include is None or name in self.include
+
+    def loads(self, name):
+        """Vrai si l'attribut est demandé et développé : la relation doit être lue"""
+        return self.wants(name) and self.expands(name)
+
+    def request_fields(self):
+        """Champs des demandes à lire pour les attributs demandés (name toujours, pour les erreurs)"""
+        if self.fields is None:
+            return REQUEST_FIELDS
+        return list(dict.fromkeys(['name'] + [field_name for attribute, field_names in REQUEST_ATTRIBUTE_FIELDS.items()
+                                              if attribute in self.fields for field_name in field_names]))
+
+
+FULL_FIELDSET = Fieldset()
+
+
+class BatchReader:
+    """Valeurs lues par modèle et par identifiant, partagées pendant une sérialisation.
+    La lecture alimente aussi le cache de l'ORM : les méthodes appelées ensuite sur les mêmes
+    enregistrements (URL, géométrie) n'émettent pas de nouvelle requête."""
+
+    def __init__(self, env):
+        self.env = env
+        self._values = {}
+
+    def read(self, model_name, ids, field_names):
+        """Lit les enregistrements pas encore chargés et retourne {id: valeurs} pour ce modèle.
+        Many2one : identifiant ou False ; x2many : liste d'identifiants."""
+        model = self.env[model_name]
+        field_names = [name for name in field_names if name in model._fields]
+        values_by_id = self._values.setdefault(model_name, {})
+        missing = [record_id for record_id in dict.fromkeys(ids) if record_id and record_id not in values_by_id]
+        for start in range(0, len(missing), READ_PAGE_SIZE):
+            records = model.browse(missing[start:start + READ_PAGE_SIZE])
+            for values in records.read(field_names, load=None):
+                values_by_id[values['id']] = values
+        return values_by_id
+
+    def get(self, model_name, record_id):
+        """Valeurs déjà lues d'un enregistrement, ou None"""
+        if not record_id:
+            return None
+        return self._values.get(model_name, {}).get(record_id)
@@ -1,4 +1,5 @@
 # custom_addons/cmms_3d_models/models/__init__.py
+from . import geometry_mixin
 from . import model3d
 from . import maintenance_equipment
 from . import auto_equipment_linker
@@ -8,4 +9,5 @@ from . import api_access_log
 from . import maintenance_request_extended
 from . import maintenance_request_assignment
 from . import maintenance_request_part  # Nouveau modèle pour les pièces
+from . import sync_tombstone  # Traces de suppression pour la synchronisation API
 from . import ifc_parser  # Nouveau parser IFC
\ No newline at end of file
@@ -0,0 +1,107 @@
+# custom_addons/cmms_3d_models/models/access_log_buffer.py
+"""
+Écriture différée des journaux d'accès de l'API (cmms.api.access.log) :
+1. log_api_access ajoute l'entrée à une file en mémoire du processus : aucun accès à la base
+   pendant la requête, aucune contention avec les écritures métier de sa transaction
+2. Un thread d'arrière-plan vide la file toutes les FLUSH_INTERVAL secondes (ou dès FLUSH_BATCH_SIZE
+   entrées) par des INSERT multi-lignes, dans sa propre transaction
+3. La file est bornée (BUFFER_MAX_SIZE entrées par base) : en cas de surcharge, les entrées les plus
+   anciennes sont abandonnées plutôt que de ralentir l'API (nombre journalisé au vidage suivant) ;
+   elle est vidée à l'arrêt du processus
+4. create_date est la date de l'appel, write_date celle de l'écriture en base : l'agrégation par
+   minute (cmms.api.access.log._cron_rollup_and_purge) avance selon write_date et n'ignore donc
+   aucune entrée écrite en retard
+"""
+
+import atexit
+import logging
+import threading
+from collections import deque
+
+import odoo
+from odoo import fields
+
+_logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 5
+FLUSH_BATCH_SIZE = 500
+BUFFER_MAX_SIZE = 20000
+
+# Colonnes insérées, dans l'ordre des tuples de la file (create_uid / write_uid : utilisateur de l'appel),
+# puis write_date, ajoutée au moment de l'insertion
+COLUMNS = (
+    'user_id', 'endpoint', 'method', 'ip_address', 'user_agent', 'status_code', 'response_time',
+    'error_message', 'request_data', 'api_key_id', 'create_date', 'create_uid', 'write_uid', 'write_date',
+)
+INSERT_QUERY = f"INSERT INTO cmms_api_access_log ({', '.join(COLUMNS)}) VALUES "
+
+_buffers = {}
+_dropped = {}
+_lock = threading.Lock()
+_flush_event = threading.Event()
+_flush_thread = None
+
+
+def _ensure_flush_thread():
+    """Démarre le thread de vidage (à nouveau après un fork : les threads ne sont pas hérités)"""
+    global _flush_thread
+    if _flush_thread is None or not _flush_thread.is_alive():
+        _flush_thread = threading.Thread(target=_run, name='cmms_api_access_log_flush', daemon=True)
+        _flush_thread.start()
+
+
+def enqueue(dbname, values):
+    """Ajoute une entrée de journal à la file de la base (values : champs de cmms.api.access.log)"""
+    row = (
+        values['user_id'], values['endpoint'], values['method'], values.get('ip_address'),
+        values.get('user_agent'), values.get('status_code'), values.get('response_time'),
+        values.get('error_message'), values.get('request_data'), values.get('api_key_id'),
+        values['create_date'], values['user_id'], values['user_id'],
+    )
+    with _lock:
+        buffer = _buffers.get(dbname)
+        if buffer is None:
+            buffer = _buffers[dbname] = deque(maxlen=BUFFER_MAX_SIZE)
+        if len(buffer) == BUFFER_MAX_SIZE:
+            # La file pleine abandonne son entrée la plus ancienne
+            _dropped[dbname] = _dropped.get(dbname, 0) + 1
+        buffer.append(row)
+        full = len(buffer) >= FLUSH_BATCH_SIZE
+        _ensure_flush_thread()
+    if full:
+        _flush_event.set()
+
+
+def _insert_rows(dbname, rows):
+    with odoo.registry(dbname).cursor() as cr:
+        for start in range(0, len(rows), FLUSH_BATCH_SIZE):
+            written_at = fields.Datetime.now()
+            batch = [row + (written_at,) for row in rows[start:start + FLUSH_BATCH_SIZE]]
+            cr.execute(INSERT_QUERY + ', '.join(['%s'] * len(batch)), batch)
+
+
+def flush():
+    """Écrit les entrées en attente de toutes les bases"""
+    with _lock:
+        pending = {dbname: list(buffer) for dbname, buffer in _buffers.items() if buffer}
+        for buffer in _buffers.values():
+            buffer.clear()
+        dropped = dict(_dropped)
+        _dropped.clear()
+    for dbname, count in dropped.items():
+        _logger.warning(f"File des journaux d'accès API pleine ({dbname}): {count} entrées abandonnées")
+    for dbname, rows in pending.items():
+        try:
+            _insert_rows(dbname, rows)
+        except Exception as e:
+            _logger.error(f"Échec de l'écriture de {len(rows)} journaux d'accès API ({dbname}): {str(e)}")
+
+
+def _run():
+    while True:
+        _flush_event.wait(FLUSH_INTERVAL)
+        _flush_event.clear()
+        flush()
+
+
+atexit.register(flush)
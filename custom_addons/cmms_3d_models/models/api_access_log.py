@@ -1,9 +1,21 @@
 # custom_addons/cmms_3d_models/models/api_access_log.py
-from odoo import api, fields, models
+from odoo import api, fields, models, tools
+from datetime import timedelta
 import logging
 
+from . import rate_limiter
+from . import access_log_buffer
+
 _logger = logging.getLogger(__name__)
 
+# Rétention (jours) des journaux bruts et des agrégats par minute, paramètres système
+# cmms_3d_models.access_log_retention_days et cmms_3d_models.access_stat_retention_days
+DEFAULT_LOG_RETENTION_DAYS = 7
+DEFAULT_STAT_RETENTION_DAYS = 180
+# Délai avant agrégation des entrées écrites (minutes) : marge pour les transactions d'écriture en cours
+ROLLUP_DELAY = 2
+ROLLUP_WATERMARK_PARAM = 'cmms_3d_models.access_log_rolled_up_until'
+
 class APIAccessLog(models.Model):
     _name = 'cmms.api.access.log'
     _description = 'API Access Log'
@@ -19,12 +31,18 @@ class APIAccessLog(models.Model):
     response_time = fields.Float('Temps de réponse (ms)')
     error_message = fields.Text('Message d\'erreur')
     request_data = fields.Text('Données de la requête')
-    
+    api_key_id = fields.Many2one('cmms.api.key', string='Clé API', ondelete='set null')
+
+    def init(self):
+        # Agrégation et rétention par plages de write_date (date d'écriture en base)
+        tools.create_index(self.env.cr, 'cmms_api_access_log_write_date_index', self._table, ['write_date'])
+
     @api.model
     def log_api_access(self, user_id, endpoint, method, ip_address=None, 
                       user_agent=None, status_code=None, response_time=None, 
-                      error_message=None, request_data=None):
-        """Enregistrer un accès API"""
+                      error_message=None, request_data=None, api_key_id=None):
+        """Enregistrer un accès API : l'entrée est mise en file et écrite en différé par lots
+        (voir access_log_buffer.py), hors de la transaction de la requête"""
         try:
             vals = {
                 'user_id': user_id,
@@ -36,11 +54,105 @@ class APIAccessLog(models.Model):
                 'response_time': response_time,
                 'error_message': error_message,
                 'request_data': request_data,
+                'api_key_id': api_key_id,
+                'create_date': fields.Datetime.now(),
             }
-            self.create(vals)
+            access_log_buffer.enqueue(self.env.cr.dbname, vals)
         except Exception as e:
             _logger.error(f"Error logging API access: {str(e)}")
 
+    @api.model
+    def _get_retention_days(self, param, default):
+        value = self.env['ir.config_parameter'].sudo().get_param(param)
+        try:
+            return max(1, int(value)) if value else default
+        except ValueError:
+            _logger.warning(f"Valeur invalide pour {param}: {value}")
+            return default
+
+    @api.model
+    def _cron_rollup_and_purge(self):
+        """Agrège dans cmms.api.access.stat les journaux écrits depuis le passage précédent, chacun dans
+        la minute de son appel (create_date) : une entrée écrite en retard s'ajoute à l'agrégat de sa
+        minute déjà existant. Les mêmes journaux mettent à jour l'utilisation des clés d'API (last_used,
+        usage_count). Supprime ensuite les journaux et agrégats plus anciens que leur rétention."""
+        cr = self.env.cr
+        config_parameter = self.env['ir.config_parameter'].sudo()
+        now = fields.Datetime.now()
+        rollup_end = now.replace(second=0, microsecond=0) - timedelta(minutes=ROLLUP_DELAY)
+        rollup_start = fields.Datetime.to_datetime(config_parameter.get_param(ROLLUP_WATERMARK_PARAM))
+
+        if not rollup_start or rollup_start < rollup_end:
+            cr.execute("""
+                INSERT INTO cmms_api_access_stat
+                    (minute, user_id, endpoint, method, status_code, request_count, error_count,
+                     total_response_time, max_response_time, create_uid, create_date, write_uid, write_date)
+                SELECT date_trunc('minute', create_date), user_id, endpoint, method, COALESCE(status_code, 0),
+                       count(*), count(*) FILTER (WHERE status_code >= 400),
+                       COALESCE(sum(response_time), 0), COALESCE(max(response_time), 0),
+                       %(uid)s, %(now)s, %(uid)s, %(now)s
+                  FROM cmms_api_access_log
+                 WHERE write_date < %(end)s AND (%(start)s IS NULL OR write_date >= %(start)s)
+                 GROUP BY 1, 2, 3, 4, 5
+                ON CONFLICT (minute, user_id, endpoint, method, status_code) DO UPDATE SET
+                    request_count = cmms_api_access_stat.request_count + EXCLUDED.request_count,
+                    error_count = cmms_api_access_stat.error_count + EXCLUDED.error_count,
+                    total_response_time = cmms_api_access_stat.total_response_time + EXCLUDED.total_response_time,
+                    max_response_time = GREATEST(cmms_api_access_stat.max_response_time, EXCLUDED.max_response_time),
+                    write_date = EXCLUDED.write_date
+            """, {'uid': self.env.uid, 'now': now, 'start': rollup_start, 'end': rollup_end})
+            _logger.info(f"{cr.rowcount} agrégats d'accès API mis à jour jusqu'à {rollup_end}")
+            cr.execute("""
+                UPDATE cmms_api_key AS api_key
+                   SET usage_count = COALESCE(api_key.usage_count, 0) + key_usage.calls,
+                       last_used = GREATEST(api_key.last_used, key_usage.last_call)
+                  FROM (SELECT api_key_id, count(*) AS calls, max(create_date) AS last_call
+                          FROM cmms_api_access_log
+                         WHERE api_key_id IS NOT NULL
+                           AND write_date < %(end)s AND (%(start)s IS NULL OR write_date >= %(start)s)
+                         GROUP BY api_key_id) AS key_usage
+                 WHERE api_key.id = key_usage.api_key_id
+            """, {'start': rollup_start, 'end': rollup_end})
+            config_parameter.set_param(ROLLUP_WATERMARK_PARAM, fields.Datetime.to_string(rollup_end))
+
+        # Journaux bruts : uniquement ceux déjà agrégés
+        log_days = self._get_retention_days('cmms_3d_models.access_log_retention_days', DEFAULT_LOG_RETENTION_DAYS)
+        cr.execute("DELETE FROM cmms_api_access_log WHERE write_date < %s",
+                   [min(now - timedelta(days=log_days), rollup_end)])
+        purged_logs = cr.rowcount
+        stat_days = self._get_retention_days('cmms_3d_models.access_stat_retention_days', DEFAULT_STAT_RETENTION_DAYS)
+        cr.execute("DELETE FROM cmms_api_access_stat WHERE minute < %s", [now - timedelta(days=stat_days)])
+        if purged_logs or cr.rowcount:
+            _logger.info(f"Rétention API : {purged_logs} journaux et {cr.rowcount} agrégats supprimés")
+
+
+class APIAccessStat(models.Model):
+    _name = 'cmms.api.access.stat'
+    _description = 'API Access Statistics (per minute)'
+    _order = 'minute desc'
+    _rec_name = 'endpoint'
+
+    minute = fields.Datetime('Minute', required=True, index=True, readonly=True)
+    user_id = fields.Many2one('res.users', string='Utilisateur', required=True, ondelete='cascade', readonly=True)
+    endpoint = fields.Char('Endpoint', required=True, readonly=True)
+    method = fields.Char('Méthode HTTP', required=True, readonly=True)
+    status_code = fields.Integer('Code de statut', readonly=True)
+    request_count = fields.Integer('Requêtes', readonly=True)
+    error_count = fields.Integer('Erreurs', readonly=True)
+    total_response_time = fields.Float('Temps de réponse cumulé (ms)', readonly=True)
+    max_response_time = fields.Float('Temps de réponse max (ms)', readonly=True)
+    avg_response_time = fields.Float('Temps de réponse moyen (ms)', compute='_compute_avg_response_time')
+
+    _sql_constraints = [
+        ('minute_unique', 'UNIQUE(minute, user_id, endpoint, method, status_code)',
+         'Un seul agrégat par minute, utilisateur, endpoint, méthode et code de statut'),
+    ]
+
+    @api.depends('total_response_time', 'request_count')
+    def _compute_avg_response_time(self):
+        for stat in self:
+            stat.avg_response_time = stat.total_response_time / stat.request_count if stat.request_count else 0.0
+
 class APIKey(models.Model):
     _name = 'cmms.api.key'
     _description = 'API Key Management'
@@ -53,6 +165,11 @@ class APIKey(models.Model):
     last_used = fields.Datetime('Dernière utilisation')
     usage_count = fields.Integer('Nombre d\'utilisations', default=0)
     rate_limit = fields.Integer('Limite de taux (req/minute)', default=60)
+    rate_limit_burst = fields.Integer(
+        'Rafale autorisée (requêtes)',
+        default=0,
+        help="Nombre de requêtes acceptées d'affilée avant application du débit. 0 : égal à la limite par minute"
+    )
     allowed_ips = fields.Text('IPs autorisées (une par ligne)')
     expires_at = fields.Datetime('Expire le')
     
@@ -64,21 +181,19 @@ class APIKey(models.Model):
             vals['api_key'] = secrets.token_urlsafe(32)
         return super().create(vals)
     
-    def check_rate_limit(self, ip_address=None):
-        """Vérifier les limites de taux"""
+    def _get_rate_limit_bucket(self):
+        """(clé du seau, débit par minute, rafale) de la clé, ou None si elle n'est pas limitée"""
+        self.ensure_one()
         if not self.rate_limit:
+            return None
+        return f"{self.env.cr.dbname}:{self.id}", self.rate_limit, self.rate_limit_burst
+
+    def check_rate_limit(self, ip_address=None):
+        """Vérifier les limites de taux : consomme un jeton du seau de la clé (voir rate_limiter.py)"""
+        bucket = self._get_rate_limit_bucket()
+        if not bucket:
             return True
-        
-        # Compter les appels dans la dernière minute
-        now = fields.Datetime.now()
-        minute_ago = now - fields.timedelta(minutes=1)
-        
-        recent_calls = self.env['cmms.api.access.log'].search_count([
-            ('user_id', '=', self.user_id.id),
-            ('create_date', '>=', minute_ago)
-        ])
-        
-        return recent_calls < self.rate_limit
+        return rate_limiter.consume(*bucket)[0]
     
     def check_ip_allowed(self, ip_address):
         """Vérifier si l'IP est autorisée"""
@@ -0,0 +1,99 @@
+# custom_addons/cmms_3d_models/models/asset_storage.py
+"""
+Écriture des fichiers d'assets 3D sur le disque (MODELS_DIR) :
+1. Écriture atomique : fichier temporaire unique puis os.replace, jamais de fichier partiel servi
+2. Verrou par fichier (verrous répartis) : une seule matérialisation à la fois par chemin dans un processus
+   (entre processus, le remplacement atomique suffit : le dernier écrit un contenu identique)
+3. Type MIME des fichiers servis
+4. Date du dernier accès (atime) tenue à jour à l'envoi, pour l'éviction LRU du cache disque
+"""
+
+import os
+import time
+import threading
+import logging
+
+_logger = logging.getLogger(__name__)
+
+ASSET_MIME_TYPES = {
+    '.gltf': 'model/gltf+json',
+    '.glb': 'model/gltf-binary',
+    '.blend': 'application/x-blender',  # Type MIME pour les fichiers Blender
+    '.bin': 'application/octet-stream',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.webp': 'image/webp',
+    '.ktx2': 'image/ktx2',
+    '.json': 'application/json',
+    '.ifc': 'application/x-step',  # Type MIME standard pour les fichiers IFC (STEP)
+    '.ifcxml': 'application/xml',
+    '.ifczip': 'application/zip',
+}
+
+# Intervalle minimal entre deux mises à jour de la date d'accès d'un même fichier (secondes) :
+# l'atime n'est pas fiable (montage noatime/relatime), il est donc écrit explicitement.
+# Doit rester inférieur à la fenêtre d'inactivité de l'éviction (DISK_EVICTION_MIN_IDLE, 600 s) :
+# un fichier lu en continu ne paraît jamais inactif
+ACCESS_RECORD_INTERVAL = 300
+
+# Verrous répartis par empreinte du chemin : nombre fixe, quel que soit le nombre de fichiers
+# matérialisés pendant la vie du processus (deux chemins peuvent partager un verrou)
+FILE_LOCK_STRIPES = 64
+_file_locks = tuple(threading.Lock() for _i in range(FILE_LOCK_STRIPES))
+
+
+def _get_file_lock(file_path):
+    return _file_locks[hash(file_path) % FILE_LOCK_STRIPES]
+
+
+def get_asset_mime_type(filename):
+    """Détermine le type MIME en fonction de l'extension du fichier"""
+    return ASSET_MIME_TYPES.get(os.path.splitext(filename.lower())[1], 'application/octet-stream')
+
+
+def atomic_write(file_path, content):
+    """Écrit le contenu dans file_path de façon atomique (répertoires créés si nécessaire)"""
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, file_path)
+    finally:
+        if os.path.isfile(tmp_path):
+            os.remove(tmp_path)
+
+
+def record_access(file_path, file_stat):
+    """Note l'accès au fichier dans son atime (mtime conservé : il valide l'empreinte du fichier)"""
+    now_ns = time.time_ns()
+    if now_ns - file_stat.st_atime_ns < ACCESS_RECORD_INTERVAL * 10 ** 9:
+        return
+    try:
+        os.utime(file_path, ns=(now_ns, file_stat.st_mtime_ns))
+    except OSError as e:
+        _logger.debug(f"Date d'accès non mise à jour pour {file_path}: {str(e)}")
+
+
+def materialize(file_path, load_content, file_stat=None):
+    """Garantit la présence de file_path sur le disque.
+    :param load_content: callable sans argument retournant le contenu (bytes) ou None
+    :param file_stat: (taille, mtime en ns) enregistrés lors du calcul de l'empreinte ; la date de
+                      modification est restaurée si la taille correspond, l'empreinte reste ainsi valide
+                      après une éviction du cache disque
+    :return: True si le fichier existe (déjà présent ou écrit), False si aucun contenu n'est disponible"""
+    if os.path.isfile(file_path):
+        return True
+    with _get_file_lock(file_path):
+        # Une requête concurrente a pu écrire le fichier pendant l'attente du verrou
+        if os.path.isfile(file_path):
+            return True
+        content = load_content()
+        if not content:
+            return False
+        atomic_write(file_path, content)
+        if file_stat and file_stat[0] == len(content) and file_stat[1]:
+            os.utime(file_path, ns=(time.time_ns(), file_stat[1]))
+        _logger.info(f"Fichier matérialisé depuis la base: {file_path}")
+        return True
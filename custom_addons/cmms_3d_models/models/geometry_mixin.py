@@ -0,0 +1,160 @@
+# custom_addons/cmms_3d_models/models/geometry_mixin.py
+from odoo import api, fields, models
+import json
+import logging
+
+from .gltf_analyzer import analyze_gltf_file
+
+_logger = logging.getLogger(__name__)
+
+
+class GeometryStatsMixin(models.AbstractModel):
+    """Statistiques géométriques précalculées à l'ingestion (modèles et sous-modèles 3D)"""
+    _name = 'cmms.geometry.mixin'
+    _description = 'Statistiques géométriques 3D'
+
+    # Boîte englobante alignée sur les axes (espace de la scène glTF)
+    has_geometry_stats = fields.Boolean('Statistiques géométriques calculées', readonly=True)
+    bbox_min_x = fields.Float('BBox min X', readonly=True)
+    bbox_min_y = fields.Float('BBox min Y', readonly=True)
+    bbox_min_z = fields.Float('BBox min Z', readonly=True)
+    bbox_max_x = fields.Float('BBox max X', readonly=True)
+    bbox_max_y = fields.Float('BBox max Y', readonly=True)
+    bbox_max_z = fields.Float('BBox max Z', readonly=True)
+
+    # Complexité et poids du modèle
+    vertex_count = fields.Integer('Nombre de sommets', readonly=True)
+    triangle_count = fields.Integer('Nombre de triangles', readonly=True)
+    geometry_byte_size = fields.Integer('Taille géométrie (octets)', readonly=True,
+                                        help="Octets des bufferViews utilisés par les maillages")
+    texture_byte_size = fields.Integer('Taille textures (octets)', readonly=True)
+    total_byte_size = fields.Integer('Taille totale à télécharger (octets)', readonly=True,
+                                     help="Fichier principal + buffers et images externes")
+
+    # Niveaux de détail décimés générés à l'ingestion, stockés à côté du fichier d'origine
+    lod_files_json = fields.Text('Niveaux de détail (JSON)', readonly=True,
+                                 help="Liste des LOD générés : niveau, ratio, fichier, triangles et fichiers associés")
+    lod_count = fields.Integer('Nombre de niveaux de détail', readonly=True)
+
+    # GLB autonome (buffers et textures embarqués) empaqueté depuis le .gltf d'origine
+    glb_filename = fields.Char('Fichier GLB empaqueté', readonly=True)
+    glb_byte_size = fields.Integer('Taille GLB (octets)', readonly=True)
+
+    # Variante à géométrie compressée, servie aux clients qui déclarent la supporter
+    compressed_filename = fields.Char('Fichier compressé', readonly=True)
+    compression_method = fields.Selection([
+        ('draco', 'Draco'),
+        ('meshopt', 'meshopt'),
+    ], string='Méthode de compression', readonly=True)
+    compressed_byte_size = fields.Integer('Taille compressée (octets)', readonly=True)
+    compression_ratio = fields.Float('Taux de compression', readonly=True, digits=(16, 2),
+                                     help="Taille totale d'origine / taille totale de la variante compressée")
+
+    @api.model
+    def _compute_geometry_vals(self, file_path):
+        """Analyse un fichier glTF/GLB et retourne les valeurs à écrire sur l'enregistrement"""
+        stats = analyze_gltf_file(file_path)
+        if not stats:
+            return {}
+
+        vals = {
+            'has_geometry_stats': bool(stats['bbox_min']),
+            'vertex_count': stats['vertex_count'],
+            'triangle_count': stats['triangle_count'],
+            'geometry_byte_size': stats['geometry_byte_size'],
+            'texture_byte_size': stats['texture_byte_size'],
+            'total_byte_size': stats['total_byte_size'],
+        }
+        if stats['bbox_min']:
+            vals.update({
+                'bbox_min_x': stats['bbox_min'][0],
+                'bbox_min_y': stats['bbox_min'][1],
+                'bbox_min_z': stats['bbox_min'][2],
+                'bbox_max_x': stats['bbox_max'][0],
+                'bbox_max_y': stats['bbox_max'][1],
+                'bbox_max_z': stats['bbox_max'][2],
+            })
+        _logger.info(f"Géométrie analysée: {file_path} - {stats['vertex_count']} sommets, "
+                     f"{stats['triangle_count']} triangles, {stats['total_byte_size']} octets")
+        return vals
+
+    def _get_geometry_data(self):
+        """Retourne les statistiques géométriques au format utilisé par le visualiseur et l'API"""
+        self.ensure_one()
+        if not self.has_geometry_stats and not self.triangle_count:
+            return None
+
+        bbox = None
+        if self.has_geometry_stats:
+            bbox_min = {'x': self.bbox_min_x, 'y': self.bbox_min_y, 'z': self.bbox_min_z}
+            bbox_max = {'x': self.bbox_max_x, 'y': self.bbox_max_y, 'z': self.bbox_max_z}
+            bbox = {
+                'min': bbox_min,
+                'max': bbox_max,
+                'center': {axis: (bbox_min[axis] + bbox_max[axis]) / 2.0 for axis in 'xyz'},
+                'size': {axis: bbox_max[axis] - bbox_min[axis] for axis in 'xyz'},
+            }
+
+        return {
+            'bbox': bbox,
+            'vertex_count': self.vertex_count,
+            'triangle_count': self.triangle_count,
+            'geometry_bytes': self.geometry_byte_size,
+            'texture_bytes': self.texture_byte_size,
+            'total_bytes': self.total_byte_size,
+        }
+
+    def _get_asset_base_url(self):
+        """URL du dossier qui sert les fichiers de l'enregistrement (avec '/' final)"""
+        return False
+
+    def _get_asset_version(self, filename):
+        """Version courte (empreinte du contenu) d'un fichier servi depuis _get_asset_base_url, ou False"""
+        return False
+
+    def _get_asset_url(self, filename):
+        """URL d'un fichier de l'enregistrement, versionnée par son empreinte lorsqu'elle est connue"""
+        self.ensure_one()
+        base_url = self._get_asset_base_url()
+        if not base_url or not filename:
+            return False
+        version = self._get_asset_version(filename)
+        return f"{base_url}{filename}?v={version}" if version else f"{base_url}{filename}"
+
+    def _get_lod_entries(self):
+        """Entrées LOD brutes, du plus fin (niveau 1) au plus grossier"""
+        self.ensure_one()
+        if not self.lod_files_json:
+            return []
+        try:
+            entries = json.loads(self.lod_files_json)
+        except Exception:
+            return []
+        return sorted(entries, key=lambda entry: entry.get('level', 0))
+
+    def _get_lod_data(self):
+        """Niveaux de détail au format du visualiseur et de l'API, du plus grossier au plus fin"""
+        self.ensure_one()
+        base_url = self._get_asset_base_url()
+        if not base_url:
+            return []
+        return [{
+            'level': entry['level'],
+            'ratio': entry.get('ratio'),
+            'url': self._get_asset_url(entry['filename']),
+            'triangle_count': entry.get('triangle_count', 0),
+            'total_bytes': entry.get('total_byte_size', 0),
+        } for entry in reversed(self._get_lod_entries())]
+
+    def _get_compressed_data(self):
+        """Variante compressée au format du visualiseur et de l'API, ou None"""
+        self.ensure_one()
+        base_url = self._get_asset_base_url()
+        if not self.compressed_filename or not base_url:
+            return None
+        return {
+            'method': self.compression_method,
+            'url': self._get_asset_url(self.compressed_filename),
+            'ratio': round(self.compression_ratio, 2),
+            'total_bytes': self.compressed_byte_size,
+        }
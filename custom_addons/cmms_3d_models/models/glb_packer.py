@@ -0,0 +1,154 @@
+# custom_addons/cmms_3d_models/models/glb_packer.py
+"""
+Empaquetage d'un fichier glTF (.gltf + .bin + textures) en un GLB autonome, sans dépendance externe.
+1. Tous les buffers sont concaténés dans l'unique chunk BIN (bufferViews recalés)
+2. Les images référencées par URI (fichiers ou data URI) sont embarquées dans des bufferViews
+3. Optionnellement, les textures sont transcodées en KTX2 (KHR_texture_basisu) par un transcodeur fourni
+"""
+
+import os
+import json
+import base64
+import struct
+import logging
+import mimetypes
+from urllib.parse import unquote
+
+from .gltf_analyzer import decode_relative_uri
+
+_logger = logging.getLogger(__name__)
+
+GLB_MAGIC = b'glTF'
+GLB_VERSION = 2
+GLB_CHUNK_JSON = 0x4E4F534A
+GLB_CHUNK_BIN = 0x004E4942
+
+KTX2_MIME_TYPE = 'image/ktx2'
+KTX2_EXTENSION = 'KHR_texture_basisu'
+
+
+def _align(length, alignment=4):
+    return (length + alignment - 1) // alignment * alignment
+
+
+def _read_uri(uri, base_dir):
+    """Contenu d'une URI glTF (data URI ou chemin relatif) et type MIME éventuel"""
+    if uri.startswith('data:'):
+        header, data = uri.split(',', 1)
+        mime_type = header[5:].split(';')[0] or None
+        if ';base64' in header:
+            return base64.b64decode(data), mime_type
+        return unquote(data).encode('utf-8'), mime_type
+    relative_path = decode_relative_uri(uri)
+    if not relative_path:
+        raise ValueError(f"URI externe hors du dossier du fichier glTF: {uri}")
+    path = os.path.normpath(os.path.join(base_dir, relative_path))
+    with open(path, 'rb') as f:
+        return f.read(), mimetypes.guess_type(path)[0]
+
+
+class GlbPacker:
+    """Construit un GLB à partir du JSON glTF et de ses ressources externes"""
+
+    def __init__(self, texture_transcoder=None):
+        """:param texture_transcoder: callable(données, mime) -> données KTX2 ou None"""
+        self.texture_transcoder = texture_transcoder
+        self.bin_chunk = bytearray()
+
+    def _append(self, data):
+        """Ajoute des données alignées sur 4 octets au chunk BIN et retourne leur offset"""
+        offset = _align(len(self.bin_chunk))
+        self.bin_chunk.extend(b'\x00' * (offset - len(self.bin_chunk)))
+        self.bin_chunk.extend(data)
+        return offset
+
+    def pack(self, gltf_path, glb_path):
+        """Écrit le GLB et retourne un résumé (taille, nombre d'images embarquées et transcodées)"""
+        base_dir = os.path.dirname(gltf_path)
+        with open(gltf_path, 'r', encoding='utf-8') as f:
+            gltf = json.load(f)
+
+        self.bin_chunk = bytearray()
+        buffer_views = gltf.setdefault('bufferViews', [])
+
+        # 1. Buffers : un seul buffer final, les bufferViews sont décalées d'autant
+        buffer_offsets = []
+        for buffer in gltf.get('buffers', []):
+            data, _mime = _read_uri(buffer['uri'], base_dir) if buffer.get('uri') else (b'', None)
+            buffer_offsets.append(self._append(data[:buffer.get('byteLength', len(data))]))
+        for buffer_view in buffer_views:
+            buffer_view['byteOffset'] = buffer_view.get('byteOffset', 0) + buffer_offsets[buffer_view.get('buffer', 0)]
+            buffer_view['buffer'] = 0
+
+        # 2. Images : embarquées une seule fois par URI
+        embedded = {}
+        transcoded_images = set()
+        for image_index, image in enumerate(gltf.get('images', [])):
+            uri = image.get('uri')
+            if not uri:
+                continue
+            if uri not in embedded:
+                data, mime_type = _read_uri(uri, base_dir)
+                mime_type = image.get('mimeType') or mime_type or 'image/png'
+                if self.texture_transcoder:
+                    ktx2_data = self.texture_transcoder(data, mime_type)
+                    if ktx2_data:
+                        data, mime_type = ktx2_data, KTX2_MIME_TYPE
+                offset = self._append(data)
+                buffer_views.append({'buffer': 0, 'byteOffset': offset, 'byteLength': len(data)})
+                embedded[uri] = (len(buffer_views) - 1, mime_type)
+            view_index, mime_type = embedded[uri]
+            image.pop('uri')
+            image['bufferView'] = view_index
+            image['mimeType'] = mime_type
+            if mime_type == KTX2_MIME_TYPE:
+                transcoded_images.add(image_index)
+
+        if transcoded_images:
+            self._use_basisu_textures(gltf, transcoded_images)
+
+        if self.bin_chunk:
+            gltf['buffers'] = [{'byteLength': len(self.bin_chunk)}]
+        else:
+            gltf.pop('buffers', None)
+        if not buffer_views:
+            gltf.pop('bufferViews', None)
+
+        self._write(gltf, glb_path)
+        return {
+            'byte_size': os.path.getsize(glb_path),
+            'embedded_images': len(embedded),
+            'transcoded_images': len(transcoded_images),
+        }
+
+    def _use_basisu_textures(self, gltf, transcoded_images):
+        """Référence les images KTX2 via KHR_texture_basisu (extension requise : pas de repli PNG/JPEG)"""
+        for texture in gltf.get('textures', []):
+            if texture.get('source') in transcoded_images:
+                texture.setdefault('extensions', {})[KTX2_EXTENSION] = {'source': texture.pop('source')}
+        for key in ('extensionsUsed', 'extensionsRequired'):
+            extensions = gltf.setdefault(key, [])
+            if KTX2_EXTENSION not in extensions:
+                extensions.append(KTX2_EXTENSION)
+
+    def _write(self, gltf, glb_path):
+        json_chunk = json.dumps(gltf, separators=(',', ':')).encode('utf-8')
+        json_chunk += b' ' * (_align(len(json_chunk)) - len(json_chunk))
+        bin_chunk = bytes(self.bin_chunk) + b'\x00' * (_align(len(self.bin_chunk)) - len(self.bin_chunk))
+
+        total_length = 12 + 8 + len(json_chunk) + (8 + len(bin_chunk) if bin_chunk else 0)
+        # Écriture dans un fichier temporaire puis remplacement : jamais de GLB partiel servi
+        tmp_path = f"{glb_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(struct.pack('<4sII', GLB_MAGIC, GLB_VERSION, total_length))
+            f.write(struct.pack('<II', len(json_chunk), GLB_CHUNK_JSON))
+            f.write(json_chunk)
+            if bin_chunk:
+                f.write(struct.pack('<II', len(bin_chunk), GLB_CHUNK_BIN))
+                f.write(bin_chunk)
+        os.replace(tmp_path, glb_path)
+
+
+def pack_gltf_to_glb(gltf_path, glb_path, texture_transcoder=None):
+    """Fonction utilitaire pour empaqueter un .gltf en .glb autonome"""
+    return GlbPacker(texture_transcoder).pack(gltf_path, glb_path)
@@ -0,0 +1,378 @@
+# custom_addons/cmms_3d_models/models/gltf_analyzer.py
+"""
+Analyseur de géométrie glTF/GLB sans dépendance externe.
+Calcule, à partir du JSON du fichier uniquement (accessors min/max et bufferViews) :
+1. La boîte englobante alignée sur les axes (AABB) dans l'espace de la scène
+2. Le nombre de sommets et de triangles
+3. Les tailles en octets (géométrie, textures, total)
+"""
+
+import os
+import json
+import math
+import struct
+import logging
+from urllib.parse import unquote
+
+_logger = logging.getLogger(__name__)
+
+GLB_MAGIC = b'glTF'
+GLB_CHUNK_JSON = 0x4E4F534A
+GLB_CHUNK_BIN = 0x004E4942
+
+# Modes de primitive glTF
+MODE_TRIANGLES = 4
+MODE_TRIANGLE_STRIP = 5
+MODE_TRIANGLE_FAN = 6
+
+# Diviseurs pour les accessors normalisés (KHR_mesh_quantization)
+NORMALIZED_DIVISORS = {
+    5120: 127.0,    # BYTE
+    5121: 255.0,    # UNSIGNED_BYTE
+    5122: 32767.0,  # SHORT
+    5123: 65535.0,  # UNSIGNED_SHORT
+}
+
+IDENTITY_MATRIX = [1.0, 0.0, 0.0, 0.0,
+                   0.0, 1.0, 0.0, 0.0,
+                   0.0, 0.0, 1.0, 0.0,
+                   0.0, 0.0, 0.0, 1.0]
+
+
+def mat4_multiply(a, b):
+    """Produit de deux matrices 4x4 stockées en colonnes (convention glTF)"""
+    result = [0.0] * 16
+    for col in range(4):
+        for row in range(4):
+            result[col * 4 + row] = sum(a[k * 4 + row] * b[col * 4 + k] for k in range(4))
+    return result
+
+
+def mat4_from_trs(translation=None, rotation=None, scale=None):
+    """Construit une matrice 4x4 (colonnes) à partir d'une translation, d'un quaternion et d'une échelle"""
+    tx, ty, tz = translation or (0.0, 0.0, 0.0)
+    qx, qy, qz, qw = rotation or (0.0, 0.0, 0.0, 1.0)
+    sx, sy, sz = scale or (1.0, 1.0, 1.0)
+
+    return [
+        (1 - 2 * (qy * qy + qz * qz)) * sx, (2 * (qx * qy + qz * qw)) * sx, (2 * (qx * qz - qy * qw)) * sx, 0.0,
+        (2 * (qx * qy - qz * qw)) * sy, (1 - 2 * (qx * qx + qz * qz)) * sy, (2 * (qy * qz + qx * qw)) * sy, 0.0,
+        (2 * (qx * qz + qy * qw)) * sz, (2 * (qy * qz - qx * qw)) * sz, (1 - 2 * (qx * qx + qy * qy)) * sz, 0.0,
+        tx, ty, tz, 1.0,
+    ]
+
+
+def mat4_from_euler_degrees(position=(0.0, 0.0, 0.0), rotation=(0.0, 0.0, 0.0), scale=1.0):
+    """Matrice équivalente à la transformation appliquée par les visualiseurs three.js
+    (échelle uniforme, rotation Euler XYZ en degrés, puis translation)"""
+    rx, ry, rz = (math.radians(angle or 0.0) for angle in rotation)
+    cx, sx = math.cos(rx), math.sin(rx)
+    cy, sy = math.cos(ry), math.sin(ry)
+    cz, sz = math.cos(rz), math.sin(rz)
+    s = scale if scale else 1.0
+
+    # Ordre 'XYZ' de three.js : R = Rx * Ry * Rz
+    return [
+        cy * cz * s, (cx * sz + sx * sy * cz) * s, (sx * sz - cx * sy * cz) * s, 0.0,
+        -cy * sz * s, (cx * cz - sx * sy * sz) * s, (sx * cz + cx * sy * sz) * s, 0.0,
+        sy * s, -sx * cy * s, cx * cy * s, 0.0,
+        position[0] or 0.0, position[1] or 0.0, position[2] or 0.0, 1.0,
+    ]
+
+
+def transform_bbox(matrix, bbox_min, bbox_max):
+    """Transforme une AABB par une matrice et retourne la nouvelle AABB (min, max)"""
+    new_min = [math.inf, math.inf, math.inf]
+    new_max = [-math.inf, -math.inf, -math.inf]
+    for x in (bbox_min[0], bbox_max[0]):
+        for y in (bbox_min[1], bbox_max[1]):
+            for z in (bbox_min[2], bbox_max[2]):
+                for axis in range(3):
+                    value = (matrix[axis] * x + matrix[4 + axis] * y
+                             + matrix[8 + axis] * z + matrix[12 + axis])
+                    new_min[axis] = min(new_min[axis], value)
+                    new_max[axis] = max(new_max[axis], value)
+    return new_min, new_max
+
+
+class GltfGeometryAnalyzer:
+    """Extrait les statistiques géométriques d'un fichier glTF ou GLB"""
+
+    def __init__(self):
+        self.gltf = {}
+        self.base_dir = ''
+        self.file_size = 0
+        self.glb_bin_size = 0
+
+    def analyze_file(self, file_path):
+        """Analyse un fichier .gltf ou .glb et retourne un dictionnaire de statistiques, ou None"""
+        try:
+            if not file_path or not os.path.isfile(file_path):
+                return None
+
+            self.base_dir = os.path.dirname(file_path)
+            self.file_size = os.path.getsize(file_path)
+
+            if file_path.lower().endswith('.glb'):
+                self.gltf = self._read_glb_json(file_path)
+            else:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    self.gltf = json.load(f)
+
+            if not self.gltf:
+                return None
+
+            return self._build_stats()
+
+        except Exception as e:
+            _logger.error(f"Erreur lors de l'analyse géométrique du fichier {file_path}: {str(e)}")
+            return None
+
+    def _read_glb_json(self, file_path):
+        """Lit uniquement le chunk JSON d'un GLB (et la taille du chunk binaire)"""
+        with open(file_path, 'rb') as f:
+            header = f.read(12)
+            if len(header) < 12 or header[:4] != GLB_MAGIC:
+                _logger.warning(f"En-tête GLB invalide: {file_path}")
+                return {}
+
+            gltf_data = {}
+            while True:
+                chunk_header = f.read(8)
+                if len(chunk_header) < 8:
+                    break
+                chunk_length, chunk_type = struct.unpack('<II', chunk_header)
+                if chunk_type == GLB_CHUNK_JSON:
+                    gltf_data = json.loads(f.read(chunk_length).decode('utf-8'))
+                else:
+                    if chunk_type == GLB_CHUNK_BIN:
+                        self.glb_bin_size = chunk_length
+                    f.seek(chunk_length, os.SEEK_CUR)
+            return gltf_data
+
+    def _build_stats(self):
+        accessors = self.gltf.get('accessors', [])
+        meshes = self.gltf.get('meshes', [])
+
+        bbox_min = [math.inf, math.inf, math.inf]
+        bbox_max = [-math.inf, -math.inf, -math.inf]
+        vertex_count = 0
+        triangle_count = 0
+        geometry_views = set()
+
+        # Statistiques par mesh (locales), réutilisées pour chaque instance
+        mesh_stats = []
+        for mesh in meshes:
+            local_min = [math.inf, math.inf, math.inf]
+            local_max = [-math.inf, -math.inf, -math.inf]
+            mesh_vertices = 0
+            mesh_triangles = 0
+
+            for primitive in mesh.get('primitives', []):
+                attributes = primitive.get('attributes', {})
+                position_index = attributes.get('POSITION')
+                position = accessors[position_index] if position_index is not None and position_index < len(accessors) else {}
+                primitive_vertices = position.get('count', 0)
+                mesh_vertices += primitive_vertices
+
+                pos_min, pos_max = self._accessor_bounds(position)
+                if pos_min and pos_max:
+                    for axis in range(3):
+                        local_min[axis] = min(local_min[axis], pos_min[axis])
+                        local_max[axis] = max(local_max[axis], pos_max[axis])
+
+                index_count = primitive_vertices
+                indices = primitive.get('indices')
+                if indices is not None and indices < len(accessors):
+                    index_count = accessors[indices].get('count', 0)
+                mesh_triangles += self._triangle_count(primitive.get('mode', MODE_TRIANGLES), index_count)
+
+                # BufferViews utilisés par la géométrie (attributs, indices, morph targets, Draco)
+                referenced = list(attributes.values())
+                if indices is not None:
+                    referenced.append(indices)
+                for target in primitive.get('targets', []):
+                    referenced.extend(target.values())
+                for accessor_index in referenced:
+                    if accessor_index is not None and accessor_index < len(accessors):
+                        view = accessors[accessor_index].get('bufferView')
+                        if view is not None:
+                            geometry_views.add(view)
+                draco = primitive.get('extensions', {}).get('KHR_draco_mesh_compression')
+                if draco and draco.get('bufferView') is not None:
+                    geometry_views.add(draco['bufferView'])
+
+            has_bounds = local_min[0] <= local_max[0]
+            mesh_stats.append((local_min if has_bounds else None, local_max if has_bounds else None,
+                               mesh_vertices, mesh_triangles))
+
+        # Parcours de la scène pour appliquer les transformations des nœuds
+        instanced = False
+        for node_index, world_matrix in self._iter_scene_nodes():
+            mesh_index = self.gltf['nodes'][node_index].get('mesh')
+            if mesh_index is None or mesh_index >= len(mesh_stats):
+                continue
+            instanced = True
+            local_min, local_max, mesh_vertices, mesh_triangles = mesh_stats[mesh_index]
+            vertex_count += mesh_vertices
+            triangle_count += mesh_triangles
+            if local_min:
+                node_min, node_max = transform_bbox(world_matrix, local_min, local_max)
+                for axis in range(3):
+                    bbox_min[axis] = min(bbox_min[axis], node_min[axis])
+                    bbox_max[axis] = max(bbox_max[axis], node_max[axis])
+
+        # Fichier sans scène : on se contente des meshes non transformés
+        if not instanced:
+            for local_min, local_max, mesh_vertices, mesh_triangles in mesh_stats:
+                vertex_count += mesh_vertices
+                triangle_count += mesh_triangles
+                if local_min:
+                    for axis in range(3):
+                        bbox_min[axis] = min(bbox_min[axis], local_min[axis])
+                        bbox_max[axis] = max(bbox_max[axis], local_max[axis])
+
+        buffer_views = self.gltf.get('bufferViews', [])
+        geometry_bytes = sum(buffer_views[view].get('byteLength', 0)
+                             for view in geometry_views if view < len(buffer_views))
+        texture_bytes = self._texture_byte_size(buffer_views)
+        buffer_bytes = sum(buffer.get('byteLength', 0) for buffer in self.gltf.get('buffers', []))
+
+        # Taille totale à télécharger : fichier principal + buffers externes + images externes
+        total_bytes = self.file_size
+        for buffer in self.gltf.get('buffers', []):
+            if buffer.get('uri') and not buffer['uri'].startswith('data:'):
+                total_bytes += buffer.get('byteLength', 0)
+        for image in self.gltf.get('images', []):
+            total_bytes += self._external_file_size(image.get('uri'))
+
+        has_bbox = bbox_min[0] <= bbox_max[0]
+        return {
+            'bbox_min': bbox_min if has_bbox else None,
+            'bbox_max': bbox_max if has_bbox else None,
+            'vertex_count': vertex_count,
+            'triangle_count': triangle_count,
+            'mesh_count': len(meshes),
+            'geometry_byte_size': geometry_bytes,
+            'texture_byte_size': texture_bytes,
+            'buffer_byte_size': buffer_bytes or self.glb_bin_size,
+            'total_byte_size': total_bytes,
+        }
+
+    def _accessor_bounds(self, accessor):
+        """Retourne (min, max) d'un accessor POSITION, en tenant compte de la normalisation"""
+        acc_min = accessor.get('min')
+        acc_max = accessor.get('max')
+        if not acc_min or not acc_max or len(acc_min) < 3 or len(acc_max) < 3:
+            return None, None
+        acc_min = [float(v) for v in acc_min[:3]]
+        acc_max = [float(v) for v in acc_max[:3]]
+        if accessor.get('normalized'):
+            divisor = NORMALIZED_DIVISORS.get(accessor.get('componentType'))
+            if divisor:
+                acc_min = [max(v / divisor, -1.0) for v in acc_min]
+                acc_max = [max(v / divisor, -1.0) for v in acc_max]
+        return acc_min, acc_max
+
+    def _triangle_count(self, mode, count):
+        if mode == MODE_TRIANGLES:
+            return count // 3
+        if mode in (MODE_TRIANGLE_STRIP, MODE_TRIANGLE_FAN):
+            return max(count - 2, 0)
+        # Points et lignes : aucun triangle
+        return 0
+
+    def _iter_scene_nodes(self):
+        """Génère (index du nœud, matrice monde) pour tous les nœuds de la scène par défaut"""
+        nodes = self.gltf.get('nodes', [])
+        scenes = self.gltf.get('scenes', [])
+        if scenes:
+            scene_index = self.gltf.get('scene', 0)
+            if scene_index >= len(scenes):
+                scene_index = 0
+            roots = scenes[scene_index].get('nodes', [])
+        else:
+            children = {child for node in nodes for child in node.get('children', [])}
+            roots = [index for index in range(len(nodes)) if index not in children]
+
+        stack = [(index, IDENTITY_MATRIX) for index in roots]
+        visited = set()
+        while stack:
+            node_index, parent_matrix = stack.pop()
+            if node_index in visited or node_index >= len(nodes):
+                continue
+            visited.add(node_index)
+            node = nodes[node_index]
+            world_matrix = mat4_multiply(parent_matrix, self._node_matrix(node))
+            yield node_index, world_matrix
+            for child in node.get('children', []):
+                stack.append((child, world_matrix))
+
+    def _node_matrix(self, node):
+        if node.get('matrix') and len(node['matrix']) == 16:
+            return [float(v) for v in node['matrix']]
+        if 'translation' in node or 'rotation' in node or 'scale' in node:
+            return mat4_from_trs(node.get('translation'), node.get('rotation'), node.get('scale'))
+        return IDENTITY_MATRIX
+
+    def _texture_byte_size(self, buffer_views):
+        total = 0
+        for image in self.gltf.get('images', []):
+            view = image.get('bufferView')
+            if view is not None and view < len(buffer_views):
+                total += buffer_views[view].get('byteLength', 0)
+            else:
+                total += self._external_file_size(image.get('uri'))
+        return total
+
+    def _external_file_size(self, uri):
+        if not uri or uri.startswith('data:'):
+            return 0
+        relative_path = decode_relative_uri(uri)
+        if not relative_path:
+            return 0
+        path = os.path.normpath(os.path.join(self.base_dir, relative_path))
+        return os.path.getsize(path) if os.path.isfile(path) else 0
+
+
+def analyze_gltf_file(file_path):
+    """Fonction utilitaire pour analyser la géométrie d'un fichier glTF/GLB"""
+    analyzer = GltfGeometryAnalyzer()
+    return analyzer.analyze_file(file_path)
+
+
+def read_gltf_json(file_path):
+    """JSON d'un fichier .gltf, ou chunk JSON d'un .glb"""
+    if file_path.lower().endswith('.glb'):
+        return GltfGeometryAnalyzer()._read_glb_json(file_path)
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def decode_relative_uri(uri):
+    """Chemin relatif décodé d'une URI externe glTF, ou None s'il sort du dossier du fichier
+    (chemin absolu ou segment '..' une fois les %XX décodés)"""
+    path = unquote(uri).replace('\\', '/')
+    if not path or path.startswith('/') or os.path.isabs(path) or '..' in path.split('/'):
+        return None
+    return path
+
+
+def list_external_uris(file_path):
+    """Buffers et images externes référencés par un fichier glTF/GLB (chemins relatifs décodés)"""
+    try:
+        gltf_data = read_gltf_json(file_path)
+    except Exception as e:
+        _logger.error(f"Erreur lors de la lecture de {file_path}: {str(e)}")
+        return []
+    uris = []
+    for item in gltf_data.get('buffers', []) + gltf_data.get('images', []):
+        uri = item.get('uri')
+        if not uri or uri.startswith('data:'):
+            continue
+        relative_path = decode_relative_uri(uri)
+        if not relative_path:
+            _logger.warning(f"URI externe ignorée (hors du dossier du fichier) dans {file_path}: {uri}")
+        elif relative_path not in uris:
+            uris.append(relative_path)
+    return uris
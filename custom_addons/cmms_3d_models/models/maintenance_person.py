@@ -1,8 +1,9 @@
 # custom_addons/cmms_3d_models/models/maintenance_person.py - Version modifiée
 
-from odoo import api, fields, models, _
+from odoo import api, fields, models, tools, _
 from odoo.exceptions import UserError, ValidationError
 import logging
+import uuid
 
 _logger = logging.getLogger(__name__)
 
@@ -35,7 +36,7 @@ class MaintenancePerson(models.Model):
     available = fields.Boolean('Disponible', default=True, tracking=True)
     
     # Relations
-    user_id = fields.Many2one('res.users', string='Utilisateur Odoo', readonly=True)
+    user_id = fields.Many2one('res.users', string='Utilisateur Odoo', readonly=True, index=True)
     partner_id = fields.Many2one('res.partner', string='Contact associé', readonly=True)
     
     # Demandes de maintenance assignées (direct + relations inverse)
@@ -55,6 +56,62 @@ class MaintenancePerson(models.Model):
     # Équipes
     team_ids = fields.Many2many('maintenance.team', string='Équipes de maintenance')
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        persons = super().create(vals_list)
+        # Équipes de leurs utilisateurs (_get_user_team_ids) à recalculer ; leurs clients doivent
+        # recevoir les demandes de ces équipes (synchronisation complète)
+        self.env['cmms.sync.tombstone']._record_scope_change(persons.user_id)
+        self._invalidate_user_team_ids(persons.user_id)
+        return persons
+
+    def write(self, vals):
+        scope_changed = bool({'user_id', 'team_ids', 'active'} & set(vals))
+        users = self.user_id if scope_changed else self.env['res.users']
+        res = super().write(vals)
+        if scope_changed:
+            # Équipes ajoutées ou retirées : synchronisation complète des clients des utilisateurs,
+            # avant comme après la modification (une demande d'une équipe ajoutée n'est pas modifiée)
+            users |= self.user_id
+            self.env['cmms.sync.tombstone']._record_scope_change(users)
+            self._invalidate_user_team_ids(users)
+        return res
+
+    def unlink(self):
+        users = self.user_id
+        self.env['cmms.sync.tombstone']._record_scope_change(users)
+        res = super().unlink()
+        self._invalidate_user_team_ids(users)
+        return res
+
+    @api.model
+    def _invalidate_user_team_ids(self, users):
+        """Nouvelle version des équipes en cache de ces utilisateurs : leurs entrées ne sont plus lues
+        par aucun processus, les autres caches du registre sont conservés"""
+        if users:
+            self.env.cr.execute("UPDATE res_users SET cmms_team_scope_version = %s WHERE id IN %s",
+                                [uuid.uuid4().hex, tuple(users.ids)])
+            users.invalidate_recordset(['cmms_team_scope_version'])
+
+    @api.model
+    def _get_user_team_ids(self, user_id):
+        """Équipes d'un utilisateur, pour le périmètre d'accès de l'API (voir _get_versioned_user_team_ids),
+        pour la version courante de son périmètre"""
+        self.env.cr.execute("SELECT cmms_team_scope_version FROM res_users WHERE id = %s", [user_id])
+        row = self.env.cr.fetchone()
+        return self._get_versioned_user_team_ids(user_id, row[0] if row else None)
+
+    @api.model
+    @tools.ormcache('user_id', 'version')
+    def _get_versioned_user_team_ids(self, user_id, version):
+        """Équipes d'un utilisateur : celles de sa personne de maintenance, sinon celles dont il est
+        membre. En cache par version (cmms_team_scope_version, renouvelée à chaque modification
+        des personnes ou des équipes de l'utilisateur)."""
+        person = self.sudo().search([('user_id', '=', user_id)], limit=1)
+        if person:
+            return tuple(person.team_ids.ids)
+        return tuple(self.env['maintenance.team'].sudo().search([('member_ids', 'in', [user_id])]).ids)
+
     @api.depends('name', 'first_name')
     def _compute_display_name(self):
         for person in self:
@@ -391,6 +448,36 @@ class MaintenanceTeamExtended(models.Model):
     def _compute_person_count(self):
         for team in self:
             team.person_count = len(team.person_ids)
+
+    def _get_scope_users(self):
+        """Utilisateurs dont les équipes (maintenance.person._get_user_team_ids) dépendent de ces équipes"""
+        return self.member_ids | self.person_ids.user_id
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        teams = super().create(vals_list)
+        users = teams._get_scope_users()
+        self.env['cmms.sync.tombstone']._record_scope_change(users)
+        self.env['maintenance.person']._invalidate_user_team_ids(users)
+        return teams
+
+    def write(self, vals):
+        scope_changed = bool({'member_ids', 'person_ids', 'active'} & set(vals))
+        users = self._get_scope_users() if scope_changed else self.env['res.users']
+        res = super().write(vals)
+        if scope_changed:
+            # Membres ajoutés ou retirés : synchronisation complète des clients des utilisateurs concernés
+            users |= self._get_scope_users()
+            self.env['cmms.sync.tombstone']._record_scope_change(users)
+            self.env['maintenance.person']._invalidate_user_team_ids(users)
+        return res
+
+    def unlink(self):
+        users = self._get_scope_users()
+        self.env['cmms.sync.tombstone']._record_scope_change(users)
+        res = super().unlink()
+        self.env['maintenance.person']._invalidate_user_team_ids(users)
+        return res
     
     def action_view_persons(self):
         self.ensure_one()
@@ -401,4 +488,11 @@ class MaintenanceTeamExtended(models.Model):
             'view_mode': 'tree,form',
             'domain': [('team_ids', 'in', [self.id])],
             'context': {'default_team_ids': [(6, 0, [self.id])]}
-        }
\ No newline at end of file
+        }
+
+
+class ResUsersTeamScope(models.Model):
+    _inherit = 'res.users'
+
+    # Clé du cache des équipes de l'utilisateur (maintenance.person._get_user_team_ids)
+    cmms_team_scope_version = fields.Char('Version des équipes (API)', readonly=True, copy=False)
@@ -27,7 +27,8 @@ class MaintenanceRequestAssignment(models.Model):
         related='person_id.user_id',
         string="Utilisateur associé",
         store=True,
-        readonly=True
+        readonly=True,
+        index=True  # Périmètre d'accès de l'API (sous-requête assignment_ids.user_id)
     )
     assigned_date = fields.Datetime('Date d\'assignation', default=fields.Datetime.now)
     assigned_by_id = fields.Many2one('res.users', string='Assigné par', default=lambda self: self.env.user.id)
@@ -1,5 +1,5 @@
 # custom_addons/cmms_3d_models/models/maintenance_request_extended.py
-from odoo import api, fields, models, _
+from odoo import api, fields, models, tools, _
 from odoo.exceptions import ValidationError, UserError
 from datetime import datetime, timedelta
 
@@ -85,6 +85,12 @@ class MaintenanceRequestExtended(models.Model):
         store=True
     )
 
+    def init(self):
+        # Index de la pagination par curseur de l'API (ordre request_date desc, id desc) :
+        # chaque page est un parcours d'index, quelle que soit sa profondeur
+        tools.create_index(self.env.cr, 'maintenance_request_request_date_id_desc_index',
+                           self._table, ['request_date DESC', 'id DESC'])
+
     @api.depends('equipment_id', 'equipment_id.has_3d_model')
     def _compute_equipment_has_3d_model(self):
         """Calcule si l'équipement associé a un modèle 3D"""
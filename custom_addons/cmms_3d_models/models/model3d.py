@@ -2,12 +2,21 @@
 
 import os
 import base64
+import posixpath
 import zipfile
 import io
 import json
 import subprocess
 import tempfile
-from odoo import api, fields, models, _
+import gzip
+import shutil
+import hashlib
+import uuid
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from odoo import api, fields, models, tools, _
 from odoo.exceptions import ValidationError
 from odoo.tools.safe_eval import safe_eval
 import logging
@@ -20,6 +29,118 @@ BLENDER_SCRIPT_PATH = os.path.normpath(r"C:\Users\admin\Desktop\odoo\blender_scr
 DEBUG_LOG_PATH = os.path.normpath(r"C:\Users\admin\Desktop\odoo\models\blender_debug.log")
 # Chemin vers l'exécutable Blender - à adapter selon votre installation
 BLENDER_EXE = r"C:\Program Files\Blender Foundation\Blender 4.4\blender.exe"
+# Génération des niveaux de détail (LOD) : script Blender, ratios de décimation par défaut
+# et nombre de triangles en dessous duquel un modèle reste uniquement en pleine résolution
+LOD_SCRIPT_PATH = os.path.normpath(os.path.join(os.path.dirname(BLENDER_SCRIPT_PATH), "generate_lods.py"))
+DEFAULT_LOD_RATIOS = "0.5,0.15"
+DEFAULT_LOD_MIN_TRIANGLES = 5000
+# Compression de la géométrie : 'draco' (exporteur Blender), 'meshopt' (gltfpack) ou 'none'
+COMPRESS_SCRIPT_PATH = os.path.normpath(os.path.join(os.path.dirname(BLENDER_SCRIPT_PATH), "compress_gltf.py"))
+DEFAULT_MESH_COMPRESSION = 'draco'
+DEFAULT_DRACO_LEVEL = 6
+# Aperçus rendus à l'ingestion (paramètre cmms_3d_models.previews_enabled) : vignettes WebP fixes
+# à plusieurs tailles et turntable WebP animé, dans le sous-dossier PREVIEW_DIR du modèle
+PREVIEW_SCRIPT_PATH = os.path.normpath(os.path.join(os.path.dirname(BLENDER_SCRIPT_PATH), "render_previews.py"))
+PREVIEW_DIR = 'previews'
+THUMBNAIL_SIZES = (128, 256, 512)
+# Taille de la vignette copiée dans le champ thumbnail (vues Odoo)
+THUMBNAIL_FIELD_SIZE = 256
+TURNTABLE_SIZE = 256
+TURNTABLE_FRAMES = 12
+TURNTABLE_FRAME_DURATION = 150
+WEBP_QUALITY = 80
+GLTFPACK_EXE = 'gltfpack'
+# Une variante compressée n'est conservée que si elle est au moins 5 % plus petite
+MIN_COMPRESSION_RATIO = 1.05
+# Transcodage optionnel des textures en KTX2 lors de l'empaquetage GLB
+TOKTX_EXE = 'toktx'
+# Durée maximale d'un outil externe (secondes), paramètre système cmms_3d_models.asset_tool_timeout :
+# au-delà, le processus est tué et l'étape est abandonnée
+DEFAULT_ASSET_TOOL_TIMEOUT = 600
+# Empreintes des fichiers servis : ETag fort (SHA-256) et version courte ajoutée aux URL (?v=)
+ASSET_VERSION_LENGTH = 12
+HASH_CHUNK_SIZE = 1024 * 1024
+# Variantes précompressées (.gz/.br) écrites à l'ingestion pour les formats texte
+PRECOMPRESS_EXTENSIONS = ('.gltf', '.ifc', '.ifcxml')
+# Une variante n'est conservée que si elle fait gagner au moins 10 %
+MAX_PRECOMPRESSED_RATIO = 0.9
+# Synchronisation des fichiers sur le disque (déploiement, nœud reconstruit) : threads en parallèle
+# (paramètre cmms_3d_models.sync_workers) et modèles traités par lot dans chaque thread
+DEFAULT_SYNC_WORKERS = 4
+SYNC_BATCH_SIZE = 10
+# Cache disque borné (paramètre cmms_3d_models.disk_budget_mb, 0 ou vide : illimité) : l'éviction LRU
+# redescend sous cette fraction du budget et épargne les fichiers lus depuis moins de DISK_EVICTION_MIN_IDLE s
+# (supérieur à asset_storage.ACCESS_RECORD_INTERVAL, l'intervalle de mise à jour de la date d'accès)
+DISK_EVICTION_TARGET_RATIO = 0.9
+DISK_EVICTION_MIN_IDLE = 600
+# Manifeste des fichiers servis : extensions et textures toujours autorisées dans le dossier du modèle
+PUBLIC_ASSET_EXTENSIONS = ('.bin', '.jpg', '.jpeg', '.png', '.webp', '.ifc', '.ifcxml', '.ifczip')
+KNOWN_TEXTURE_FILENAMES = ('grunge-scratched-brushed-metal-background.jpg', 'zinc04.jpg')
+# Champs dont la modification change la version du manifeste mis en cache
+MANIFEST_FIELDS = {
+    'active', 'parent_id', 'model_file', 'model_filename', 'model_bin', 'model_bin_filename',
+    'ifc_file', 'ifc_filename', 'model_zip', 'source_blend_filename', 'is_converted_from_blend',
+    'has_external_files', 'files_list', 'submodels_json', 'asset_hashes_json',
+    'glb_filename', 'compressed_filename', 'compression_method', 'lod_files_json',
+}
+
+from .gltf_analyzer import list_external_uris
+from .glb_packer import pack_gltf_to_glb
+from . import asset_storage
+
+
+def _file_sha256(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _gzip_file(source_path, target_path):
+    with open(source_path, 'rb') as source, gzip.GzipFile(target_path, 'wb', compresslevel=9, mtime=0) as target:
+        shutil.copyfileobj(source, target, HASH_CHUNK_SIZE)
+
+
+def _brotli_file(source_path, target_path):
+    compressor = brotli.Compressor(quality=11)
+    with open(source_path, 'rb') as source, open(target_path, 'wb') as target:
+        for chunk in iter(lambda: source.read(HASH_CHUNK_SIZE), b''):
+            target.write(compressor.process(chunk))
+        target.write(compressor.finish())
+
+
+def _encode_webp(images, quality=WEBP_QUALITY, duration=None):
+    """Encode une image WebP, animée (en boucle) si plusieurs images sont fournies"""
+    output = io.BytesIO()
+    if len(images) > 1:
+        images[0].save(output, 'WEBP', quality=quality, method=6, save_all=True,
+                       append_images=images[1:], duration=duration, loop=0)
+    else:
+        images[0].save(output, 'WEBP', quality=quality, method=6)
+    return output.getvalue()
+
+
+def _resized_image(image_path, size):
+    with Image.open(image_path) as image:
+        image = image.convert('RGBA')
+        image.thumbnail((size, size), Image.LANCZOS)
+        return image
+
+
+@functools.lru_cache(maxsize=64)
+def _parse_asset_hashes(asset_hashes_json):
+    """Empreintes décodées, partagées entre requêtes tant que le JSON stocké ne change pas"""
+    try:
+        return json.loads(asset_hashes_json)
+    except Exception:
+        return {}
+
+# Compression brotli optionnelle (paquet Brotli) : à défaut, seules les variantes gzip sont écrites
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # Import du parser IFC
 try:
@@ -30,6 +151,7 @@ except ImportError:
 
 class Model3D(models.Model):
     _name = 'cmms.model3d'
+    _inherit = ['cmms.geometry.mixin']
     _description = '3D Model'
 
     name = fields.Char('Name', required=True)
@@ -40,6 +162,10 @@ class Model3D(models.Model):
     model_url = fields.Char('Model URL', compute='_compute_model_url', store=True)
     viewer_url = fields.Char('Viewer URL', compute='_compute_viewer_url')
     thumbnail = fields.Binary('Thumbnail', attachment=True)
+    thumbnail_url = fields.Char('URL de la vignette', compute='_compute_preview_urls', store=True,
+                                help="Vignette WebP rendue à l'ingestion (URL versionnée, mise en cache longue durée)")
+    preview_url = fields.Char('URL du turntable', compute='_compute_preview_urls', store=True,
+                              help="Aperçu WebP animé (tour complet du modèle) rendu à l'ingestion")
     active = fields.Boolean('Active', default=True)
 
     # CHAMPS POUR LE FICHIER IFC
@@ -82,6 +208,14 @@ class Model3D(models.Model):
                                         help="Indicates if this 3D model references external files like textures or binaries")
     files_list = fields.Text('Associated Files', readonly=True,
                              help="List of files associated with this 3D model")
+    asset_hashes_json = fields.Text('Empreintes des fichiers (JSON)', readonly=True,
+                                    help="SHA-256, taille et date de modification de chaque fichier servi, "
+                                         "calculés à l'ingestion (ETag et URL versionnées)")
+    manifest_version = fields.Char('Version du manifeste', readonly=True, copy=False,
+                                   help="Renouvelée à chaque modification des fichiers servis : clé du manifeste en cache")
+    disk_pinned = fields.Boolean('Conserver sur le disque', default=False,
+                                 help="Les fichiers de ce modèle ne sont jamais évincés du cache disque "
+                                      "et sont restaurés à chaque synchronisation")
 
     # Information for tracking Blender file conversion
     source_blend_file = fields.Binary('Source Blend File', attachment=True, readonly=True,
@@ -143,6 +277,11 @@ class Model3D(models.Model):
         string='A un équipement auto-créé'
     )
 
+    def init(self):
+        # JSON IFC stocké hors ligne sans compression (TOAST EXTERNAL) : la lecture par tranches
+        # (substr) de l'API /raw ne décompresse pas la valeur entière à chaque tranche
+        self.env.cr.execute("ALTER TABLE cmms_model3d ALTER COLUMN ifc_data_json SET STORAGE EXTERNAL")
+
     @api.depends('ifc_file', 'ifc_filename')
     def _compute_has_ifc_file(self):
         for record in self:
@@ -214,23 +353,32 @@ class Model3D(models.Model):
             filtered.append(line)
         return "\n".join(filtered)
 
-    @api.depends('model_file', 'model_filename')
+    @api.depends('model_file', 'model_filename', 'glb_filename', 'asset_hashes_json')
     def _compute_model_url(self):
-        base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
         for record in self:
-            if record.model_file and record.id and record.model_filename:
+            # URL versionnée (?v=empreinte) : mise en cache illimitée côté client, nouvelle URL à chaque changement
+            if record.model_file and record.id and record.glb_filename:
+                # GLB autonome (buffers et textures embarqués) : une seule requête par modèle
+                record.model_url = record._get_asset_url(record.glb_filename)
+            elif record.model_file and record.id and record.model_filename:
                 # Pour les fichiers Blender, on utilise le fichier GLTF converti
                 if record.model_format == 'blend' and record.is_converted_from_blend:
                     # On assume que le fichier converti a le même nom mais avec l'extension .gltf
                     blend_basename = os.path.splitext(record.model_filename)[0]
                     gltf_filename = f"{blend_basename}.gltf"
-                    # Use forward slashes in URLs even on Windows
-                    record.model_url = f"{base_url}/models3d/{record.id}/{gltf_filename}"
+                    record.model_url = record._get_asset_url(gltf_filename)
                 else:
-                    record.model_url = f"{base_url}/models3d/{record.id}/{record.model_filename}"
+                    record.model_url = record._get_asset_url(record.model_filename)
             else:
                 record.model_url = False
 
+    @api.depends('asset_hashes_json')
+    def _compute_preview_urls(self):
+        for record in self:
+            previews = record._get_preview_data() if record.id else {}
+            record.thumbnail_url = previews.get('thumbnails', {}).get(str(THUMBNAIL_FIELD_SIZE), False)
+            record.preview_url = previews.get('turntable') or False
+
     def _compute_viewer_url(self):
         base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
         for record in self:
@@ -404,8 +552,7 @@ class Model3D(models.Model):
 
             # Sauvegarder le fichier IFC
             file_path = os.path.normpath(os.path.join(models_dir, record.ifc_filename))
-            with open(file_path, 'wb') as f:
-                f.write(base64.b64decode(record.ifc_file))
+            asset_storage.atomic_write(file_path, base64.b64decode(record.ifc_file))
 
             _logger.info(f"Fichier IFC sauvegardé: {file_path}")
 
@@ -425,6 +572,9 @@ class Model3D(models.Model):
                 record.files_list = json.dumps(file_list)
                 record.has_external_files = True
 
+            self._precompress_model_assets(record)
+            self._update_asset_hashes(record)
+
         except Exception as e:
             error_message = f"Erreur lors de la sauvegarde du fichier IFC: {str(e)}"
             _logger.error(error_message)
@@ -648,6 +798,8 @@ class Model3D(models.Model):
                     break  #
 
         res = super(Model3D, self).write(vals)
+        if MANIFEST_FIELDS.intersection(vals):
+            self._invalidate_asset_manifest()
 
         try:
             for record in self:
@@ -735,11 +887,14 @@ class Model3D(models.Model):
 
             # Sauvegarder le fichier
             file_path = os.path.normpath(os.path.join(models_dir, record.model_filename))
-            with open(file_path, 'wb') as f:
-                f.write(base64.b64decode(record.model_file))
+            asset_storage.atomic_write(file_path, base64.b64decode(record.model_file))
 
             _logger.info(f"Modèle 3D sauvegardé: {file_path}")
 
+            # Boîte englobante, sommets/triangles et tailles depuis les accessors
+            if record.model_filename.lower().endswith(('.gltf', '.glb')):
+                self._update_geometry_stats(record, file_path)
+
             # Check if it's a GLTF file and parse it to see if it references external files
             if record.model_filename.endswith('.gltf'):
                 self._analyze_gltf_references(record, file_path)
@@ -761,6 +916,9 @@ class Model3D(models.Model):
                     self.import_hierarchy_from_gltf(file_path, record.id)
                 except Exception as e:
                     _logger.error(f"Erreur lors de l'importation de la hiérarchie depuis GLB: {str(e)}")
+
+            if record.model_filename.lower().endswith(('.gltf', '.glb')):
+                self._postprocess_model_assets(record)
         except Exception as e:
             _logger.error(f"Erreur lors de la sauvegarde du modèle 3D: {e}")
             raise ValidationError(f"Erreur lors de la sauvegarde du modèle 3D: {e}")
@@ -895,6 +1053,8 @@ class Model3D(models.Model):
             if binary_file:
                 _logger.info(f"Fichier binaire associé: {binary_file}")
 
+            self._update_geometry_stats(record, converted_file)
+
             # Mettre à jour l'URL du modèle
             record._compute_model_url()
 
@@ -920,6 +1080,8 @@ class Model3D(models.Model):
             except Exception as e:
                 _logger.error(f"Erreur lors de l'importation de la hiérarchie GLTF: {str(e)}")
 
+            self._postprocess_model_assets(record)
+
             return True
         except Exception as e:
             _logger.error(f"[DEBUG][PYTHON] Erreur lors de la conversion du fichier Blender (catch python): {str(e)}")
@@ -947,8 +1109,7 @@ class Model3D(models.Model):
 
             # Save the binary file
             file_path = os.path.normpath(os.path.join(models_dir, bin_filename))
-            with open(file_path, 'wb') as f:
-                f.write(base64.b64decode(record.model_bin))
+            asset_storage.atomic_write(file_path, base64.b64decode(record.model_bin))
 
             # Update file list
             file_list = []
@@ -964,6 +1125,7 @@ class Model3D(models.Model):
 
             record.has_external_files = True
             _logger.info(f"Fichier binaire sauvegardé: {file_path}")
+            self._update_asset_hashes(record)
         except Exception as e:
             _logger.error(f"Erreur lors de la sauvegarde du fichier binaire: {e}")
             raise ValidationError(f"Erreur lors de la sauvegarde du fichier binaire: {e}")
@@ -1216,6 +1378,8 @@ class Model3D(models.Model):
                     if main_file.endswith('.gltf'):
                         self._analyze_gltf_references(record, main_file_path)
 
+                    self._update_geometry_stats(record, main_file_path)
+
                     # Met à jour files_list et status des fichiers externes
                     record.files_list = json.dumps(additional_files)
                     record.has_external_files = bool(additional_files)
@@ -1223,6 +1387,8 @@ class Model3D(models.Model):
                     _logger.info(f"Archive ZIP extraite: {record.model_zip_filename or 'sans nom'}, {len(file_list)} fichiers")
                     _logger.info(f"Textures trouvées: {len(texture_files)}, Fichiers binaires: {len(bin_files)}, Autres: {len(other_files)}")
 
+                    self._postprocess_model_assets(record)
+
                     return True
 
             except zipfile.BadZipFile as e:
@@ -1235,6 +1401,919 @@ class Model3D(models.Model):
             _logger.error(f"Erreur générale lors du traitement ZIP: {str(e)}")
             raise ValidationError(f"Erreur générale lors du traitement ZIP: {str(e)}")
 
+    def _update_geometry_stats(self, record, gltf_path):
+        """Calcule et enregistre les statistiques géométriques d'un fichier glTF/GLB"""
+        try:
+            geometry_vals = self._compute_geometry_vals(gltf_path)
+            if geometry_vals:
+                record.write(geometry_vals)
+        except Exception as e:
+            # Les statistiques sont une aide au chargement : ne pas bloquer l'ingestion
+            _logger.error(f"Erreur lors du calcul des statistiques géométriques: {str(e)}")
+
+    def _get_asset_base_url(self):
+        self.ensure_one()
+        if not self.id:
+            return False
+        base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
+        return f"{base_url}/models3d/{self.id}/"
+
+    def _get_blender_executable(self):
+        """Exécutable Blender configuré, ou celui du PATH s'il est introuvable"""
+        if os.path.isfile(BLENDER_EXE):
+            return BLENDER_EXE
+        _logger.warning(f"Exécutable Blender non trouvé à {BLENDER_EXE}, utilisation du PATH")
+        return 'blender'
+
+    def _postprocess_model_assets(self, record):
+        """Traitements dérivés des fichiers du modèle et de ses sous-modèles, une fois
+        l'ingestion (sauvegarde, conversion, extraction de la hiérarchie) terminée"""
+        # Les fichiers dérivés accélèrent l'affichage : ne pas bloquer l'ingestion
+        try:
+            self._generate_lods(record)
+        except Exception as e:
+            _logger.error(f"Erreur lors de la génération des niveaux de détail: {str(e)}")
+        try:
+            self._pack_model_assets(record)
+        except Exception as e:
+            _logger.error(f"Erreur lors de l'empaquetage GLB: {str(e)}")
+        try:
+            self._compress_model_assets(record)
+        except Exception as e:
+            _logger.error(f"Erreur lors de la compression de la géométrie: {str(e)}")
+        try:
+            self._render_previews(record)
+        except Exception as e:
+            _logger.error(f"Erreur lors du rendu des aperçus: {str(e)}")
+        self._register_derived_files(record)
+        self._precompress_model_assets(record)
+        self._update_asset_hashes(record)
+
+    def _get_asset_targets(self, record):
+        """Fichiers glTF/GLB sources du modèle principal et de ses sous-modèles :
+        {chemin normalisé: enregistrement}"""
+        targets = {}
+        if record.model_filename and record.model_filename.lower().endswith(('.gltf', '.glb')):
+            targets[os.path.normpath(os.path.join(MODELS_DIR, str(record.id), record.model_filename))] = record
+        for submodel in record.submodel_ids:
+            if submodel.gltf_path:
+                targets[os.path.normpath(submodel.gltf_path)] = submodel
+        return {path: target for path, target in targets.items() if os.path.isfile(path)}
+
+    def _get_asset_tool_timeout(self):
+        value = self.env['ir.config_parameter'].sudo().get_param('cmms_3d_models.asset_tool_timeout')
+        try:
+            return max(1, int(value)) if value else DEFAULT_ASSET_TOOL_TIMEOUT
+        except ValueError:
+            _logger.warning(f"Valeur invalide pour cmms_3d_models.asset_tool_timeout: {value}")
+            return DEFAULT_ASSET_TOOL_TIMEOUT
+
+    def _run_asset_tool(self, cmd, label):
+        """Exécute un outil externe (Blender, gltfpack, toktx) et retourne sa sortie standard, ou None en cas
+        d'échec ou de dépassement de cmms_3d_models.asset_tool_timeout (le processus est alors tué)"""
+        _logger.info(f"Exécution de la commande ({label}): {' '.join(cmd)}")
+        timeout = self._get_asset_tool_timeout()
+        try:
+            process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                universal_newlines=True
+            )
+            try:
+                stdout, stderr = process.communicate(timeout=timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+                _logger.error(f"{label} interrompu après {timeout} s")
+                return None
+        except Exception as e:
+            _logger.error(f"Erreur lors de l'exécution de {label}: {str(e)}")
+            return None
+
+        if process.returncode != 0:
+            _logger.error(f"Échec de {label} (code {process.returncode}):\n{self._filter_alsa_errors(stderr)}")
+            return None
+        return stdout
+
+    @staticmethod
+    def _is_derived_file_current(source_path, derived_path):
+        """Vrai si le fichier dérivé existe et est plus récent que sa source"""
+        return os.path.isfile(derived_path) and os.path.getmtime(derived_path) >= os.path.getmtime(source_path)
+
+    def _get_lod_ratios(self):
+        ratios = self.env['ir.config_parameter'].sudo().get_param('cmms_3d_models.lod_ratios', DEFAULT_LOD_RATIOS)
+        values = []
+        for value in ratios.split(','):
+            try:
+                ratio = float(value.strip())
+            except ValueError:
+                continue
+            if 0.0 < ratio < 1.0 and ratio not in values:
+                values.append(ratio)
+        return sorted(values, reverse=True)
+
+    def _lods_up_to_date(self, lod_record, source_path, ratios):
+        """Vrai si les LOD existants correspondent aux ratios et sont plus récents que la source"""
+        entries = lod_record._get_lod_entries()
+        if not entries or [entry.get('ratio') for entry in entries] != ratios:
+            return False
+        source_dir = os.path.dirname(source_path)
+        return all(self._is_derived_file_current(source_path, os.path.join(source_dir, entry['filename']))
+                   for entry in entries)
+
+    def _generate_lods(self, record):
+        """Génère les niveaux de détail décimés du modèle principal et de chaque sous-modèle
+        en un seul appel Blender. Les fichiers sont écrits à côté des originaux."""
+        params = self.env['ir.config_parameter'].sudo()
+        if params.get_param('cmms_3d_models.lod_enabled', 'True').lower() in ('0', 'false', 'no'):
+            return
+        ratios = self._get_lod_ratios()
+        if not ratios:
+            _logger.warning("Aucun ratio de décimation valide, génération des LOD ignorée")
+            return
+        min_triangles = int(params.get_param('cmms_3d_models.lod_min_triangles', DEFAULT_LOD_MIN_TRIANGLES))
+
+        pending = {}
+        for source_path, lod_record in self._get_asset_targets(record).items():
+            if lod_record.triangle_count < min_triangles:
+                continue
+            if self._lods_up_to_date(lod_record, source_path, ratios):
+                continue
+            pending[source_path] = lod_record
+
+        if not pending:
+            return
+
+        if not os.path.isfile(LOD_SCRIPT_PATH):
+            _logger.error(f"Script de génération des LOD non trouvé: {LOD_SCRIPT_PATH}")
+            return
+
+        cmd = [
+            self._get_blender_executable(),
+            '--background',
+            '-noaudio',
+            '--python', LOD_SCRIPT_PATH,
+            '--', '--ratios', ','.join(str(ratio) for ratio in ratios),
+        ] + list(pending)
+
+        _logger.info(f"Génération des LOD pour {len(pending)} fichiers du modèle {record.id}")
+        stdout = self._run_asset_tool(cmd, "génération des LOD")
+        if stdout is None:
+            return
+
+        # LOD_FILE=<source>|<niveau>|<ratio>|<fichier_lod>
+        lods_by_source = {}
+        for line in stdout.split('\n'):
+            if not line.startswith('LOD_FILE='):
+                continue
+            try:
+                source_path, level, ratio, lod_path = line.split('=', 1)[1].strip().split('|')
+            except ValueError:
+                continue
+            lods_by_source.setdefault(os.path.normpath(source_path), []).append(
+                (int(level), float(ratio), os.path.normpath(lod_path))
+            )
+
+        for source_path, lod_record in pending.items():
+            entries = []
+            for level, ratio, lod_path in sorted(lods_by_source.get(source_path, [])):
+                if not os.path.isfile(lod_path):
+                    continue
+                lod_stats = self._compute_geometry_vals(lod_path)
+                entries.append({
+                    'level': level,
+                    'ratio': ratio,
+                    'filename': os.path.basename(lod_path),
+                    'triangle_count': lod_stats.get('triangle_count', 0),
+                    'total_byte_size': lod_stats.get('total_byte_size', 0),
+                    'files': list_external_uris(lod_path),
+                })
+            lod_record.write({
+                'lod_files_json': json.dumps(entries) if entries else False,
+                'lod_count': len(entries),
+            })
+            _logger.info(f"{len(entries)} niveaux de détail enregistrés pour {source_path}")
+
+    def _get_ktx2_transcoder(self):
+        """Transcodeur PNG/JPEG → KTX2 (toktx, Basis Universal ETC1S) si activé, sinon None"""
+        params = self.env['ir.config_parameter'].sudo()
+        if params.get_param('cmms_3d_models.glb_ktx2', 'False').lower() not in ('1', 'true', 'yes'):
+            return None
+        toktx = params.get_param('cmms_3d_models.toktx_path', TOKTX_EXE)
+
+        def transcode(data, mime_type):
+            extension = {'image/png': '.png', 'image/jpeg': '.jpg'}.get(mime_type)
+            if not extension:
+                return None
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                source_path = os.path.join(tmp_dir, f"texture{extension}")
+                ktx2_path = os.path.join(tmp_dir, "texture.ktx2")
+                with open(source_path, 'wb') as f:
+                    f.write(data)
+                cmd = [toktx, '--t2', '--encode', 'etc1s', '--genmipmap', ktx2_path, source_path]
+                if self._run_asset_tool(cmd, "transcodage KTX2") is None or not os.path.isfile(ktx2_path):
+                    return None
+                with open(ktx2_path, 'rb') as f:
+                    return f.read()
+
+        return transcode
+
+    def _pack_model_assets(self, record):
+        """Empaquette le .gltf du modèle principal et de chaque sous-modèle en un .glb autonome
+        (buffers et textures embarqués), servi par défaut en une seule requête"""
+        if self.env['ir.config_parameter'].sudo().get_param(
+                'cmms_3d_models.glb_packing', 'True').lower() in ('0', 'false', 'no'):
+            return
+        transcoder = self._get_ktx2_transcoder()
+
+        for source_path, target in self._get_asset_targets(record).items():
+            if not source_path.lower().endswith('.gltf'):
+                continue
+            glb_path = f"{os.path.splitext(source_path)[0]}.glb"
+            if target.glb_filename == os.path.basename(glb_path) and self._is_derived_file_current(source_path, glb_path):
+                continue
+            try:
+                summary = pack_gltf_to_glb(source_path, glb_path, transcoder)
+            except Exception as e:
+                _logger.error(f"Erreur lors de l'empaquetage GLB de {source_path}: {str(e)}")
+                target.write({'glb_filename': False, 'glb_byte_size': 0})
+                continue
+            target.write({
+                'glb_filename': os.path.basename(glb_path),
+                'glb_byte_size': summary['byte_size'],
+            })
+            _logger.info(f"GLB empaqueté: {glb_path} ({summary['byte_size']} octets, "
+                         f"{summary['embedded_images']} images, {summary['transcoded_images']} en KTX2)")
+
+    def _get_mesh_compression_method(self):
+        method = self.env['ir.config_parameter'].sudo().get_param(
+            'cmms_3d_models.mesh_compression', DEFAULT_MESH_COMPRESSION).strip().lower()
+        if method not in ('draco', 'meshopt', 'none'):
+            _logger.warning(f"Méthode de compression inconnue '{method}', compression désactivée")
+            return 'none'
+        return method
+
+    def _compress_model_assets(self, record):
+        """Produit une variante compressée (Draco ou meshopt) du modèle principal et de chaque
+        sous-modèle, à côté de l'original, et enregistre le taux de compression obtenu"""
+        method = self._get_mesh_compression_method()
+        if method == 'none':
+            return
+
+        suffix = f"_{method}.glb"
+        pending = {}
+        for source_path, target in self._get_asset_targets(record).items():
+            compressed_path = f"{os.path.splitext(source_path)[0]}{suffix}"
+            if (target.compression_method == method and target.compressed_filename
+                    and self._is_derived_file_current(source_path, compressed_path)):
+                continue
+            pending[source_path] = target
+
+        if not pending:
+            return
+
+        _logger.info(f"Compression {method} de {len(pending)} fichiers du modèle {record.id}")
+        if method == 'draco':
+            compressed_files = self._compress_with_draco(list(pending))
+        else:
+            compressed_files = self._compress_with_meshopt(list(pending))
+
+        for source_path, target in pending.items():
+            compressed_path = compressed_files.get(source_path)
+            vals = {
+                'compressed_filename': False,
+                'compression_method': False,
+                'compressed_byte_size': 0,
+                'compression_ratio': 0.0,
+            }
+            stats = self._compute_geometry_vals(compressed_path) if compressed_path else {}
+            compressed_size = stats.get('total_byte_size', 0)
+            original_size = target.total_byte_size
+            if compressed_size and original_size:
+                ratio = original_size / compressed_size
+                if ratio >= MIN_COMPRESSION_RATIO:
+                    vals.update({
+                        'compressed_filename': os.path.basename(compressed_path),
+                        'compression_method': method,
+                        'compressed_byte_size': compressed_size,
+                        'compression_ratio': ratio,
+                    })
+                    _logger.info(f"Variante {method} de {source_path}: {original_size} → {compressed_size} octets "
+                                 f"(x{ratio:.1f})")
+                else:
+                    _logger.info(f"Compression {method} sans gain pour {source_path} (x{ratio:.2f}), variante ignorée")
+            target.write(vals)
+
+    def _compress_with_draco(self, source_paths):
+        """Compression Draco via l'exporteur glTF de Blender : {source: fichier compressé}"""
+        if not os.path.isfile(COMPRESS_SCRIPT_PATH):
+            _logger.error(f"Script de compression non trouvé: {COMPRESS_SCRIPT_PATH}")
+            return {}
+        level = self.env['ir.config_parameter'].sudo().get_param('cmms_3d_models.draco_level', DEFAULT_DRACO_LEVEL)
+        cmd = [
+            self._get_blender_executable(),
+            '--background',
+            '-noaudio',
+            '--python', COMPRESS_SCRIPT_PATH,
+            '--', '--level', str(level),
+        ] + source_paths
+        stdout = self._run_asset_tool(cmd, "compression Draco")
+        if stdout is None:
+            return {}
+
+        # COMPRESSED_FILE=<source>|draco|<fichier_compressé>
+        compressed_files = {}
+        for line in stdout.split('\n'):
+            if not line.startswith('COMPRESSED_FILE='):
+                continue
+            try:
+                source_path, _method, compressed_path = line.split('=', 1)[1].strip().split('|')
+            except ValueError:
+                continue
+            if os.path.isfile(compressed_path):
+                compressed_files[os.path.normpath(source_path)] = os.path.normpath(compressed_path)
+        return compressed_files
+
+    def _compress_with_meshopt(self, source_paths):
+        """Compression EXT_meshopt_compression via gltfpack (meshoptimizer) : {source: fichier compressé}"""
+        gltfpack = self.env['ir.config_parameter'].sudo().get_param('cmms_3d_models.gltfpack_path', GLTFPACK_EXE)
+        compressed_files = {}
+        for source_path in source_paths:
+            compressed_path = f"{os.path.splitext(source_path)[0]}_meshopt.glb"
+            # -cc : compression meshopt maximale ; -kn/-km/-ke : conserver noms de nœuds, matériaux et extras
+            cmd = [gltfpack, '-i', source_path, '-o', compressed_path, '-cc', '-kn', '-km', '-ke']
+            if self._run_asset_tool(cmd, "compression meshopt") is not None and os.path.isfile(compressed_path):
+                compressed_files[source_path] = compressed_path
+        return compressed_files
+
+    def _get_preview_source(self, record):
+        """Fichier glTF/GLB du modèle principal à rendre (GLB autonome de préférence), ou None"""
+        model_dir = os.path.join(MODELS_DIR, str(record.id))
+        candidates = [record.glb_filename]
+        if record.model_filename and record.is_converted_from_blend:
+            candidates.append(f"{os.path.splitext(record.model_filename)[0]}.gltf")
+        candidates.append(record.model_filename)
+        for filename in candidates:
+            if filename and filename.lower().endswith(('.gltf', '.glb')):
+                source_path = os.path.normpath(os.path.join(model_dir, filename))
+                if os.path.isfile(source_path):
+                    return source_path
+        return None
+
+    def _render_previews(self, record):
+        """Rend la vignette et le turntable du modèle principal (Blender sans interface), puis écrit
+        les WebP dans le sous-dossier des aperçus et la vignette dans le champ thumbnail.
+        Les catalogues affichent ainsi un aperçu sans charger aucune géométrie."""
+        params = self.env['ir.config_parameter'].sudo()
+        if params.get_param('cmms_3d_models.previews_enabled', 'True').lower() in ('0', 'false', 'no'):
+            return
+        source_path = self._get_preview_source(record)
+        if not source_path:
+            return
+        preview_dir = os.path.join(MODELS_DIR, str(record.id), PREVIEW_DIR)
+        largest_path = os.path.join(preview_dir, f"thumbnail_{max(THUMBNAIL_SIZES)}.webp")
+        if record.thumbnail and self._is_derived_file_current(source_path, largest_path):
+            return
+
+        if not os.path.isfile(PREVIEW_SCRIPT_PATH):
+            _logger.error(f"Script de rendu des aperçus non trouvé: {PREVIEW_SCRIPT_PATH}")
+            return
+
+        with tempfile.TemporaryDirectory() as render_dir:
+            cmd = [
+                self._get_blender_executable(),
+                '--background',
+                '-noaudio',
+                '--python', PREVIEW_SCRIPT_PATH,
+                '--', '--size', str(max(THUMBNAIL_SIZES)),
+                '--turntable-size', str(TURNTABLE_SIZE),
+                '--frames', str(TURNTABLE_FRAMES),
+                '--output-dir', render_dir,
+                source_path,
+            ]
+            _logger.info(f"Rendu des aperçus du modèle {record.id}")
+            stdout = self._run_asset_tool(cmd, "rendu des aperçus")
+            if stdout is None:
+                return
+
+            # PREVIEW_FILE=<still|frame>|<index>|<fichier_png>
+            still_path = None
+            frame_paths = {}
+            for line in stdout.split('\n'):
+                if not line.startswith('PREVIEW_FILE='):
+                    continue
+                try:
+                    kind, index, image_path = line.split('=', 1)[1].strip().split('|')
+                except ValueError:
+                    continue
+                if not os.path.isfile(image_path):
+                    continue
+                if kind == 'still':
+                    still_path = image_path
+                elif kind == 'frame':
+                    frame_paths[int(index)] = image_path
+            if not still_path:
+                _logger.error(f"Aucune vignette rendue pour le modèle {record.id}")
+                return
+
+            thumbnails = {}
+            for size in THUMBNAIL_SIZES:
+                thumbnails[size] = _encode_webp([_resized_image(still_path, size)])
+                asset_storage.atomic_write(os.path.join(preview_dir, f"thumbnail_{size}.webp"), thumbnails[size])
+            if frame_paths:
+                frames = [_resized_image(frame_paths[index], TURNTABLE_SIZE) for index in sorted(frame_paths)]
+                asset_storage.atomic_write(os.path.join(preview_dir, f"turntable_{TURNTABLE_SIZE}.webp"),
+                                           _encode_webp(frames, duration=TURNTABLE_FRAME_DURATION))
+
+        record.write({'thumbnail': base64.b64encode(thumbnails[THUMBNAIL_FIELD_SIZE])})
+        _logger.info(f"Aperçus écrits pour le modèle {record.id}: {len(thumbnails)} vignettes, "
+                     f"turntable de {len(frame_paths)} images")
+
+    def _get_preview_data(self):
+        """URLs versionnées des aperçus WebP : {'thumbnails': {taille: url}, 'turntable': url}, ou {}"""
+        self.ensure_one()
+        hashes = self._get_asset_hashes()
+        thumbnails = {}
+        for size in THUMBNAIL_SIZES:
+            filename = f"{PREVIEW_DIR}/thumbnail_{size}.webp"
+            if filename in hashes:
+                thumbnails[str(size)] = self._get_asset_url(filename)
+        if not thumbnails:
+            return {}
+        turntable = f"{PREVIEW_DIR}/turntable_{TURNTABLE_SIZE}.webp"
+        return {
+            'thumbnails': thumbnails,
+            'turntable': self._get_asset_url(turntable) if turntable in hashes else None,
+        }
+
+    def _register_derived_files(self, record):
+        """Ajoute les fichiers dérivés du modèle principal (GLB, LOD, variante compressée)
+        à la liste des fichiers servis"""
+        derived_files = [record.glb_filename] if record.glb_filename else []
+        for entry in record._get_lod_entries():
+            derived_files += [entry['filename']] + entry.get('files', [])
+        if record.compressed_filename:
+            compressed_path = os.path.join(MODELS_DIR, str(record.id), record.compressed_filename)
+            derived_files += [record.compressed_filename] + list_external_uris(compressed_path)
+        if not derived_files:
+            return
+
+        file_list = []
+        if record.files_list:
+            try:
+                file_list = json.loads(record.files_list)
+            except Exception:
+                file_list = []
+        for filename in derived_files:
+            if filename not in file_list:
+                file_list.append(filename)
+        record.write({
+            'files_list': json.dumps(file_list),
+            'has_external_files': True,
+        })
+
+    def _get_stored_assets(self):
+        """Fichiers conservés en pièces jointes, restaurables sur le disque : [(nom de fichier, champ)]"""
+        self.ensure_one()
+        assets = [
+            (self.model_filename, 'model_file'),
+            (self.model_bin_filename, 'model_bin'),
+            (self.ifc_filename, 'ifc_file'),
+        ]
+        if self.is_converted_from_blend:
+            assets.append((self.source_blend_filename, 'source_blend_file'))
+        return [(filename, field_name) for filename, field_name in assets if filename]
+
+    def _materialize_stored_asset(self, filename):
+        """Écrit sur le disque un fichier conservé en pièce jointe s'il est absent (verrou par fichier,
+        écriture atomique). Retourne son chemin, ou False si le fichier n'est pas stocké en base."""
+        self.ensure_one()
+        file_path = os.path.normpath(os.path.join(MODELS_DIR, str(self.id), filename))
+        field_name = dict(self._get_stored_assets()).get(filename)
+        entry = self._get_asset_hashes().get(filename)
+
+        def load_content():
+            if not field_name or not self[field_name]:
+                return None
+            return base64.b64decode(self[field_name])
+
+        file_stat = (entry.get('size'), entry.get('mtime')) if entry else None
+        return file_path if asset_storage.materialize(file_path, load_content, file_stat) else False
+
+    def _has_missing_derived_files(self, record):
+        """Vrai si un GLB, LOD ou variante compressée enregistré est absent du disque"""
+        targets = [(record, os.path.join(MODELS_DIR, str(record.id)))]
+        targets += [(submodel, os.path.dirname(submodel.gltf_path))
+                    for submodel in record.submodel_ids if submodel.gltf_path]
+        for target, target_dir in targets:
+            derived_files = [target.glb_filename, target.compressed_filename]
+            derived_files += [entry['filename'] for entry in target._get_lod_entries()]
+            if any(filename and not os.path.isfile(os.path.join(target_dir, filename))
+                   for filename in derived_files):
+                return True
+        # Aperçus déjà rendus pour ce modèle mais absents de ce nœud
+        preview_path = os.path.join(MODELS_DIR, str(record.id), PREVIEW_DIR, f"thumbnail_{max(THUMBNAIL_SIZES)}.webp")
+        return bool(record.thumbnail) and not os.path.isfile(preview_path)
+
+    def _sync_assets_to_disk(self):
+        """Matérialise les fichiers stockés en base et régénère les fichiers dérivés manquants.
+        Retourne le nombre de fichiers restaurés."""
+        restored = 0
+        for record in self:
+            model_dir = os.path.join(MODELS_DIR, str(record.id))
+            missing = [filename for filename, _field in record._get_stored_assets()
+                       if not os.path.isfile(os.path.join(model_dir, filename))]
+            restored += sum(1 for filename in missing if record._materialize_stored_asset(filename))
+
+            regenerate = self._has_missing_derived_files(record)
+            if regenerate:
+                self._postprocess_model_assets(record)
+            elif missing:
+                self._precompress_model_assets(record)
+                self._update_asset_hashes(record)
+            # Les manifestes en cache ont pu être calculés sans ces fichiers (listés d'après le disque)
+            if regenerate or missing:
+                record._invalidate_asset_manifest()
+        return restored
+
+    @api.model
+    def _cron_sync_assets(self):
+        """Prépare le disque de ce nœud (après déploiement ou reconstruction) pour que la première
+        consultation d'un modèle ne paie ni décodage de pièce jointe ni écriture sur le disque.
+        Chaque thread utilise son propre curseur ; leur nombre est borné."""
+        max_workers = int(self.env['ir.config_parameter'].sudo().get_param(
+            'cmms_3d_models.sync_workers', DEFAULT_SYNC_WORKERS))
+        # Avec un budget disque, seuls les modèles épinglés sont restaurés d'avance ;
+        # les autres le sont à la première consultation puis soumis à l'éviction LRU
+        model_ids = self.search([('disk_pinned', '=', True)] if self._get_disk_budget() else []).ids
+        batches = [model_ids[i:i + SYNC_BATCH_SIZE] for i in range(0, len(model_ids), SYNC_BATCH_SIZE)]
+        uid, context = self.env.uid, self.env.context
+
+        def sync_batch(batch_ids):
+            try:
+                with self.pool.cursor() as cr:
+                    env = api.Environment(cr, uid, context)
+                    return env['cmms.model3d'].browse(batch_ids)._sync_assets_to_disk()
+            except Exception as e:
+                _logger.error(f"Erreur lors de la synchronisation des modèles {batch_ids}: {str(e)}")
+                return 0
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            restored = sum(executor.map(sync_batch, batches))
+        _logger.info(f"Synchronisation terminée: {len(model_ids)} modèles, {restored} fichiers restaurés")
+        return restored
+
+    def _get_disk_budget(self):
+        """Budget du cache disque MODELS_DIR en octets (0 : illimité)"""
+        try:
+            budget_mb = float(self.env['ir.config_parameter'].sudo().get_param(
+                'cmms_3d_models.disk_budget_mb') or 0)
+        except ValueError:
+            _logger.warning("Paramètre cmms_3d_models.disk_budget_mb invalide, budget disque ignoré")
+            return 0
+        return max(0, int(budget_mb * 1024 * 1024))
+
+    @api.model
+    def _enforce_disk_budget(self):
+        """Ramène sous le budget les fichiers restaurables depuis les pièces jointes (hors modèles
+        épinglés) en les supprimant, avec leurs variantes .br/.gz, du moins récemment lu au plus récent.
+        Les fichiers dérivés non restaurables à la demande (GLB, LOD, aperçus) et les modèles épinglés
+        ne sont pas évincés et ne comptent donc pas dans le budget.
+        Retourne le nombre d'octets libérés."""
+        budget = self._get_disk_budget()
+        if not budget or not os.path.isdir(MODELS_DIR):
+            return 0
+
+        evictable = set()
+        for record in self.with_context(prefetch_fields=False).search([('disk_pinned', '=', False)]):
+            evictable.update(os.path.normpath(os.path.join(MODELS_DIR, str(record.id), filename))
+                             for filename, _field in record._get_stored_assets())
+
+        # Un fichier et ses variantes précompressées forment une unité d'éviction : taille cumulée et
+        # date d'accès la plus récente (un fichier servi sous sa variante reste « chaud »)
+        units = {}
+        for file_path in evictable:
+            unit = units[file_path] = {'paths': [], 'size': 0, 'last_access': 0}
+            for suffix in ('', '.br', '.gz'):
+                try:
+                    file_stat = os.stat(f"{file_path}{suffix}")
+                except FileNotFoundError:
+                    continue
+                unit['paths'].append(f"{file_path}{suffix}")
+                unit['size'] += file_stat.st_size
+                unit['last_access'] = max(unit['last_access'], file_stat.st_atime)
+        usage = sum(unit['size'] for unit in units.values())
+        if usage <= budget:
+            return 0
+
+        target = budget * DISK_EVICTION_TARGET_RATIO
+        idle_limit = time.time() - max(DISK_EVICTION_MIN_IDLE, 2 * asset_storage.ACCESS_RECORD_INTERVAL)
+        freed = 0
+        evicted = 0
+        for unit in sorted(units.values(), key=lambda unit: unit['last_access']):
+            if usage - freed <= target or unit['last_access'] > idle_limit:
+                break
+            for file_path in unit['paths']:
+                try:
+                    freed += os.path.getsize(file_path)
+                    os.remove(file_path)
+                except FileNotFoundError:
+                    continue
+                evicted += 1
+
+        log = _logger.info if usage - freed <= budget else _logger.warning
+        log(f"Cache disque: {evicted} fichiers évincés, {freed} octets libérés, "
+            f"occupation {usage - freed}/{budget} octets")
+        return freed
+
+    @api.model
+    def _cron_enforce_disk_budget(self):
+        return self._enforce_disk_budget()
+
+    def action_sync_assets(self):
+        """Restaure sur le disque les fichiers des modèles sélectionnés"""
+        restored = self._sync_assets_to_disk()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': _('Synchronisation des fichiers'),
+                'message': _('%s fichier(s) restauré(s) sur le disque.') % restored,
+                'sticky': False,
+                'type': 'success',
+            }
+        }
+
+    def _get_precompressors(self):
+        """(suffixe, fonction de compression) disponibles, du plus efficace au moins efficace"""
+        precompressors = [('.br', _brotli_file)] if brotli else []
+        return precompressors + [('.gz', _gzip_file)]
+
+    def _precompress_model_assets(self, record):
+        """Écrit les variantes .br/.gz des fichiers texte du modèle (glTF JSON, IFC) à côté des originaux,
+        pour qu'elles soient servies selon Accept-Encoding sans compression à la requête"""
+        model_dir = os.path.normpath(os.path.join(MODELS_DIR, str(record.id)))
+        if not os.path.isdir(model_dir):
+            return
+        written = 0
+        for root, _dirs, filenames in os.walk(model_dir):
+            for name in filenames:
+                if not name.lower().endswith(PRECOMPRESS_EXTENSIONS):
+                    continue
+                source_path = os.path.join(root, name)
+                for suffix, compress in self._get_precompressors():
+                    target_path = f"{source_path}{suffix}"
+                    if self._is_derived_file_current(source_path, target_path):
+                        continue
+                    tmp_path = f"{target_path}.tmp"
+                    try:
+                        compress(source_path, tmp_path)
+                        if os.path.getsize(tmp_path) > os.path.getsize(source_path) * MAX_PRECOMPRESSED_RATIO:
+                            # Gain insuffisant : le fichier d'origine sera servi tel quel
+                            os.remove(tmp_path)
+                            if os.path.isfile(target_path):
+                                os.remove(target_path)
+                            continue
+                        os.replace(tmp_path, target_path)
+                        written += 1
+                    except Exception as e:
+                        _logger.error(f"Erreur lors de la précompression de {source_path} ({suffix}): {str(e)}")
+                        if os.path.isfile(tmp_path):
+                            os.remove(tmp_path)
+        if written:
+            _logger.info(f"{written} variantes précompressées écrites pour le modèle {record.id}")
+
+    def _update_asset_hashes(self, record):
+        """Calcule les empreintes SHA-256 des fichiers du dossier du modèle (sous-modèles compris).
+        Seuls les fichiers dont la taille ou la date de modification a changé sont relus. Les fichiers
+        stockés en base absents du disque (évincés, ou non restaurés sur ce nœud) gardent leur empreinte."""
+        model_dir = os.path.normpath(os.path.join(MODELS_DIR, str(record.id)))
+        if not os.path.isdir(model_dir):
+            return
+        try:
+            previous = record._get_asset_hashes()
+            hashes = {}
+            for root, _dirs, filenames in os.walk(model_dir):
+                for name in filenames:
+                    if name.endswith('.tmp'):
+                        continue
+                    file_path = os.path.join(root, name)
+                    relative_path = os.path.relpath(file_path, model_dir).replace(os.sep, '/')
+                    file_stat = os.stat(file_path)
+                    entry = previous.get(relative_path)
+                    if not entry or entry.get('size') != file_stat.st_size or entry.get('mtime') != file_stat.st_mtime_ns:
+                        entry = {
+                            'sha256': _file_sha256(file_path),
+                            'size': file_stat.st_size,
+                            'mtime': file_stat.st_mtime_ns,
+                        }
+                    hashes[relative_path] = entry
+            for filename, _field in record._get_stored_assets():
+                if filename not in hashes and filename in previous:
+                    hashes[filename] = previous[filename]
+            asset_hashes_json = json.dumps(hashes, sort_keys=True)
+            if asset_hashes_json != record.asset_hashes_json:
+                record.write({'asset_hashes_json': asset_hashes_json})
+            _logger.info(f"Empreintes calculées pour {len(hashes)} fichiers du modèle {record.id}")
+        except Exception as e:
+            # Sans empreinte, les fichiers restent servis avec un ETag faible (taille + date)
+            _logger.error(f"Erreur lors du calcul des empreintes des fichiers: {str(e)}")
+
+    def _get_asset_hashes(self):
+        self.ensure_one()
+        if not self.asset_hashes_json:
+            return {}
+        return _parse_asset_hashes(self.asset_hashes_json)
+
+    def _get_asset_version(self, filename):
+        entry = self._get_asset_hashes().get(filename)
+        return entry['sha256'][:ASSET_VERSION_LENGTH] if entry else False
+
+    def _invalidate_asset_manifest(self):
+        """Nouvelle version du manifeste des modèles : les entrées en cache de l'ancienne version ne sont
+        plus lues par aucun processus (les autres manifestes et caches du registre sont conservés)"""
+        if self.ids:
+            self.env.cr.execute("UPDATE cmms_model3d SET manifest_version = %s WHERE id IN %s",
+                                [uuid.uuid4().hex, tuple(self.ids)])
+            self.invalidate_recordset(['manifest_version'])
+
+    @api.model
+    def _get_asset_manifest(self, model_id):
+        """Manifeste des fichiers servis par les routes /models3d d'un modèle (voir _get_versioned_asset_manifest),
+        pour sa version courante. None si le modèle n'existe pas."""
+        self.env.cr.execute("SELECT manifest_version FROM cmms_model3d WHERE id = %s", [model_id])
+        row = self.env.cr.fetchone()
+        if not row:
+            return None
+        return self._get_versioned_asset_manifest(model_id, row[0])
+
+    @api.model
+    def _refresh_asset_manifest(self, model_id, manifest, relative_path):
+        """Manifeste à jour pour un fichier absent du manifeste en cache : s'il est apparu sur le disque
+        depuis son calcul (synchronisation ou restauration par un autre processus) et qu'il fait partie
+        des fichiers servis, la version du manifeste est renouvelée et le manifeste recalculé.
+        Retourne le manifeste recalculé, ou celui reçu si rien n'a changé."""
+        model_dir = os.path.normpath(os.path.join(MODELS_DIR, str(model_id)))
+        file_path = os.path.normpath(os.path.join(model_dir, relative_path))
+        if not file_path.startswith(model_dir + os.sep) or not os.path.isfile(file_path):
+            return manifest
+        # Mêmes règles que le parcours du disque de _get_versioned_asset_manifest : un fichier qui ne
+        # serait pas listé ne doit pas renouveler la version à chaque requête
+        parts = os.path.relpath(file_path, model_dir).split(os.sep)
+        name = parts[-1]
+        if parts[0] == 'childs':
+            public = (len(parts) > 2 and parts[1].isdigit() and int(parts[1]) in manifest['submodels']
+                      and not name.endswith(('.tmp', '.gz', '.br')))
+        else:
+            public = name.lower().endswith(PUBLIC_ASSET_EXTENSIONS) or name in KNOWN_TEXTURE_FILENAMES
+        if not public:
+            return manifest
+        self.browse(model_id)._invalidate_asset_manifest()
+        return self._get_asset_manifest(model_id) or manifest
+
+    @api.model
+    @tools.ormcache('model_id', 'version')
+    def _get_versioned_asset_manifest(self, model_id, version):
+        """Manifeste des fichiers servis par les routes /models3d d'un modèle, calculé une fois par processus
+        et par version (manifest_version, renouvelée à chaque écriture qui le concerne).
+        - files : {chemin relatif: {path, size, mtime, sha256, mime, variants}} ; variants donne les
+          variantes précompressées par Content-Encoding
+        - aliases : noms demandés servis sous un autre nom (.blend converti en .gltf)
+        - compressed : {chemin relatif du modèle: {method, filename}} (variante Draco/meshopt)
+        - stored : fichiers restaurables depuis les pièces jointes
+        - submodels : identifiants relatifs des sous-modèles JSON ; parent_id : parent (ancien système)
+        - parts : {'main' ou id de sous-modèle: {full, coarsest}} fichier principal en pleine résolution
+          et LOD le plus grossier (ou None) ; dependencies : {fichier .gltf: buffers et images externes}
+        Le résultat est partagé entre requêtes : il ne doit pas être modifié."""
+        record = self.sudo().browse(model_id).exists()
+        if not record:
+            return None
+        model_dir = os.path.normpath(os.path.join(MODELS_DIR, str(model_id)))
+        hashes = record._get_asset_hashes()
+        files = {}
+
+        def add(relative_path):
+            if relative_path in files:
+                return
+            entry = hashes.get(relative_path, {})
+            variants = {}
+            if relative_path.lower().endswith(PRECOMPRESS_EXTENSIONS):
+                for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+                    variant = hashes.get(f"{relative_path}{suffix}")
+                    if variant:
+                        variants[encoding] = dict(variant, path=os.path.normpath(
+                            os.path.join(model_dir, f"{relative_path}{suffix}")))
+            files[relative_path] = {
+                'path': os.path.normpath(os.path.join(model_dir, relative_path)),
+                'size': entry.get('size'),
+                'mtime': entry.get('mtime'),
+                'sha256': entry.get('sha256'),
+                'mime': asset_storage.get_asset_mime_type(relative_path),
+                'variants': variants,
+            }
+
+        # Fichiers nommés sur l'enregistrement, même s'ils ne sont pas (encore) sur le disque
+        named_files = [record.model_filename, record.model_bin_filename, record.glb_filename,
+                       record.ifc_filename, record.compressed_filename]
+        for entry in record._get_lod_entries():
+            named_files += [entry['filename']] + entry.get('files', [])
+        if record.has_external_files and record.files_list:
+            try:
+                named_files += json.loads(record.files_list)
+            except Exception:
+                pass
+        for filename in named_files:
+            if filename:
+                add(filename)
+
+        # Binaires, images et IFC présents dans le dossier du modèle (hors sous-modèles)
+        for root, dirs, filenames in os.walk(model_dir):
+            if root == model_dir:
+                dirs[:] = [d for d in dirs if d != 'childs']
+            for name in filenames:
+                if name.lower().endswith(PUBLIC_ASSET_EXTENSIONS) or name in KNOWN_TEXTURE_FILENAMES:
+                    add(os.path.relpath(os.path.join(root, name), model_dir).replace(os.sep, '/'))
+
+        aliases = {}
+        if record.is_converted_from_blend and record.source_blend_filename:
+            aliases[record.source_blend_filename] = f"{os.path.splitext(record.source_blend_filename)[0]}.gltf"
+
+        compressed = {}
+        if record.compressed_filename:
+            for filename in (record.model_filename, record.glb_filename):
+                if filename:
+                    compressed[filename] = {'method': record.compression_method,
+                                            'filename': record.compressed_filename}
+
+        # Sous-modèles JSON : tous les fichiers de leur dossier childs/<id>/
+        submodel_ids = set()
+        try:
+            submodel_ids = {submodel.get('id') for submodel in json.loads(record.submodels_json or '[]')}
+        except Exception:
+            pass
+        for submodel_id in submodel_ids:
+            submodel_dir = os.path.join(model_dir, 'childs', str(submodel_id))
+            for root, _dirs, filenames in os.walk(submodel_dir):
+                for name in filenames:
+                    if not name.endswith(('.tmp', '.gz', '.br')):
+                        add(os.path.relpath(os.path.join(root, name), model_dir).replace(os.sep, '/'))
+        for submodel in record.submodel_ids:
+            if not submodel.compressed_filename or not submodel.gltf_filename:
+                continue
+            prefix = f"childs/{submodel.relative_id}/"
+            gltf_stem = os.path.splitext(submodel.gltf_filename)[0]
+            for filename in (f"{gltf_stem}.gltf", f"{gltf_stem}.glb"):
+                compressed[f"{prefix}{filename}"] = {'method': submodel.compression_method,
+                                                     'filename': f"{prefix}{submodel.compressed_filename}"}
+
+        # Fichiers à charger par pièce (lots de /models3d/bundle)
+        parts = {}
+
+        def add_part(part_id, target, prefix, primary):
+            if not primary:
+                return
+            lod_entries = target._get_lod_entries()
+            parts[part_id] = {
+                'full': f"{prefix}{primary}",
+                'coarsest': f"{prefix}{lod_entries[-1]['filename']}" if lod_entries else None,
+            }
+
+        main_primary = record.glb_filename or record.model_filename
+        if record.is_converted_from_blend and not record.glb_filename and record.model_filename:
+            main_primary = f"{os.path.splitext(record.model_filename)[0]}.gltf"
+        add_part('main', record, '', main_primary)
+        for submodel in record.submodel_ids:
+            if submodel.relative_id in submodel_ids:
+                add_part(submodel.relative_id, submodel, f"childs/{submodel.relative_id}/",
+                         submodel.glb_filename or submodel.gltf_filename)
+
+        dependencies = {}
+        for part in parts.values():
+            for relative_path in (part['full'], part['coarsest']):
+                if not relative_path or not relative_path.lower().endswith('.gltf') or relative_path not in files:
+                    continue
+                if not os.path.isfile(files[relative_path]['path']):
+                    continue
+                base_dir = posixpath.dirname(relative_path)
+                dependencies[relative_path] = [
+                    dependency for dependency in (
+                        posixpath.normpath(posixpath.join(base_dir, uri))
+                        for uri in list_external_uris(files[relative_path]['path'])
+                    ) if dependency in files
+                ]
+
+        return {
+            'files': files,
+            'aliases': aliases,
+            'compressed': compressed,
+            'stored': [filename for filename, _field in record._get_stored_assets()],
+            'submodels': submodel_ids,
+            'parent_id': record.parent_id.id,
+            'parts': parts,
+            'dependencies': dependencies,
+        }
+
     def _analyze_gltf_references(self, record, gltf_path):
         """Analyze a GLTF file to find referenced external files"""
         try:
@@ -1477,6 +2556,7 @@ class Model3D(models.Model):
 
         # Créer les sous-modèles en tant qu'enregistrements réels dans cmms.submodel3d
         submodels_created = 0
+        nodes_geometry = {}
         for node_id, node_data in nodes_data.items():
             try:
                 node_id_int = int(node_id)  # Convertir l'ID en entier
@@ -1522,9 +2602,15 @@ class Model3D(models.Model):
                     "rotation_z": float(node_data.get("rotation", {}).get("z", 0)),
                 }
 
+                # Statistiques géométriques du nœud exporté
+                submodel_vals.update(self.env['cmms.submodel3d']._compute_geometry_vals(
+                    os.path.join(node_dir, os.path.basename(gltf_path))
+                ))
+
                 # Créer l'enregistrement du sous-modèle
                 submodel = self.env['cmms.submodel3d'].create(submodel_vals)
                 submodels_created += 1
+                nodes_geometry[node_id] = submodel._get_geometry_data()
 
                 _logger.info(f"Sous-modèle créé: {submodel.name} (ID: {submodel.id}, Relatif: {submodel.relative_id}, Échelle: {adjusted_scale})")
 
@@ -1564,7 +2650,8 @@ class Model3D(models.Model):
                         "y": node_data.get("rotation", {}).get("y", 0),
                         "z": node_data.get("rotation", {}).get("z", 0)
                     },
-                    "parent_id": node_data.get("parent_id")
+                    "parent_id": node_data.get("parent_id"),
+                    "geometry": nodes_geometry.get(node_id)
                 }
                 submodels_json.append(submodel_data)
 
@@ -0,0 +1,123 @@
+# custom_addons/cmms_3d_models/models/rate_limiter.py
+"""
+Limitation de débit des clés d'API par seau à jetons (token bucket) :
+1. Chaque clé dispose d'un seau de capacité `burst`, rempli de `rate` jetons par minute ;
+   chaque appel consomme un jeton, un seau vide refuse l'appel jusqu'au prochain jeton
+2. Serveur à processus unique (workers = 0) : seaux en mémoire, protégés par un verrou
+3. Serveur multi-processus (workers > 0) : seaux partagés par les workers du nœud dans une base
+   SQLite locale (data_dir), une transaction courte par décision ; chaque nœud applique la limite
+   à son propre trafic. Si la base SQLite est indisponible (verrou non obtenu, disque), la décision
+   revient aux seaux en mémoire du processus : la limite reste appliquée, par worker
+La décision ne lit jamais la table des journaux d'accès.
+"""
+
+import os
+import time
+import sqlite3
+import threading
+import logging
+
+from odoo.tools import config
+
+_logger = logging.getLogger(__name__)
+
+# Attente maximale du verrou SQLite (secondes) ; au-delà, seaux en mémoire du processus
+SQLITE_TIMEOUT = 0.5
+# Intervalle minimal entre deux avertissements d'indisponibilité de SQLite (secondes)
+SQLITE_WARNING_INTERVAL = 60
+
+
+def _take(tokens, updated_at, now, rate_per_second, capacity):
+    """Remplit le seau depuis updated_at puis retire un jeton si possible.
+    :return: (accepté, jetons restants, secondes avant le prochain jeton)"""
+    tokens = min(capacity, tokens + max(0.0, now - updated_at) * rate_per_second)
+    if tokens >= 1:
+        return True, tokens - 1, 0.0
+    return False, tokens, (1 - tokens) / rate_per_second
+
+
+class MemoryBuckets:
+    """Seaux du processus courant"""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, rate_per_second, capacity):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (capacity, now))
+            allowed, tokens, retry_after = _take(tokens, updated_at, now, rate_per_second, capacity)
+            self._buckets[key] = (tokens, now)
+        return allowed, retry_after
+
+
+class SQLiteBuckets:
+    """Seaux partagés entre les processus du nœud (une connexion par thread)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._fallback = MemoryBuckets()
+        self._last_warning = 0.0
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=SQLITE_TIMEOUT, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute("CREATE TABLE IF NOT EXISTS buckets "
+                               "(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)")
+            self._local.connection = connection
+        return connection
+
+    def consume(self, key, rate_per_second, capacity):
+        now = time.time()
+        try:
+            connection = self._connection()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (key,)).fetchone()
+                tokens, updated_at = row or (capacity, now)
+                allowed, tokens, retry_after = _take(tokens, updated_at, now, rate_per_second, capacity)
+                connection.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                                   (key, tokens, now))
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            # Seaux partagés indisponibles (y compris sous forte charge) : limite appliquée par ce processus
+            if now - self._last_warning >= SQLITE_WARNING_INTERVAL:
+                self._last_warning = now
+                _logger.warning(f"Seaux partagés indisponibles ({self.path}), seaux du processus utilisés: {str(e)}")
+            return self._fallback.consume(key, rate_per_second, capacity)
+        return allowed, retry_after
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_limiter():
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            if config.get('workers'):
+                path = os.path.join(config['data_dir'], 'cmms_3d_models', 'rate_limits.sqlite')
+                _limiter = SQLiteBuckets(path)
+            else:
+                _limiter = MemoryBuckets()
+        return _limiter
+
+
+def consume(key, rate_per_minute, burst=0):
+    """Consomme un jeton du seau de key.
+    :param rate_per_minute: jetons ajoutés par minute (0 : pas de limite)
+    :param burst: capacité du seau (0 : égale à rate_per_minute)
+    :return: (accepté, secondes à attendre avant de réessayer)"""
+    if not rate_per_minute or rate_per_minute <= 0:
+        return True, 0.0
+    return get_limiter().consume(key, rate_per_minute / 60.0, float(burst or rate_per_minute))
@@ -0,0 +1,198 @@
+# custom_addons/cmms_3d_models/models/spatial_index.py
+"""
+Index spatial (R-tree chargé en bloc par la méthode STR) sur les boîtes englobantes
+des sous-modèles, pour répondre côté serveur aux requêtes :
+1. Boîte (quels éléments intersectent une région)
+2. N plus proches voisins d'un point
+3. Lancer de rayon (picking), trié par distance
+"""
+
+import math
+import heapq
+import threading
+import logging
+from collections import OrderedDict
+
+_logger = logging.getLogger(__name__)
+
+NODE_CAPACITY = 16
+RAY_EPSILON = 1e-12
+
+# Cache des index par (base, modèle parent) : {clé: (empreinte, index)}
+MAX_CACHED_INDEXES = 32
+_index_cache = OrderedDict()
+_index_cache_lock = threading.Lock()
+
+
+class _Node:
+    __slots__ = ('min', 'max', 'children', 'item_id')
+
+    def __init__(self, bbox_min, bbox_max, children=None, item_id=None):
+        self.min = bbox_min
+        self.max = bbox_max
+        self.children = children
+        self.item_id = item_id
+
+
+def _enclose(nodes):
+    bbox_min = [min(node.min[axis] for node in nodes) for axis in range(3)]
+    bbox_max = [max(node.max[axis] for node in nodes) for axis in range(3)]
+    return _Node(bbox_min, bbox_max, children=nodes)
+
+
+def _center(node, axis):
+    return node.min[axis] + node.max[axis]
+
+
+def _point_box_distance(point, bbox_min, bbox_max):
+    total = 0.0
+    for axis in range(3):
+        if point[axis] < bbox_min[axis]:
+            delta = bbox_min[axis] - point[axis]
+        elif point[axis] > bbox_max[axis]:
+            delta = point[axis] - bbox_max[axis]
+        else:
+            continue
+        total += delta * delta
+    return math.sqrt(total)
+
+
+def _ray_box_entry(origin, inv_direction, bbox_min, bbox_max, max_distance):
+    """Test des dalles : distance d'entrée du rayon dans la boîte, ou None"""
+    t_near = 0.0
+    t_far = max_distance
+    for axis in range(3):
+        inv = inv_direction[axis]
+        if inv is None:
+            # Rayon parallèle à l'axe : l'origine doit être dans la dalle
+            if origin[axis] < bbox_min[axis] or origin[axis] > bbox_max[axis]:
+                return None
+            continue
+        t1 = (bbox_min[axis] - origin[axis]) * inv
+        t2 = (bbox_max[axis] - origin[axis]) * inv
+        if t1 > t2:
+            t1, t2 = t2, t1
+        t_near = max(t_near, t1)
+        t_far = min(t_far, t2)
+        if t_near > t_far:
+            return None
+    return t_near
+
+
+class SpatialIndex:
+    """R-tree 3D immuable construit en une passe (Sort-Tile-Recursive)"""
+
+    def __init__(self, entries):
+        """:param entries: itérable de (item_id, (min_x, min_y, min_z), (max_x, max_y, max_z))"""
+        leaves = [_Node(list(bbox_min), list(bbox_max), item_id=item_id)
+                  for item_id, bbox_min, bbox_max in entries]
+        self.size = len(leaves)
+        self.root = self._build(leaves) if leaves else None
+
+    def _build(self, nodes):
+        while len(nodes) > NODE_CAPACITY:
+            nodes = self._pack_level(nodes)
+        return _enclose(nodes)
+
+    def _pack_level(self, nodes):
+        """Regroupe un niveau de nœuds en parents de NODE_CAPACITY éléments (tuiles X, puis Y, puis Z)"""
+        parent_count = math.ceil(len(nodes) / NODE_CAPACITY)
+        slices = max(1, math.ceil(parent_count ** (1.0 / 3.0)))
+        x_slab = slices * slices * NODE_CAPACITY
+        y_slab = slices * NODE_CAPACITY
+
+        parents = []
+        nodes = sorted(nodes, key=lambda node: _center(node, 0))
+        for i in range(0, len(nodes), x_slab):
+            x_group = sorted(nodes[i:i + x_slab], key=lambda node: _center(node, 1))
+            for j in range(0, len(x_group), y_slab):
+                y_group = sorted(x_group[j:j + y_slab], key=lambda node: _center(node, 2))
+                for k in range(0, len(y_group), NODE_CAPACITY):
+                    parents.append(_enclose(y_group[k:k + NODE_CAPACITY]))
+        return parents
+
+    def query_box(self, bbox_min, bbox_max, limit=None):
+        """Identifiants des éléments dont la boîte intersecte la région donnée"""
+        results = []
+        if not self.root:
+            return results
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            if any(node.min[axis] > bbox_max[axis] or node.max[axis] < bbox_min[axis] for axis in range(3)):
+                continue
+            if node.children is None:
+                results.append(node.item_id)
+                if limit and len(results) >= limit:
+                    break
+            else:
+                stack.extend(node.children)
+        return results
+
+    def nearest(self, point, count=10, max_distance=None):
+        """Les `count` éléments les plus proches du point : liste de (item_id, distance)"""
+        results = []
+        if not self.root:
+            return results
+        heap = [(_point_box_distance(point, self.root.min, self.root.max), 0, self.root)]
+        sequence = 1
+        while heap and len(results) < count:
+            distance, _seq, node = heapq.heappop(heap)
+            if max_distance is not None and distance > max_distance:
+                break
+            if node.children is None:
+                results.append((node.item_id, distance))
+                continue
+            for child in node.children:
+                heapq.heappush(heap, (_point_box_distance(point, child.min, child.max), sequence, child))
+                sequence += 1
+        return results
+
+    def raycast(self, origin, direction, limit=10, max_distance=None):
+        """Éléments dont la boîte est traversée par le rayon, du plus proche au plus lointain :
+        liste de (item_id, distance d'entrée)"""
+        results = []
+        if not self.root:
+            return results
+        length = math.sqrt(sum(component * component for component in direction))
+        if length < RAY_EPSILON:
+            return results
+        unit = [component / length for component in direction]
+        inv_direction = [1.0 / component if abs(component) > RAY_EPSILON else None for component in unit]
+        max_distance = max_distance if max_distance is not None else math.inf
+
+        entry = _ray_box_entry(origin, inv_direction, self.root.min, self.root.max, max_distance)
+        if entry is None:
+            return results
+        heap = [(entry, 0, self.root)]
+        sequence = 1
+        while heap and len(results) < limit:
+            distance, _seq, node = heapq.heappop(heap)
+            if node.children is None:
+                results.append((node.item_id, distance))
+                continue
+            for child in node.children:
+                child_entry = _ray_box_entry(origin, inv_direction, child.min, child.max, max_distance)
+                if child_entry is not None:
+                    heapq.heappush(heap, (child_entry, sequence, child))
+                    sequence += 1
+        return results
+
+
+def get_cached_index(cache_key, fingerprint, builder):
+    """Retourne l'index en cache pour cette clé tant que l'empreinte des données n'a pas changé,
+    sinon le reconstruit via `builder()` (seul le modèle concerné est reconstruit)"""
+    with _index_cache_lock:
+        cached = _index_cache.get(cache_key)
+        if cached and cached[0] == fingerprint:
+            _index_cache.move_to_end(cache_key)
+            return cached[1]
+
+    index = builder()
+    with _index_cache_lock:
+        _index_cache[cache_key] = (fingerprint, index)
+        _index_cache.move_to_end(cache_key)
+        while len(_index_cache) > MAX_CACHED_INDEXES:
+            _index_cache.popitem(last=False)
+    _logger.info(f"Index spatial reconstruit pour {cache_key}: {index.size} éléments")
+    return index
@@ -9,9 +9,19 @@ _logger = logging.getLogger(__name__)
 
 # Importer le chemin des modèles depuis model3d.py
 from .model3d import MODELS_DIR
+from .gltf_analyzer import mat4_from_euler_degrees, transform_bbox
+from .spatial_index import SpatialIndex, get_cached_index
+
+# Champs des sous-modèles lus par le manifeste des fichiers du parent
+SUBMODEL_MANIFEST_FIELDS = {
+    'parent_id', 'relative_id', 'gltf_filename', 'glb_filename', 'lod_files_json',
+    'compressed_filename', 'compression_method',
+}
+
 
 class SubModel3D(models.Model):
     _name = 'cmms.submodel3d'
+    _inherit = ['cmms.geometry.mixin']
     _description = 'Sous-modèle 3D'
     _rec_name = 'name'
     
@@ -45,18 +55,111 @@ class SubModel3D(models.Model):
     # URL pour accéder aux fichiers
     gltf_url = fields.Char('URL du fichier glTF', compute='_compute_urls', store=False)
     bin_url = fields.Char('URL du fichier binaire', compute='_compute_urls', store=False)
+    glb_url = fields.Char('URL du GLB empaqueté', compute='_compute_urls', store=False)
     
     # URL pour le visualiseur
     viewer_url = fields.Char('URL du visualiseur', compute='_compute_viewer_url', store=False)
     
     # Champs actif pour l'archivage
     active = fields.Boolean('Actif', default=True)
+
+    # Boîte englobante dans l'espace du visualiseur (transformations du sous-modèle appliquées)
+    # Utilisée par l'index spatial pour les requêtes par région, voisinage et rayon
+    world_bbox_min_x = fields.Float('BBox monde min X', compute='_compute_world_bbox', store=True)
+    world_bbox_min_y = fields.Float('BBox monde min Y', compute='_compute_world_bbox', store=True)
+    world_bbox_min_z = fields.Float('BBox monde min Z', compute='_compute_world_bbox', store=True)
+    world_bbox_max_x = fields.Float('BBox monde max X', compute='_compute_world_bbox', store=True)
+    world_bbox_max_y = fields.Float('BBox monde max Y', compute='_compute_world_bbox', store=True)
+    world_bbox_max_z = fields.Float('BBox monde max Z', compute='_compute_world_bbox', store=True)
     
     _sql_constraints = [
         ('unique_relative_id_per_parent', 'unique(parent_id, relative_id)', 
          'L\'ID relatif doit être unique pour chaque modèle parent!')
     ]
     
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        # Le manifeste des fichiers du parent référence les fichiers et variantes des sous-modèles
+        records.parent_id._invalidate_asset_manifest()
+        return records
+
+    def write(self, vals):
+        manifest_changed = bool(SUBMODEL_MANIFEST_FIELDS.intersection(vals))
+        parents = self.parent_id if manifest_changed else self.env['cmms.model3d']
+        res = super().write(vals)
+        if manifest_changed:
+            (parents | self.parent_id)._invalidate_asset_manifest()
+        return res
+
+    def unlink(self):
+        parents = self.parent_id
+        res = super().unlink()
+        parents.exists()._invalidate_asset_manifest()
+        return res
+
+    @api.depends('has_geometry_stats', 'bbox_min_x', 'bbox_min_y', 'bbox_min_z',
+                 'bbox_max_x', 'bbox_max_y', 'bbox_max_z', 'scale',
+                 'position_x', 'position_y', 'position_z', 'rotation_x', 'rotation_y', 'rotation_z')
+    def _compute_world_bbox(self):
+        for record in self:
+            if not record.has_geometry_stats:
+                record.update({
+                    'world_bbox_min_x': 0.0, 'world_bbox_min_y': 0.0, 'world_bbox_min_z': 0.0,
+                    'world_bbox_max_x': 0.0, 'world_bbox_max_y': 0.0, 'world_bbox_max_z': 0.0,
+                })
+                continue
+
+            # Même transformation que celle appliquée par les visualiseurs three.js
+            matrix = mat4_from_euler_degrees(
+                (record.position_x, record.position_y, record.position_z),
+                (record.rotation_x, record.rotation_y, record.rotation_z),
+                record.scale,
+            )
+            world_min, world_max = transform_bbox(
+                matrix,
+                (record.bbox_min_x, record.bbox_min_y, record.bbox_min_z),
+                (record.bbox_max_x, record.bbox_max_y, record.bbox_max_z),
+            )
+            record.update({
+                'world_bbox_min_x': world_min[0], 'world_bbox_min_y': world_min[1], 'world_bbox_min_z': world_min[2],
+                'world_bbox_max_x': world_max[0], 'world_bbox_max_y': world_max[1], 'world_bbox_max_z': world_max[2],
+            })
+
+    @api.model
+    def _get_spatial_index(self, parent_id):
+        """Index spatial des sous-modèles d'un modèle parent.
+        Conservé en cache par processus et reconstruit uniquement pour le modèle dont
+        les sous-modèles ont changé (empreinte : nombre + dernière date d'écriture)."""
+        self.flush_model()
+        self.env.cr.execute("""
+            SELECT count(*), max(write_date)
+              FROM cmms_submodel3d
+             WHERE parent_id = %s AND active AND has_geometry_stats
+        """, (parent_id,))
+        fingerprint = self.env.cr.fetchone()
+
+        def build_index():
+            self.env.cr.execute("""
+                SELECT id, world_bbox_min_x, world_bbox_min_y, world_bbox_min_z,
+                       world_bbox_max_x, world_bbox_max_y, world_bbox_max_z
+                  FROM cmms_submodel3d
+                 WHERE parent_id = %s AND active AND has_geometry_stats
+            """, (parent_id,))
+            return SpatialIndex((row[0], row[1:4], row[4:7]) for row in self.env.cr.fetchall())
+
+        return get_cached_index((self.env.cr.dbname, parent_id), fingerprint, build_index)
+
+    def _get_world_bbox_data(self):
+        """Boîte englobante monde au format de l'API"""
+        self.ensure_one()
+        if not self.has_geometry_stats:
+            return None
+        return {
+            'min': {'x': self.world_bbox_min_x, 'y': self.world_bbox_min_y, 'z': self.world_bbox_min_z},
+            'max': {'x': self.world_bbox_max_x, 'y': self.world_bbox_max_y, 'z': self.world_bbox_max_z},
+        }
+
     @api.depends('parent_id', 'relative_id', 'gltf_filename', 'bin_filename')
     def _compute_file_paths(self):
         for record in self:
@@ -85,23 +188,37 @@ class SubModel3D(models.Model):
                 record.gltf_path = False
                 record.bin_path = False
     
-    @api.depends('parent_id', 'relative_id', 'gltf_filename', 'bin_filename')
+    @api.depends('parent_id', 'relative_id', 'gltf_filename', 'bin_filename', 'glb_filename',
+                 'parent_id.asset_hashes_json')
     def _compute_urls(self):
-        base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
         for record in self:
             if record.parent_id and record.relative_id and record.gltf_filename:
-                # URL du fichier glTF: /models3d/parent_id/childs/relative_id/gltf_filename
-                record.gltf_url = f"{base_url}/models3d/{record.parent_id.id}/childs/{record.relative_id}/{record.gltf_filename}"
+                # URL du fichier glTF: /models3d/parent_id/childs/relative_id/gltf_filename?v=empreinte
+                record.gltf_url = record._get_asset_url(record.gltf_filename)
                 
                 # URL du fichier binaire (si défini)
-                if record.bin_filename:
-                    record.bin_url = f"{base_url}/models3d/{record.parent_id.id}/childs/{record.relative_id}/{record.bin_filename}"
-                else:
-                    record.bin_url = False
+                record.bin_url = record._get_asset_url(record.bin_filename)
+
+                # GLB autonome servi en une seule requête (s'il a été empaqueté)
+                record.glb_url = record._get_asset_url(record.glb_filename)
             else:
                 record.gltf_url = False
                 record.bin_url = False
+                record.glb_url = False
     
+    def _get_asset_base_url(self):
+        self.ensure_one()
+        if not self.parent_id or not self.relative_id:
+            return False
+        base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
+        return f"{base_url}/models3d/{self.parent_id.id}/childs/{self.relative_id}/"
+
+    def _get_asset_version(self, filename):
+        # Les fichiers des sous-modèles sont répertoriés dans les empreintes du modèle parent
+        if not self.parent_id or not self.relative_id:
+            return False
+        return self.parent_id._get_asset_version(f"childs/{self.relative_id}/{filename}")
+
     @api.depends('parent_id', 'relative_id')
     def _compute_viewer_url(self):
         base_url = self.env['ir.config_parameter'].sudo().get_param('web.base.url')
@@ -0,0 +1,150 @@
+# custom_addons/cmms_3d_models/models/sync_tombstone.py
+"""
+Suivi des suppressions pour la synchronisation différentielle de l'API Flutter :
+1. Chaque suppression d'un enregistrement synchronisé laisse une trace (modèle, id, date)
+2. L'API renvoie les traces postérieures au jeton du client, qui retire ces enregistrements
+3. Les traces plus anciennes que la rétention sont purgées ; un client dont le jeton est plus
+   ancien reçoit une synchronisation complète
+Les pièces et assignations supprimées en cascade avec leur demande (ondelete='cascade' en SQL)
+ne laissent pas de trace : le client les retire avec la demande.
+4. Les changements de périmètre laissent aussi une trace (scope_change) : demandes et équipements
+   réaffectés (l'API renvoie comme supprimés ceux que l'utilisateur ne voit plus), et utilisateurs
+   dont les équipes ont changé (synchronisation complète)
+"""
+
+from datetime import timedelta
+import logging
+
+from odoo import api, fields, models
+
+_logger = logging.getLogger(__name__)
+
+# Rétention des traces de suppression (jours), paramètre système cmms_3d_models.sync_tombstone_days
+DEFAULT_TOMBSTONE_DAYS = 30
+
+
+class SyncTombstone(models.Model):
+    _name = 'cmms.sync.tombstone'
+    _description = 'Trace de suppression (synchronisation API)'
+    _order = 'deleted_date desc, id desc'
+    _rec_name = 'model_name'
+
+    model_name = fields.Char('Modèle', required=True, index=True)
+    res_id = fields.Integer('ID supprimé', required=True)
+    deleted_date = fields.Datetime('Supprimé le', required=True, index=True, default=fields.Datetime.now)
+    scope_change = fields.Boolean('Changement de périmètre', default=False,
+                                  help="L'enregistrement existe encore mais a pu sortir du périmètre API d'utilisateurs")
+
+    @api.model
+    def _get_retention_days(self):
+        value = self.env['ir.config_parameter'].sudo().get_param('cmms_3d_models.sync_tombstone_days')
+        try:
+            return max(1, int(value)) if value else DEFAULT_TOMBSTONE_DAYS
+        except ValueError:
+            _logger.warning(f"Valeur invalide pour cmms_3d_models.sync_tombstone_days: {value}")
+            return DEFAULT_TOMBSTONE_DAYS
+
+    @api.model
+    def _get_retention_start(self):
+        """Date avant laquelle les suppressions ne sont plus connues"""
+        return fields.Datetime.now() - timedelta(days=self._get_retention_days())
+
+    @api.model
+    def _record_unlink(self, records):
+        if records:
+            self.sudo().create([{'model_name': records._name, 'res_id': record_id} for record_id in records.ids])
+
+    @api.model
+    def _record_scope_change(self, records):
+        if records:
+            self.sudo().create([{'model_name': records._name, 'res_id': record_id, 'scope_change': True}
+                                for record_id in records.ids])
+
+    @api.model
+    def _get_deleted_ids(self, model_names, since, scope_change=False):
+        """{modèle: [ids supprimés après since]} ; avec scope_change, ids dont le périmètre a changé"""
+        result = {model_name: [] for model_name in model_names}
+        tombstones = self.sudo().search_read(
+            [('model_name', 'in', list(model_names)), ('deleted_date', '>', since),
+             ('scope_change', '=', scope_change)],
+            ['model_name', 'res_id'],
+        )
+        for tombstone in tombstones:
+            result[tombstone['model_name']].append(tombstone['res_id'])
+        return result
+
+    @api.model
+    def _has_scope_change(self, record, since):
+        """Vrai si le périmètre de record (un utilisateur par exemple) a changé après since"""
+        return bool(self.sudo().search([
+            ('model_name', '=', record._name), ('res_id', '=', record.id),
+            ('deleted_date', '>', since), ('scope_change', '=', True),
+        ], limit=1))
+
+    @api.model
+    def _cron_purge_tombstones(self):
+        tombstones = self.sudo().search([('deleted_date', '<', self._get_retention_start())])
+        count = len(tombstones)
+        tombstones.unlink()
+        if count:
+            _logger.info(f"{count} traces de suppression purgées")
+
+
+class SyncTrackedMixin(models.AbstractModel):
+    """Modèles synchronisés par l'API : les suppressions sont tracées"""
+    _name = 'cmms.sync.tracked.mixin'
+    _description = 'Suppressions suivies pour la synchronisation API'
+
+    # Champs dont la modification peut retirer l'enregistrement du périmètre API d'un utilisateur
+    _sync_scope_fields = ()
+
+    def write(self, vals):
+        if self._sync_scope_fields and set(self._sync_scope_fields).intersection(vals):
+            self.env['cmms.sync.tombstone']._record_scope_change(self)
+        return super().write(vals)
+
+    def unlink(self):
+        self.env['cmms.sync.tombstone']._record_unlink(self)
+        return super().unlink()
+
+
+class MaintenanceRequestSync(models.Model):
+    _name = 'maintenance.request'
+    _inherit = ['maintenance.request', 'cmms.sync.tracked.mixin']
+
+    # Voir CMSAPIController._get_allowed_requests_domain
+    _sync_scope_fields = ('user_id', 'owner_user_id', 'technician_user_id', 'assigned_user_id',
+                          'assigned_person_id', 'maintenance_team_id')
+
+
+class MaintenanceRequestPartSync(models.Model):
+    _name = 'maintenance.request.part'
+    _inherit = ['maintenance.request.part', 'cmms.sync.tracked.mixin']
+
+
+class MaintenanceRequestAssignmentSync(models.Model):
+    _name = 'maintenance.request.assignment'
+    _inherit = ['maintenance.request.assignment', 'cmms.sync.tracked.mixin']
+
+    # Une assignation retirée ou déplacée peut retirer sa demande du périmètre de la personne
+    def write(self, vals):
+        if {'person_id', 'request_id'}.intersection(vals):
+            self.env['cmms.sync.tombstone']._record_scope_change(self.request_id)
+        return super().write(vals)
+
+    def unlink(self):
+        self.env['cmms.sync.tombstone']._record_scope_change(self.request_id)
+        return super().unlink()
+
+
+class MaintenanceEquipmentSync(models.Model):
+    _name = 'maintenance.equipment'
+    _inherit = ['maintenance.equipment', 'cmms.sync.tracked.mixin']
+
+    # Voir CMSAPIController._get_allowed_equipment_domain
+    _sync_scope_fields = ('technician_user_id', 'owner_user_id', 'maintenance_team_id')
+
+
+class MaintenanceStageSync(models.Model):
+    _name = 'maintenance.stage'
+    _inherit = ['maintenance.stage', 'cmms.sync.tracked.mixin']
@@ -0,0 +1,4 @@
+# custom_addons/cmms_3d_models/tests/__init__.py
+from . import test_api_serializers
+from . import test_api_pagination
+from . import test_api_sync
@@ -0,0 +1,81 @@
+# custom_addons/cmms_3d_models/tests/test_api_pagination.py
+import inspect
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.cmms_3d_models.controllers import api_rest
+
+
+def _fail_on_error(controller, message="Error", status_code=400, error_details=None):
+    raise AssertionError(f"Réponse d'erreur {status_code}: {message}")
+
+
+@tagged('post_install', '-at_install')
+class TestRequestsKeysetPagination(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tracking_disable=True,
+                                       mail_create_nolog=True, mail_notrack=True))
+        cls.equipment = cls.env['maintenance.equipment'].create({'name': 'Équipement (pagination)'})
+        team = cls.env['maintenance.team'].create({'name': 'Équipe (pagination)'})
+        today = fields.Date.today()
+        # Dates vides (en tête du tri décroissant), puis plusieurs demandes par date
+        request_dates = [False] * 4 + [today] * 5 + [today - timedelta(days=1)] * 3 + [False]
+        cls.requests = cls.env['maintenance.request']
+        for index, request_date in enumerate(request_dates):
+            maintenance_request = cls.env['maintenance.request'].create({
+                'name': f"Demande {index}",
+                'equipment_id': cls.equipment.id,
+                'user_id': cls.env.uid,
+                'schedule_date': fields.Datetime.now(),
+                'maintenance_team_id': team.id,
+            })
+            maintenance_request.write({'request_date': request_date})
+            cls.requests |= maintenance_request
+
+    def _get_requests(self, **params):
+        controller = api_rest.CMSAPIController()
+        with patch.object(api_rest, 'request', SimpleNamespace(env=self.env)), \
+                patch.object(api_rest.CMSAPIController, '_stream_success_response',
+                             lambda controller, data=None, message="Success", status_code=200: data), \
+                patch.object(api_rest.CMSAPIController, '_error_response', _fail_on_error):
+            return inspect.unwrap(api_rest.CMSAPIController.get_requests)(
+                controller, equipment_id=str(self.equipment.id), fields='id', **params)
+
+    def _walk_pages(self, limit):
+        """Identifiants de toutes les pages, en suivant next_cursor"""
+        ids = []
+        cursor = None
+        for _page in range(len(self.requests) + 1):
+            data = self._get_requests(limit=str(limit), cursor=cursor)
+            ids += [values['id'] for values in data['requests']]
+            self.assertEqual(data['has_more'], bool(data['next_cursor']))
+            if not data['has_more']:
+                return ids
+            cursor = data['next_cursor']
+        self.fail("La pagination ne se termine pas")
+
+    def test_keyset_pages_without_gaps_or_duplicates(self):
+        """Dates vides et dates égales : chaque demande apparaît une fois, dans l'ordre request_date desc, id desc"""
+        expected = self.env['maintenance.request'].search(
+            [('id', 'in', self.requests.ids)], order='request_date desc, id desc').ids
+        for limit in (1, 2, 3, 5, len(self.requests)):
+            with self.subTest(limit=limit):
+                ids = self._walk_pages(limit)
+                self.assertEqual(len(ids), len(set(ids)))
+                self.assertEqual(ids, expected)
+
+    def test_keyset_cursor_on_null_date(self):
+        """Un curseur posé sur une date vide reprend après elle, sans sauter les dates renseignées"""
+        null_dated = self.requests.filtered(lambda record: not record.request_date).sorted('id', reverse=True)
+        data = self._get_requests(limit='100', cursor=api_rest._encode_cursor(None, null_dated[0].id))
+        ids = [values['id'] for values in data['requests']]
+        self.assertEqual(set(ids), set((self.requests - null_dated[0]).ids))
+        self.assertFalse(data['has_more'])
+        self.assertIsNone(data['next_cursor'])
@@ -0,0 +1,74 @@
+# custom_addons/cmms_3d_models/tests/test_api_serializers.py
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.cmms_3d_models.controllers import api_rest
+
+REQUEST_COUNT = 1000
+# Borne du nombre de requêtes SQL pour sérialiser toute la page : une lecture par modèle lié
+# et par tranche de READ_PAGE_SIZE identifiants, indépendante du nombre de demandes
+MAX_SERIALIZE_QUERIES = 60
+
+
+@tagged('post_install', '-at_install')
+class TestSerializeRequests(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tracking_disable=True,
+                                       mail_create_nolog=True, mail_notrack=True))
+        role = cls.env['maintenance.role'].create({'name': 'Technicien (test)'})
+        persons = cls.env['maintenance.person'].create([
+            {'name': f"Personne {index}", 'first_name': 'Test', 'role_id': role.id} for index in range(4)
+        ])
+        model3d = cls.env['cmms.model3d'].create({'name': 'Modèle (test)'})
+        submodels = cls.env['cmms.submodel3d'].create([
+            {'name': f"Pièce {index}", 'parent_id': model3d.id, 'relative_id': index,
+             'gltf_filename': f"piece_{index}.gltf"} for index in range(4)
+        ])
+        equipments = cls.env['maintenance.equipment'].create([
+            {'name': f"Équipement {index}", 'model3d_id': model3d.id} for index in range(10)
+        ])
+        team = cls.env['maintenance.team'].create({'name': 'Équipe (test)'})
+        schedule_date = fields.Datetime.now()
+
+        cls.requests = cls.env['maintenance.request']
+        for index in range(REQUEST_COUNT):
+            maintenance_request = cls.env['maintenance.request'].create({
+                'name': f"Demande {index}",
+                'equipment_id': equipments[index % len(equipments)].id,
+                'user_id': cls.env.uid,
+                'schedule_date': schedule_date,
+                'maintenance_team_id': team.id,
+            })
+            for offset in range(2):
+                cls.env['maintenance.request.assignment'].create({
+                    'request_id': maintenance_request.id,
+                    'person_id': persons[(index + offset) % len(persons)].id,
+                })
+                cls.env['maintenance.request.part'].create({
+                    'request_id': maintenance_request.id,
+                    'submodel_id': submodels[(index + offset) % len(submodels)].id,
+                    'intervention_type': 'inspection',
+                })
+            cls.requests |= maintenance_request
+
+    def _serialize(self, requests):
+        controller = api_rest.CMSAPIController()
+        with patch.object(api_rest, 'request', SimpleNamespace(env=self.env)):
+            return controller._serialize_requests(requests)
+
+    def test_serialize_requests_query_count(self):
+        """La sérialisation d'une page de demandes fait un nombre borné de requêtes SQL"""
+        self.env.invalidate_all()
+        with self.assertQueryCount(MAX_SERIALIZE_QUERIES):
+            result = self._serialize(self.requests)
+
+        self.assertEqual(len(result), REQUEST_COUNT)
+        for values in result:
+            self.assertEqual(len(values['assignments']), 2)
+            self.assertEqual(len(values['parts']), 2)
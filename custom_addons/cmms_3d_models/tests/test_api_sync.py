@@ -0,0 +1,138 @@
+# custom_addons/cmms_3d_models/tests/test_api_sync.py
+import inspect
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from odoo import fields
+from odoo.tests import TransactionCase, tagged
+
+from odoo.addons.cmms_3d_models.controllers import api_rest
+
+REQUEST_COUNT = 5
+EQUIPMENT_COUNT = 3
+
+
+def _fail_on_error(controller, message="Error", status_code=400, error_details=None):
+    raise AssertionError(f"Réponse d'erreur {status_code}: {message}")
+
+
+@tagged('post_install', '-at_install')
+class TestSyncChanges(TransactionCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.env = cls.env(context=dict(cls.env.context, tracking_disable=True, no_reset_password=True,
+                                       mail_create_nolog=True, mail_notrack=True))
+        cls.env['ir.config_parameter'].sudo().set_param('cmms_3d_models.sync_tombstone_days', '30')
+        groups = [(6, 0, [cls.env.ref('base.group_user').id,
+                          cls.env.ref('maintenance.group_equipment_manager').id])]
+        cls.user, cls.other_user = cls.env['res.users'].create([
+            {'name': 'Technicien (sync)', 'login': 'cmms_sync_user', 'groups_id': groups},
+            {'name': 'Autre technicien (sync)', 'login': 'cmms_sync_other', 'groups_id': groups},
+        ])
+        cls.team = cls.env['maintenance.team'].create({'name': 'Équipe (sync)'})
+        cls.equipment = cls.env['maintenance.equipment'].create([
+            {'name': f"Équipement {index}", 'technician_user_id': cls.user.id} for index in range(EQUIPMENT_COUNT)
+        ])
+        cls.requests = cls.env['maintenance.request']
+        for index in range(REQUEST_COUNT):
+            cls.requests |= cls.env['maintenance.request'].create({
+                'name': f"Demande {index}",
+                'equipment_id': cls.equipment[index % EQUIPMENT_COUNT].id,
+                'user_id': cls.user.id,
+                'schedule_date': fields.Datetime.now(),
+                'maintenance_team_id': cls.team.id,
+            })
+
+    def _sync(self, **params):
+        controller = api_rest.CMSAPIController()
+        with patch.object(api_rest, 'request', SimpleNamespace(env=self.env(user=self.user))), \
+                patch.object(api_rest.CMSAPIController, '_stream_success_response',
+                             lambda controller, data=None, message="Success", status_code=200: data), \
+                patch.object(api_rest.CMSAPIController, '_error_response', _fail_on_error):
+            return inspect.unwrap(api_rest.CMSAPIController.sync_changes)(controller, **params)
+
+    def _full_sync(self, limit=None):
+        """Pages d'une synchronisation complète, en suivant next_cursor"""
+        pages = []
+        cursor = None
+        for _page in range(REQUEST_COUNT + EQUIPMENT_COUNT + 1):
+            data = self._sync(cursor=cursor, limit=limit)
+            pages.append(data)
+            if not data['has_more']:
+                return pages
+            cursor = data['next_cursor']
+        self.fail("La synchronisation complète ne se termine pas")
+
+    def test_full_sync_pages(self):
+        """Pages d'au plus limit demandes et équipements, sans doublon ; jeton sur la dernière page seulement"""
+        pages = self._full_sync(limit='2')
+        self.assertGreater(len(pages), 1)
+        request_ids = [values['id'] for page in pages for values in page['requests']]
+        equipment_ids = [values['id'] for page in pages for values in page['equipment']]
+        self.assertEqual(sorted(request_ids), sorted(self.requests.ids))
+        self.assertEqual(sorted(equipment_ids), sorted(self.equipment.ids))
+        for page in pages:
+            self.assertTrue(page['full'])
+            self.assertLessEqual(len(page['requests']), 2)
+            self.assertLessEqual(len(page['equipment']), 2)
+        for page in pages[:-1]:
+            self.assertTrue(page['next_cursor'])
+            self.assertIsNone(page['sync_token'])
+        self.assertIsNone(pages[-1]['next_cursor'])
+        self.assertTrue(pages[-1]['sync_token'])
+        # Les stages ne sont envoyés qu'avec la première page
+        self.assertTrue(pages[0]['stages'])
+        self.assertFalse(any(page['stages'] for page in pages[1:]))
+
+    def test_delta_reports_deleted_and_reassigned(self):
+        """Suppressions et réaffectations hors du périmètre de l'utilisateur figurent dans deleted"""
+        token = self._full_sync()[-1]['sync_token']
+        deleted_request, reassigned_request, moved_request = self.requests[:3]
+        deleted_request.unlink()
+        reassigned_request.write({'user_id': self.other_user.id})
+        # Réaffectation qui laisse la demande visible (créée par l'utilisateur) : pas une suppression
+        other_team = self.env['maintenance.team'].create({'name': 'Autre équipe (sync)'})
+        moved_request.write({'maintenance_team_id': other_team.id})
+        reassigned_equipment = self.equipment[0]
+        reassigned_equipment.write({'technician_user_id': self.other_user.id})
+
+        data = self._sync(since=token)
+        self.assertFalse(data['full'])
+        self.assertIn(deleted_request.id, data['deleted']['requests'])
+        self.assertIn(reassigned_request.id, data['deleted']['requests'])
+        self.assertNotIn(moved_request.id, data['deleted']['requests'])
+        self.assertIn(moved_request.id, [values['id'] for values in data['requests']])
+        self.assertIn(reassigned_equipment.id, data['deleted']['equipment'])
+        self.assertTrue(data['sync_token'])
+
+    def test_expired_token_forces_full_sync(self):
+        """Un jeton antérieur à la rétention des suppressions donne une synchronisation complète"""
+        expired = api_rest._encode_sync_token(fields.Datetime.now() - timedelta(days=31))
+        data = self._sync(since=expired)
+        self.assertTrue(data['full'])
+        self.assertEqual(sorted(values['id'] for values in data['requests']), sorted(self.requests.ids))
+
+    def test_team_added_forces_full_sync(self):
+        """L'ajout de l'utilisateur à une équipe donne une synchronisation complète
+        (les demandes de l'équipe n'ont pas été modifiées, le différentiel ne les enverrait pas)"""
+        token = self._full_sync()[-1]['sync_token']
+        self.assertFalse(self._sync(since=token)['full'])
+
+        self.team.write({'member_ids': [(4, self.user.id)]})
+        self.assertTrue(self._sync(since=token)['full'])
+
+    def test_team_removed_forces_full_sync(self):
+        """Le retrait de l'utilisateur d'une équipe donne une synchronisation complète"""
+        self.team.write({'member_ids': [(4, self.user.id)]})
+        # Ajout antérieur au jeton du client
+        self.env['cmms.sync.tombstone'].search([
+            ('model_name', '=', 'res.users'), ('res_id', '=', self.user.id),
+        ]).write({'deleted_date': fields.Datetime.now() - timedelta(hours=1)})
+        token = self._full_sync()[-1]['sync_token']
+        self.assertFalse(self._sync(since=token)['full'])
+
+        self.team.write({'member_ids': [(3, self.user.id)]})
+        self.assertTrue(self._sync(since=token)['full'])